@@ -3,9 +3,9 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Any
 
-import duckdb
 
 from app.config import DUCKDB_PATH
+from pipeline.db import get_connection
 
 
 def _to_date_string(value: str | date | datetime | None) -> str | None:
@@ -67,53 +67,44 @@ def get_evidence_quotes(
     params: list[Any] = []
 
     if start:
-        where_clauses.append("DATE(r.at_ts) >= ?")
+        where_clauses.append("w.at_ts >= CAST(? AS DATE)")
         params.append(start)
     if end:
-        where_clauses.append("DATE(r.at_ts) <= ?")
+        where_clauses.append("w.at_ts < CAST(? AS DATE) + INTERVAL 1 DAY")
         params.append(end)
     if version:
-        where_clauses.append("r.app_version = ?")
+        where_clauses.append("w.app_version = ?")
         params.append(version)
     if category:
-        where_clauses.append("COALESCE(e.category_taxonomy, 'Other') = ?")
+        where_clauses.append("COALESCE(w.category_taxonomy, 'Other') = ?")
         params.append(category)
     if issue_label:
-        where_clauses.append(
-            """
-            EXISTS (
-                SELECT 1
-                FROM json_each(COALESCE(e.issues_json, '[]')) je
-                WHERE LOWER(CAST(je.value ->> 'label' AS VARCHAR)) = LOWER(?)
-            )
-            """
-        )
+        where_clauses.append("list_contains(list_transform(w.issue_labels, label -> LOWER(label)), LOWER(?))")
         params.append(issue_label)
 
     query = f"""
         SELECT
-            r.review_id,
-            DATE(r.at_ts) AS day,
-            r.content,
-            r.score,
-            r.thumbs_up,
-            r.app_version,
-            COALESCE(e.category_taxonomy, 'Other') AS category_taxonomy,
-            COALESCE(e.sentiment_label, 'unknown') AS sentiment_label,
-            COALESCE(e.severity_score, 0.0) AS severity_score
-        FROM reviews_raw r
-        JOIN reviews_enriched e USING (review_id)
+            w.review_id,
+            w.day,
+            w.content,
+            w.score,
+            w.thumbs_up,
+            w.app_version,
+            COALESCE(w.category_taxonomy, 'Other') AS category_taxonomy,
+            COALESCE(w.sentiment_label, 'unknown') AS sentiment_label,
+            COALESCE(w.severity_score, 0.0) AS severity_score
+        FROM reviews_wide w
         WHERE {' AND '.join(where_clauses)}
         ORDER BY
-            COALESCE(e.severity_score, 0.0) DESC,
-            COALESCE(r.thumbs_up, 0) DESC,
-            r.at_ts DESC
+            COALESCE(w.severity_score, 0.0) DESC,
+            COALESCE(w.thumbs_up, 0) DESC,
+            w.at_ts DESC
         LIMIT ?
     """
 
     params.append(safe_limit)
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
         rows = conn.execute(query, params).fetchall()
 
     evidence: list[dict[str, Any]] = []
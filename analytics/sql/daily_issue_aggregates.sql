@@ -0,0 +1,9 @@
+SELECT
+    w.day,
+    u.issue_label,
+    COUNT(*) AS review_count,
+    SUM(COALESCE(w.severity_score, 0.0)) AS weighted_severity
+FROM reviews_wide w,
+     UNNEST(w.issue_labels) AS u(issue_label)
+GROUP BY 1, 2
+ORDER BY 1, 2;
@@ -1,24 +1,21 @@
 WITH base AS (
     SELECT
-        DATE(r.at_ts) AS day,
+        w.day,
         COUNT(*) AS total_reviews,
-        AVG(CAST(r.score AS DOUBLE)) AS avg_rating,
-        AVG(CASE WHEN e.sentiment_label = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
-        AVG(CASE WHEN e.sentiment_label = 'positive' THEN 1.0 ELSE 0.0 END) AS pct_positive,
-        SUM(CASE WHEN COALESCE(e.severity_score, 0.0) >= 0.80 THEN 1 ELSE 0 END) AS critical_count
-    FROM reviews_raw r
-    JOIN reviews_enriched e USING (review_id)
+        AVG(CAST(w.score AS DOUBLE)) AS avg_rating,
+        AVG(CASE WHEN w.sentiment_label = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
+        AVG(CASE WHEN w.sentiment_label = 'positive' THEN 1.0 ELSE 0.0 END) AS pct_positive,
+        SUM(CASE WHEN COALESCE(w.severity_score, 0.0) >= 0.80 THEN 1 ELSE 0 END) AS critical_count
+    FROM reviews_wide w
     GROUP BY 1
 ),
 issue_rows AS (
     SELECT
-        DATE(r.at_ts) AS day,
-        CAST(je.value ->> 'label' AS VARCHAR) AS label,
-        COALESCE(e.severity_score, 0.0) AS severity_score
-    FROM reviews_raw r
-    JOIN reviews_enriched e USING (review_id)
-    LEFT JOIN LATERAL json_each(COALESCE(e.issues_json, '[]')) AS je ON TRUE
-    WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
+        w.day,
+        u.label,
+        COALESCE(w.severity_score, 0.0) AS severity_score
+    FROM reviews_wide w,
+         UNNEST(w.issue_labels) AS u(label)
 ),
 issue_agg AS (
     SELECT
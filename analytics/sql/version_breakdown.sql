@@ -1,25 +1,22 @@
 WITH base AS (
     SELECT
-        r.app_version,
-        MIN(DATE(r.at_ts)) AS first_seen_day,
-        MAX(DATE(r.at_ts)) AS last_seen_day,
+        w.app_version,
+        MIN(w.day) AS first_seen_day,
+        MAX(w.day) AS last_seen_day,
         COUNT(*) AS total_reviews,
-        AVG(CAST(r.score AS DOUBLE)) AS avg_rating,
-        AVG(CASE WHEN e.sentiment_label = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
-        SUM(CASE WHEN COALESCE(e.severity_score, 0.0) >= 0.80 THEN 1 ELSE 0 END) AS critical_count
-    FROM reviews_raw r
-    JOIN reviews_enriched e USING (review_id)
+        AVG(CAST(w.score AS DOUBLE)) AS avg_rating,
+        AVG(CASE WHEN w.sentiment_label = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
+        SUM(CASE WHEN COALESCE(w.severity_score, 0.0) >= 0.80 THEN 1 ELSE 0 END) AS critical_count
+    FROM reviews_wide w
     GROUP BY 1
 ),
 issue_rows AS (
     SELECT
-        r.app_version,
-        CAST(je.value ->> 'label' AS VARCHAR) AS label,
-        COALESCE(e.severity_score, 0.0) AS severity_score
-    FROM reviews_raw r
-    JOIN reviews_enriched e USING (review_id)
-    LEFT JOIN LATERAL json_each(COALESCE(e.issues_json, '[]')) AS je ON TRUE
-    WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
+        w.app_version,
+        u.label,
+        COALESCE(w.severity_score, 0.0) AS severity_score
+    FROM reviews_wide w,
+         UNNEST(w.issue_labels) AS u(label)
 ),
 issue_agg AS (
     SELECT
@@ -52,11 +49,10 @@ issue_json AS (
 ),
 category_agg AS (
     SELECT
-        r.app_version,
-        COALESCE(e.category_taxonomy, 'Other') AS category_taxonomy,
+        w.app_version,
+        COALESCE(w.category_taxonomy, 'Other') AS category_taxonomy,
         COUNT(*) AS review_count
-    FROM reviews_raw r
-    JOIN reviews_enriched e USING (review_id)
+    FROM reviews_wide w
     GROUP BY 1, 2
 ),
 category_json AS (
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 
 ROOT_DIR: Path = Path(__file__).resolve().parent.parent
 DATA_DIR: Path = ROOT_DIR / "data"
 DB_DIR: Path = DATA_DIR / "db"
-DUCKDB_PATH: Path = DB_DIR / "reviews.duckdb"
+DUCKDB_PATH: Path = Path(os.getenv("REVIEWS_DUCKDB_PATH", str(DB_DIR / "reviews.duckdb")))
+
+# Overview charts: browser-rendered gr.LinePlot series instead of cached server-side matplotlib PNGs.
+OVERVIEW_NATIVE_PLOTS: bool = os.getenv("OVERVIEW_NATIVE_PLOTS", "0").strip().lower() in {"1", "true", "yes", "on"}
+CHART_CACHE_SIZE: int = int(os.getenv("CHART_CACHE_SIZE", "48"))
 
 # Existing source files for initial ingestion/mapping.
 SOURCE_CSVS: tuple[Path, ...] = (
@@ -4,11 +4,12 @@ import json
 import os
 import sys
 import tempfile
+import threading
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from types import ModuleType
 from typing import Any
 
-import duckdb
 import gradio as gr
 import pandas as pd
 
@@ -16,25 +17,42 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from analytics.evidence_quotes import get_evidence_quotes
-from app.config import DUCKDB_PATH
-from app.services.insights_service import generate_sprint_backlog, generate_weekly_exec_brief
-from app.services.search_service import get_filter_options, search_reviews
+from app.config import CHART_CACHE_SIZE, DUCKDB_PATH, OVERVIEW_NATIVE_PLOTS
+from app.metrics import install_query_metrics, observe_handler, start_metrics_server
+from app.services.search_service import export_reviews, get_filter_options, search_reviews
+from app.services.view_cache import ViewCache
 from app.ui.components import (
     build_exec_brief_page,
     build_issues_page,
     build_overview_page,
+    build_query_profiles_page,
     build_release_diff_page,
     build_sprint_planner_page,
     build_trends_page,
 )
-from app.ui.plots import (
-    get_daily_trends,
-    plot_critical_count_trend,
-    plot_pct_negative_trend,
-    plot_rating_trend,
-)
 from app.ui.renderers import render_exec_brief, render_sprint_backlog
 from app.ui.theme import build_theme, load_css
+from pipeline.db import QUERY_PROFILE_SLOW_MS, get_connection
+from pipeline.query_profiles import latest_profile, slowest_queries
+
+# Overview KPIs, trend rows and top issues per date range, shared across sessions until the pipeline writes again.
+_OVERVIEW_CACHE = ViewCache("overview")
+# Rendered overview chart PNGs per (metric, range); evicted files are deleted.
+_CHART_DIR = Path(tempfile.gettempdir()) / "review_insights_charts"
+_CHART_CACHE = ViewCache("charts", maxsize=CHART_CACHE_SIZE, on_evict=lambda path: Path(str(path)).unlink(missing_ok=True))
+# metric -> (daily_aggregates column, plots renderer, scale for the native LinePlot series)
+_TREND_CHARTS: dict[str, tuple[str, str, float]] = {
+    "rating": ("avg_rating", "plot_rating_trend", 1.0),
+    "pct_negative": ("pct_negative", "plot_pct_negative_trend", 100.0),
+    "critical": ("critical_count", "plot_critical_count_trend", 1.0),
+}
+
+
+def _plots() -> ModuleType:
+    # matplotlib adds most of a second to startup; import it on the first chart render (or the warm-up thread).
+    from app.ui import plots
+
+    return plots
 
 
 def _to_date_string(value: str | date | datetime | None) -> str | None:
@@ -72,7 +90,7 @@ def _get_kpis(start_date: str | None, end_date: str | None) -> dict[str, Any]:
         WHERE day >= ? AND day <= ?
     """
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
         total_reviews, avg_rating, pct_negative, critical_count, churn_high_users = conn.execute(
             query, [start_date, end_date]
         ).fetchone()
@@ -88,41 +106,31 @@ def _get_kpis(start_date: str | None, end_date: str | None) -> dict[str, Any]:
 
 def _get_top_issues(start_date: str | None, end_date: str | None, top_n: int = 5) -> pd.DataFrame:
     query = """
-        SELECT top_issues_json
-        FROM daily_aggregates
+        SELECT
+            issue_label,
+            SUM(review_count) AS review_count,
+            SUM(weighted_severity) AS weighted_severity
+        FROM daily_issue_aggregates
         WHERE day >= ? AND day <= ?
+        GROUP BY 1
+        ORDER BY weighted_severity DESC, review_count DESC, issue_label
+        LIMIT ?
     """
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
-        rows = conn.execute(query, [start_date, end_date]).fetchall()
-
-    bucket: dict[str, dict[str, float]] = {}
-    for (payload,) in rows:
-        try:
-            items = json.loads(payload or "[]")
-        except json.JSONDecodeError:
-            items = []
-        for issue in items:
-            label = str(issue.get("label", "Unknown"))
-            bucket.setdefault(label, {"review_count": 0.0, "weighted_severity": 0.0})
-            bucket[label]["review_count"] += float(issue.get("review_count", 0.0) or 0.0)
-            bucket[label]["weighted_severity"] += float(issue.get("weighted_severity", 0.0) or 0.0)
-
-    if not bucket:
-        return pd.DataFrame(columns=["issue_label", "review_count", "weighted_severity"])
-
-    rows_out = [
-        {
-            "issue_label": label,
-            "review_count": int(values["review_count"]),
-            "weighted_severity": round(values["weighted_severity"], 3),
-        }
-        for label, values in bucket.items()
-    ]
-    df = pd.DataFrame(rows_out).sort_values(
-        ["weighted_severity", "review_count", "issue_label"], ascending=[False, False, True]
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
+        rows = conn.execute(query, [start_date, end_date, max(1, int(top_n))]).fetchall()
+
+    return pd.DataFrame(
+        [
+            {
+                "issue_label": str(label),
+                "review_count": int(review_count or 0),
+                "weighted_severity": round(float(weighted_severity or 0.0), 3),
+            }
+            for label, review_count, weighted_severity in rows
+        ],
+        columns=["issue_label", "review_count", "weighted_severity"],
     )
-    return df.head(top_n).reset_index(drop=True)
 
 
 def _format_quotes(quotes: list[dict[str, Any]]) -> str:
@@ -172,7 +180,7 @@ def _runtime_status(db_ready: bool) -> str:
         return "DB not connected"
 
     try:
-        with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+        with get_connection(DUCKDB_PATH, read_only=True) as conn:
             last_day = conn.execute("SELECT MAX(day) FROM daily_aggregates").fetchone()[0]
     except Exception:  # noqa: BLE001
         last_day = None
@@ -182,6 +190,36 @@ def _runtime_status(db_ready: bool) -> str:
     return "DB connected"
 
 
+def _overview_data(start: str, end: str) -> tuple[dict[str, Any], pd.DataFrame, pd.DataFrame]:
+    return _OVERVIEW_CACHE.get_or_compute(
+        (start, end),
+        lambda: (_get_kpis(start, end), _plots().get_daily_trends(start, end), _get_top_issues(start, end, top_n=5)),
+    )
+
+
+def _trend_chart(metric: str, start: str, end: str, trends_df: pd.DataFrame) -> str | pd.DataFrame:
+    column, renderer, scale = _TREND_CHARTS[metric]
+    if OVERVIEW_NATIVE_PLOTS:
+        # The browser draws gr.LinePlot from the raw series; nothing to render server-side.
+        return pd.DataFrame({"day": trends_df["day"], "value": trends_df[column] * scale})
+
+    def _render() -> str:
+        plots = _plots()
+        return plots.save_chart_png(getattr(plots, renderer)(trends_df), _CHART_DIR)
+
+    return _CHART_CACHE.get_or_compute((metric, start, end), _render)
+
+
+def _warm_overview_cache() -> None:
+    """Precompute the default overview window so the first page load after a restart is a cache hit."""
+    try:
+        filters = get_filter_options()
+        _overview_payload(*_default_range(filters.get("min_day"), filters.get("max_day")))
+    except Exception:  # noqa: BLE001
+        # A missing or locked database shows up on the first real request instead.
+        return
+
+
 def _overview_payload(start_date: str, end_date: str):
     start = _to_date_string(start_date)
     end = _to_date_string(end_date)
@@ -198,13 +236,11 @@ def _overview_payload(start_date: str, end_date: str):
             "Please provide both start and end dates.",
         )
 
-    kpis = _get_kpis(start, end)
-    trends_df = get_daily_trends(start, end)
-    top_issues_df = _get_top_issues(start, end, top_n=5)
+    kpis, trends_df, top_issues_df = _overview_data(start, end)
 
-    rating_fig = plot_rating_trend(trends_df)
-    pct_neg_fig = plot_pct_negative_trend(trends_df)
-    critical_fig = plot_critical_count_trend(trends_df)
+    rating_fig = _trend_chart("rating", start, end, trends_df)
+    pct_neg_fig = _trend_chart("pct_negative", start, end, trends_df)
+    critical_fig = _trend_chart("critical", start, end, trends_df)
 
     summary = (
         f"Window: `{start}` to `{end}` | Reviews: **{kpis['total_reviews']}** | "
@@ -262,11 +298,30 @@ def _drilldown_payload(
     return rows_df, _format_quotes(quotes), status
 
 
+def _export_payload(
+    start_date: str,
+    end_date: str,
+    category: str | None,
+    issue_label: str | None,
+    version: str | None,
+    file_format: str,
+):
+    path, row_count = export_reviews(
+        start_date=_to_date_string(start_date),
+        end_date=_to_date_string(end_date),
+        category=category or None,
+        issue_label=issue_label or None,
+        version=version or None,
+        file_format=file_format or "csv",
+    )
+    return path, f"Exported {row_count} rows as {(file_format or 'csv').upper()}"
+
+
 def _release_delta(version_a: str | None, version_b: str | None) -> pd.DataFrame:
     if not version_a or not version_b:
         return pd.DataFrame(columns=["metric", "version_a", "version_b", "delta_b_minus_a"])
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
         rows = conn.execute(
             """
             SELECT app_version, avg_rating, pct_negative, critical_count
@@ -306,6 +361,23 @@ def _release_delta(version_a: str | None, version_b: str | None) -> pd.DataFrame
     return pd.DataFrame(out_rows)
 
 
+def _slow_queries_payload() -> tuple[str, pd.DataFrame]:
+    rows = slowest_queries(limit=50)
+    if QUERY_PROFILE_SLOW_MS <= 0:
+        status = "Profiling is off. Set `DUCKDB_PROFILE_SLOW_MS` (e.g. 200) and restart to capture slow statements."
+    else:
+        status = f"Capturing statements slower than **{QUERY_PROFILE_SLOW_MS:g} ms** | distinct queries: **{len(rows)}**"
+    columns = ["query_hash", "source", "captures", "max_ms", "avg_ms", "max_rows_scanned", "last_captured_at", "sql_text"]
+    return status, pd.DataFrame(rows, columns=columns)
+
+
+def _query_profile_payload(query_hash: str | None) -> dict[str, Any]:
+    profile = latest_profile(query_hash or "")
+    if profile is None:
+        return {"message": "No captured profile for this query hash."}
+    return profile
+
+
 def _write_download_json(payload: dict[str, Any], prefix: str) -> str:
     tmp = tempfile.NamedTemporaryFile(prefix=f"{prefix}_", suffix=".json", delete=False, mode="w", encoding="utf-8")
     json.dump(payload, tmp, indent=2, ensure_ascii=True)
@@ -329,6 +401,8 @@ def _generate_exec_brief_payload(
         "issue_label": issue_label or "",
     }
     try:
+        from app.services.insights_service import generate_weekly_exec_brief
+
         report = generate_weekly_exec_brief(scope)
         board_html, raw_payload, kpi_df = render_exec_brief(report)
         return board_html, raw_payload, kpi_df, _write_download_json(report, "weekly_exec_brief")
@@ -356,6 +430,8 @@ def _generate_sprint_backlog_payload(
         "issue_label": issue_label or "",
     }
     try:
+        from app.services.insights_service import generate_sprint_backlog
+
         report = generate_sprint_backlog(scope)
         board_html, raw_payload, csv_file, summary_df = render_sprint_backlog(report)
         return board_html, raw_payload, summary_df, csv_file, _write_download_json(report, "sprint_backlog")
@@ -377,6 +453,7 @@ def _route_page(active: str):
         ("release", "Release Diff"),
         ("exec", "Executive Brief"),
         ("sprint", "Sprint Planner"),
+        ("queries", "Slow Queries"),
     ]
     title = next((name for key, name in pages if key == active), "Overview")
 
@@ -448,6 +525,7 @@ def build_app() -> gr.Blocks:
                 btn_release = gr.Button("Release Diff")
                 btn_exec = gr.Button("Executive Brief")
                 btn_sprint = gr.Button("Sprint Planner")
+                btn_queries = gr.Button("Slow Queries")
 
             with gr.Column(scale=8, elem_classes=["ri-main"]):
                 with gr.Group(elem_classes=["ri-topbar"]):
@@ -461,7 +539,11 @@ def build_app() -> gr.Blocks:
                         gr.Markdown(f"<div class='ri-status-pill'>{_runtime_status(db_ready)}</div>")
                     active_page_title = gr.Markdown("### Overview")
 
-                overview = build_overview_page(default_start=default_start, default_end=default_end)
+                overview = build_overview_page(
+                    default_start=default_start,
+                    default_end=default_end,
+                    native_plots=OVERVIEW_NATIVE_PLOTS,
+                )
                 trends = build_trends_page()
                 issues = build_issues_page(
                     default_start=default_start,
@@ -489,8 +571,9 @@ def build_app() -> gr.Blocks:
                     issue_labels=issue_labels,
                     versions=versions,
                 )
+                query_profiles = build_query_profiles_page()
 
-        nav_buttons = [btn_overview, btn_trends, btn_issues, btn_release, btn_exec, btn_sprint]
+        nav_buttons = [btn_overview, btn_trends, btn_issues, btn_release, btn_exec, btn_sprint, btn_queries]
         page_containers = [
             overview["page"],
             trends["page"],
@@ -498,11 +581,12 @@ def build_app() -> gr.Blocks:
             release["page"],
             exec_brief["page"],
             sprint["page"],
+            query_profiles["page"],
         ]
 
         for button, page_key in zip(
             nav_buttons,
-            ["overview", "trends", "issues", "release", "exec", "sprint"],
+            ["overview", "trends", "issues", "release", "exec", "sprint", "queries"],
             strict=True,
         ):
             button.click(
@@ -517,7 +601,7 @@ def build_app() -> gr.Blocks:
         _bind_preset_buttons(sprint["date"], min_day=min_day, max_day=max_day)
 
         overview["refresh"].click(
-            fn=_overview_payload,
+            fn=observe_handler("overview", _overview_payload),
             inputs=[overview["date"]["start"], overview["date"]["end"]],
             outputs=[
                 overview["kpi_avg_rating"],
@@ -533,7 +617,7 @@ def build_app() -> gr.Blocks:
         )
 
         issues["run"].click(
-            fn=_drilldown_payload,
+            fn=observe_handler("drilldown", _drilldown_payload),
             inputs=[
                 issues["date"]["start"],
                 issues["date"]["end"],
@@ -546,14 +630,27 @@ def build_app() -> gr.Blocks:
             outputs=[issues["table"], issues["quotes"], issues["status"]],
         )
 
+        issues["export"].click(
+            fn=observe_handler("review_export", _export_payload),
+            inputs=[
+                issues["date"]["start"],
+                issues["date"]["end"],
+                issues["category"],
+                issues["issue"],
+                issues["version"],
+                issues["export_format"],
+            ],
+            outputs=[issues["export_file"], issues["status"]],
+        )
+
         release["compare"].click(
-            fn=_release_delta,
+            fn=observe_handler("release_delta", _release_delta),
             inputs=[release["version_a"], release["version_b"]],
             outputs=[release["table"]],
         )
 
         exec_brief["generate"].click(
-            fn=_generate_exec_brief_payload,
+            fn=observe_handler("exec_brief", _generate_exec_brief_payload),
             inputs=[
                 exec_brief["date"]["start"],
                 exec_brief["date"]["end"],
@@ -565,7 +662,7 @@ def build_app() -> gr.Blocks:
         )
 
         sprint["generate"].click(
-            fn=_generate_sprint_backlog_payload,
+            fn=observe_handler("sprint_backlog", _generate_sprint_backlog_payload),
             inputs=[
                 sprint["date"]["start"],
                 sprint["date"]["end"],
@@ -582,8 +679,20 @@ def build_app() -> gr.Blocks:
             ],
         )
 
+        query_profiles["refresh"].click(
+            fn=observe_handler("slow_queries", _slow_queries_payload),
+            inputs=None,
+            outputs=[query_profiles["status"], query_profiles["table"]],
+        )
+
+        query_profiles["show"].click(
+            fn=observe_handler("query_profile", _query_profile_payload),
+            inputs=[query_profiles["hash"]],
+            outputs=[query_profiles["profile"]],
+        )
+
         demo.load(
-            fn=_overview_payload,
+            fn=observe_handler("overview", _overview_payload),
             inputs=[overview["date"]["start"], overview["date"]["end"]],
             outputs=[
                 overview["kpi_avg_rating"],
@@ -602,6 +711,12 @@ def build_app() -> gr.Blocks:
 
 
 def main() -> None:
+    install_query_metrics()
+    threading.Thread(target=_warm_overview_cache, name="overview-warmup", daemon=True).start()
+    metrics_server = start_metrics_server()
+    if metrics_server is not None:
+        host, port = metrics_server.server_address[:2]
+        print(f"[metrics] serving Prometheus metrics on http://{host}:{port}/metrics")
     app = build_app()
     server_port = int(os.getenv("GRADIO_SERVER_PORT", "7861"))
     app.launch(server_name="127.0.0.1", server_port=server_port)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import functools
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, TypeVar
+
+
+# 0 disables the endpoint; the registry still records so tests and benchmarks can read it in-process.
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Ollama generations run for seconds to minutes (read timeout defaults to 240s).
+LLM_BUCKETS: tuple[float, ...] = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 240.0)
+# Insight prompt inputs, in estimated tokens; budgets default to 900 (INSIGHT_PROMPT_TOKEN_BUDGET).
+TOKEN_BUCKETS: tuple[float, ...] = (100, 200, 300, 450, 600, 750, 900, 1200, 1600, 2400)
+
+F = TypeVar("F", bound=Callable[..., Any])
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled series are exported as 0 from the start so rate() works before the first event.
+        self._values: dict[LabelValues, float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(total)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum and count.
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = len(self.buckets)
+        for idx, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                slot = idx
+                break
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            totals[0] += seconds
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), totals[0])) for key, (counts, totals) in self._series.items())
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _label_text(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, values)} {_format_value(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, values)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS: Histogram = REGISTRY.register(
+    Histogram("review_insights_handler_duration_seconds", "Gradio handler latency.", ("route",))
+)
+HANDLER_ERRORS: Counter = REGISTRY.register(
+    Counter("review_insights_handler_errors_total", "Gradio handler calls that raised.", ("route",))
+)
+DUCKDB_QUERIES: Counter = REGISTRY.register(
+    Counter("review_insights_duckdb_queries_total", "DuckDB statements executed.", ("statement",))
+)
+DUCKDB_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "review_insights_duckdb_call_duration_seconds",
+        "Time spent in DuckDB execute and fetch calls.",
+        ("phase",),
+    )
+)
+REPORT_CACHE: Counter = REGISTRY.register(
+    Counter(
+        "review_insights_report_cache_requests_total",
+        "insight_reports lookups by result (hit or miss).",
+        ("report_type", "result"),
+    )
+)
+PENDING_GENERATIONS: Gauge = REGISTRY.register(
+    Gauge("review_insights_report_generations_pending", "Insight reports currently being generated.", ("report_type",))
+)
+OLLAMA_SECONDS: Histogram = REGISTRY.register(
+    Histogram("review_insights_ollama_request_duration_seconds", "call_ollama latency.", ("outcome",), LLM_BUCKETS)
+)
+LLM_JSON_RETRIES: Counter = REGISTRY.register(
+    Counter("review_insights_llm_json_retries_total", "call_json_with_retry attempts after the first.")
+)
+LLM_JSON_FAILURES: Counter = REGISTRY.register(
+    Counter("review_insights_llm_json_failures_total", "call_json_with_retry calls that ran out of retries.")
+)
+VIEW_CACHE: Counter = REGISTRY.register(
+    Counter("review_insights_view_cache_requests_total", "Dashboard view cache lookups.", ("cache", "result"))
+)
+PROMPT_INPUT_TOKENS: Histogram = REGISTRY.register(
+    Histogram(
+        "review_insights_prompt_input_tokens",
+        "Estimated tokens of compacted insight report inputs.",
+        ("report_type",),
+        TOKEN_BUCKETS,
+    )
+)
+PROMPT_INPUT_ROWS: Histogram = REGISTRY.register(
+    Histogram(
+        "review_insights_prompt_input_rows",
+        "Evidence and top-issue rows kept in compacted insight report inputs.",
+        ("report_type", "section"),
+        (0, 2, 4, 6, 8, 10, 15, 20, 30),
+    )
+)
+EXEC_BRIEF_FALLBACKS: Counter = REGISTRY.register(
+    Counter("review_insights_exec_brief_fallbacks_total", "Weekly exec briefs built by the deterministic fallback.")
+)
+
+
+def observe_handler(route: str, fn: F) -> F:
+    """Wrap a Gradio handler so its latency and errors are recorded under `route`."""
+
+    @functools.wraps(fn)
+    def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(route=route)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, route=route)
+
+    return _wrapper  # type: ignore[return-value]
+
+
+def _statement_kind(sql: str) -> str:
+    head = sql.lstrip().split(None, 1)
+    return head[0].lower() if head else "unknown"
+
+
+def _observe_query(sql: str, seconds: float, method: str) -> None:
+    if method in {"execute", "executemany"}:
+        DUCKDB_QUERIES.inc(statement=_statement_kind(sql))
+        DUCKDB_SECONDS.observe(seconds, phase="execute")
+    else:
+        DUCKDB_SECONDS.observe(seconds, phase="fetch")
+
+
+def install_query_metrics() -> None:
+    """Count and time every statement on `pipeline.db.get_connection` connections."""
+    from pipeline.db import add_query_observer, remove_query_observer
+
+    remove_query_observer(_observe_query)
+    add_query_observer(_observe_query)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        # Scrapes every few seconds would drown the Gradio log.
+        return
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer | None:
+    """Serve `GET /metrics` in Prometheus text format from a daemon thread; returns None when disabled."""
+    if port <= 0:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import json
 from datetime import date, datetime, timedelta
-from pathlib import Path
 from typing import Any
 
 from analytics.evidence_quotes import get_evidence_quotes
 from app.config import ROOT_DIR
+from app.metrics import EXEC_BRIEF_FALLBACKS, PROMPT_INPUT_ROWS, PROMPT_INPUT_TOKENS
+from app.services.prompt_compaction import compact_input_payload
 from app.services.report_cache import get_or_create_report
 from llm.json_enforcer import build_jsonschema_validator, call_json_with_retry, load_json_schema
 from llm.ollama_client import DEFAULT_MODEL
+from llm.prompt_loader import load_prompt_sections
 from pipeline.db import get_connection
 
 
@@ -33,7 +35,7 @@ def _default_date_range() -> tuple[str, str]:
     try:
         with get_connection(read_only=True) as conn:
             min_day, max_day = conn.execute(
-                "SELECT MIN(DATE(at_ts)), MAX(DATE(at_ts)) FROM reviews_raw"
+                "SELECT CAST(MIN(at_ts) AS DATE), CAST(MAX(at_ts) AS DATE) FROM reviews_raw"
             ).fetchone()
     except Exception:  # noqa: BLE001
         min_day, max_day = None, None
@@ -66,25 +68,19 @@ def _normalize_scope(scope: dict[str, Any]) -> dict[str, Any]:
 
 
 def _build_filters(scope: dict[str, Any]) -> tuple[str, list[Any]]:
-    where_clauses = ["DATE(r.at_ts) >= ?", "DATE(r.at_ts) <= ?"]
+    # Half-open range on the raw timestamp: DuckDB checks it against each row group's at_ts min/max and skips
+    # the groups outside the window, which DATE(at_ts) would prevent.
+    where_clauses = ["w.at_ts >= CAST(? AS DATE)", "w.at_ts < CAST(? AS DATE) + INTERVAL 1 DAY"]
     params: list[Any] = [scope["start_date"], scope["end_date"]]
 
     if scope["category"]:
-        where_clauses.append("COALESCE(e.category_taxonomy, 'Other') = ?")
+        where_clauses.append("COALESCE(w.category_taxonomy, 'Other') = ?")
         params.append(scope["category"])
     if scope["version"]:
-        where_clauses.append("r.app_version = ?")
+        where_clauses.append("w.app_version = ?")
         params.append(scope["version"])
     if scope["issue_label"]:
-        where_clauses.append(
-            """
-            EXISTS (
-                SELECT 1
-                FROM json_each(COALESCE(e.issues_json, '[]')) je
-                WHERE LOWER(CAST(je.value ->> 'label' AS VARCHAR)) = LOWER(?)
-            )
-            """
-        )
+        where_clauses.append("list_contains(list_transform(w.issue_labels, label -> LOWER(label)), LOWER(?))")
         params.append(scope["issue_label"])
 
     return " AND ".join(where_clauses), params
@@ -95,11 +91,10 @@ def _fetch_kpi_snapshot(scope: dict[str, Any]) -> dict[str, Any]:
     query = f"""
         SELECT
             COUNT(*) AS total_reviews,
-            AVG(COALESCE(r.score, 0)) AS avg_rating,
-            AVG(CASE WHEN COALESCE(e.sentiment_label, '') = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
-            SUM(CASE WHEN COALESCE(e.severity_band, '') = 'critical' THEN 1 ELSE 0 END) AS critical_count
-        FROM reviews_raw r
-        JOIN reviews_enriched e USING (review_id)
+            AVG(COALESCE(w.score, 0)) AS avg_rating,
+            AVG(CASE WHEN COALESCE(w.sentiment_label, '') = 'negative' THEN 1.0 ELSE 0.0 END) AS pct_negative,
+            SUM(CASE WHEN COALESCE(w.severity_band, '') = 'critical' THEN 1 ELSE 0 END) AS critical_count
+        FROM reviews_wide w
         WHERE {where_sql}
     """
     with get_connection(read_only=True) as conn:
@@ -117,14 +112,12 @@ def _fetch_top_issues(scope: dict[str, Any], limit: int = 8) -> list[dict[str, A
     where_sql, params = _build_filters(scope)
     query = f"""
         SELECT
-            CAST(je.value ->> 'label' AS VARCHAR) AS label,
+            u.label,
             COUNT(*) AS review_count,
-            SUM(COALESCE(e.severity_score, 0.0)) AS weighted_severity
-        FROM reviews_raw r
-        JOIN reviews_enriched e USING (review_id),
-             LATERAL json_each(COALESCE(e.issues_json, '[]')) je
+            SUM(COALESCE(w.severity_score, 0.0)) AS weighted_severity
+        FROM reviews_wide w,
+             UNNEST(w.issue_labels) AS u(label)
         WHERE {where_sql}
-          AND CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
         GROUP BY 1
         ORDER BY weighted_severity DESC, review_count DESC, label
         LIMIT ?
@@ -187,37 +180,6 @@ def _compact_quote(text: str, max_chars: int = 120) -> str:
     return clean[:max_chars].rstrip() + "..."
 
 
-def _load_prompt_sections(prompt_path: Path) -> tuple[str, str]:
-    text = prompt_path.read_text(encoding="utf-8")
-    lines = text.splitlines()
-
-    current = None
-    system_lines: list[str] = []
-    user_lines: list[str] = []
-
-    for line in lines:
-        marker = line.strip().lower()
-        if marker == "## system":
-            current = "system"
-            continue
-        if marker == "## user":
-            current = "user"
-            continue
-
-        if current == "system":
-            system_lines.append(line)
-        elif current == "user":
-            user_lines.append(line)
-
-    system = "\n".join(system_lines).strip()
-    user = "\n".join(user_lines).strip()
-    if not system:
-        system = "You are an analyst assistant. Return strict JSON only."
-    if not user:
-        user = text.strip()
-    return system, user
-
-
 def _build_input_payload(scope: dict[str, Any], report_type: str) -> dict[str, Any]:
     raw_evidence = _fetch_evidence(scope, limit=10)
     compact_evidence = [
@@ -350,10 +312,13 @@ def _generate_report(
 
     schema = load_json_schema(schema_path)
     schema_validator = build_jsonschema_validator(schema)
-    system_prompt, user_prompt_template = _load_prompt_sections(prompt_path)
+    system_prompt, user_prompt_template = load_prompt_sections(prompt_path)
 
     input_payload = _build_input_payload(normalized_scope, report_type=report_type)
-    input_json = json.dumps(input_payload, indent=2, ensure_ascii=True)
+    input_json, compaction_stats = compact_input_payload(input_payload, report_type=report_type)
+    PROMPT_INPUT_TOKENS.observe(compaction_stats["compacted_tokens"], report_type=report_type)
+    PROMPT_INPUT_ROWS.observe(compaction_stats["evidence_rows"], report_type=report_type, section="evidence")
+    PROMPT_INPUT_ROWS.observe(compaction_stats["top_issue_rows"], report_type=report_type, section="top_issues")
     user_prompt = user_prompt_template.replace("{{input_json}}", input_json)
 
     def _generator() -> dict[str, Any]:
@@ -369,6 +334,7 @@ def _generate_report(
             if report_type == "weekly_exec_brief":
                 fallback = _build_weekly_exec_brief_fallback(input_payload)
                 schema_validator(fallback)
+                EXEC_BRIEF_FALLBACKS.inc()
                 return fallback
             raise
 
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Any
+
+from llm.token_budget import estimate_tokens
+
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("INSIGHT_PROMPT_TOKEN_BUDGET", "900"))
+
+# Input-JSON token budget per report type; override with INSIGHT_PROMPT_TOKEN_BUDGET_<REPORT_TYPE>.
+REPORT_TOKEN_BUDGETS: dict[str, int] = {
+    "weekly_exec_brief": 800,
+    "sprint_backlog": 1100,
+}
+
+QUOTE_CHAR_STEPS: tuple[int, ...] = (120, 90, 60)
+QUOTE_SIMILARITY_THRESHOLD = 0.8
+MIN_EVIDENCE_ROWS = 2
+MIN_TOP_ISSUES = 1
+
+EVIDENCE_COLUMNS: tuple[str, ...] = ("quote", "sentiment_label", "severity_score", "app_version")
+TOP_ISSUE_COLUMNS: tuple[str, ...] = ("label", "review_count", "weighted_severity")
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def token_budget_for(report_type: str) -> int:
+    env_value = os.getenv(f"INSIGHT_PROMPT_TOKEN_BUDGET_{report_type.upper()}")
+    if env_value:
+        return max(1, int(env_value))
+    return REPORT_TOKEN_BUDGETS.get(report_type, DEFAULT_TOKEN_BUDGET)
+
+
+def minify_json(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
+
+
+def to_table(rows: list[dict[str, Any]], columns: tuple[str, ...]) -> dict[str, Any]:
+    """Encode homogeneous rows once as column names plus value lists instead of repeating keys."""
+    return {
+        "columns": list(columns),
+        "rows": [[row.get(column) for column in columns] for row in rows],
+    }
+
+
+def _quote_tokens(text: str) -> frozenset[str]:
+    return frozenset(_WORD_RE.findall((text or "").lower()))
+
+
+def _jaccard(left: frozenset[str], right: frozenset[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def dedupe_quotes(
+    evidence: list[dict[str, Any]],
+    threshold: float = QUOTE_SIMILARITY_THRESHOLD,
+) -> list[dict[str, Any]]:
+    """Drop evidence rows whose quote is a near-duplicate of a higher-ranked one."""
+    kept: list[dict[str, Any]] = []
+    kept_tokens: list[frozenset[str]] = []
+    for item in evidence:
+        tokens = _quote_tokens(str(item.get("quote", "")))
+        if any(_jaccard(tokens, seen) >= threshold for seen in kept_tokens):
+            continue
+        kept.append(item)
+        kept_tokens.append(tokens)
+    return kept
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    clean = (text or "").strip()
+    if len(clean) <= max_chars:
+        return clean
+    return clean[:max_chars].rstrip() + "..."
+
+
+def _encode(
+    payload: dict[str, Any],
+    evidence: list[dict[str, Any]],
+    top_issues: list[dict[str, Any]],
+    anomaly_flags: list[dict[str, Any]] | None,
+    quote_chars: int,
+) -> dict[str, Any]:
+    # Empty scope filters carry no information for the model.
+    scope = {key: value for key, value in (payload.get("scope") or {}).items() if value not in ("", None)}
+    compact_evidence = [{**item, "quote": _truncate(str(item.get("quote", "")), quote_chars)} for item in evidence]
+
+    encoded: dict[str, Any] = {
+        "scope": scope,
+        "kpi_snapshot": payload.get("kpi_snapshot", {}),
+        "top_issues": to_table(top_issues, TOP_ISSUE_COLUMNS),
+        "evidence_reviews": to_table(compact_evidence, EVIDENCE_COLUMNS),
+    }
+    if anomaly_flags:
+        encoded["anomaly_flags"] = anomaly_flags
+    return encoded
+
+
+def compact_input_payload(
+    payload: dict[str, Any], report_type: str, measure_original: bool = False
+) -> tuple[str, dict[str, int]]:
+    """Return a minified, tabular encoding of `payload` that fits the report type's token budget.
+
+    Reductions are applied cheapest-information-first: near-duplicate quotes, shorter quotes,
+    anomaly flags, the tail of the evidence list, then the tail of the top issues.
+    `measure_original` adds `original_tokens`, which re-serializes the whole payload pretty-printed.
+    """
+    budget = token_budget_for(report_type)
+    evidence = dedupe_quotes(list(payload.get("evidence_reviews", [])))
+    top_issues = list(payload.get("top_issues", []))
+    anomaly_flags = list(payload.get("anomaly_flags", []) or [])
+    quote_steps = list(QUOTE_CHAR_STEPS)
+    quote_chars = quote_steps.pop(0)
+
+    def _render() -> str:
+        return minify_json(_encode(payload, evidence, top_issues, anomaly_flags, quote_chars))
+
+    input_json = _render()
+    while estimate_tokens(input_json) > budget:
+        if quote_steps:
+            quote_chars = quote_steps.pop(0)
+        elif anomaly_flags:
+            anomaly_flags = []
+        elif len(evidence) > MIN_EVIDENCE_ROWS:
+            evidence = evidence[:-1]
+        elif len(top_issues) > MIN_TOP_ISSUES:
+            top_issues = top_issues[:-1]
+        else:
+            break
+        input_json = _render()
+
+    stats = {
+        "budget_tokens": budget,
+        "compacted_tokens": estimate_tokens(input_json),
+        "evidence_rows": len(evidence),
+        "top_issue_rows": len(top_issues),
+    }
+    if measure_original:
+        stats["original_tokens"] = estimate_tokens(json.dumps(payload, indent=2, ensure_ascii=True))
+    return input_json, stats
@@ -6,29 +6,13 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Callable
 
+from app.metrics import PENDING_GENERATIONS, REPORT_CACHE
 from pipeline.db import get_connection
 
 
 ReportGenerator = Callable[[], dict[str, Any]]
 
 
-def _ensure_insight_reports_table() -> None:
-    with get_connection() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS insight_reports (
-                report_id VARCHAR PRIMARY KEY,
-                report_type VARCHAR,
-                scope_json VARCHAR,
-                content_json VARCHAR,
-                created_at TIMESTAMP,
-                model VARCHAR,
-                hash_key VARCHAR UNIQUE
-            )
-            """
-        )
-
-
 def normalize_scope_json(scope: dict[str, Any]) -> str:
     return json.dumps(scope, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
 
@@ -89,13 +73,18 @@ def get_or_create_report(
     model: str,
     generator: ReportGenerator,
 ) -> dict[str, Any]:
-    _ensure_insight_reports_table()
     hash_key = compute_hash_key(report_type=report_type, scope=scope)
     cached = _get_cached_report(hash_key)
     if cached is not None:
+        REPORT_CACHE.inc(report_type=report_type, result="hit")
         return cached
 
-    content = generator()
+    REPORT_CACHE.inc(report_type=report_type, result="miss")
+    PENDING_GENERATIONS.inc(report_type=report_type)
+    try:
+        content = generator()
+    finally:
+        PENDING_GENERATIONS.dec(report_type=report_type)
 
     try:
         _insert_report(report_type=report_type, scope=scope, content=content, model=model, hash_key=hash_key)
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import os
+import tempfile
+import time
 from datetime import date, datetime
+from pathlib import Path
 from typing import Any
 
 import duckdb
 import pandas as pd
 
 from app.config import DUCKDB_PATH
+from pipeline.db import get_connection
+
+
+EXPORT_FORMATS: tuple[str, ...] = ("csv", "parquet")
+EXPORT_DIR = Path(tempfile.gettempdir()) / "review_insights_exports"
+# Exports older than this are deleted when the next one is written.
+EXPORT_MAX_AGE_SECONDS = float(os.getenv("EXPORT_MAX_AGE_SECONDS", "3600"))
 
 
 def _to_date_string(value: str | date | datetime | None) -> str | None:
@@ -21,47 +32,70 @@ def _to_date_string(value: str | date | datetime | None) -> str | None:
     return None
 
 
-def get_filter_options() -> dict[str, Any]:
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
-        min_day, max_day = conn.execute(
-            "SELECT MIN(DATE(at_ts)), MAX(DATE(at_ts)) FROM reviews_raw"
-        ).fetchone()
-
-        categories = [
-            row[0]
-            for row in conn.execute(
-                """
-                SELECT DISTINCT COALESCE(category_taxonomy, 'Other') AS category_taxonomy
-                FROM reviews_enriched
-                ORDER BY 1
-                """
-            ).fetchall()
-        ]
+def _scan_filter_options(conn: Any) -> tuple[Any, Any, list[str], list[str], list[str]]:
+    min_day, max_day = conn.execute(
+        "SELECT CAST(MIN(at_ts) AS DATE), CAST(MAX(at_ts) AS DATE) FROM reviews_raw"
+    ).fetchone()
 
-        versions = [
-            row[0]
-            for row in conn.execute(
-                """
-                SELECT app_version
-                FROM version_aggregates
-                ORDER BY last_seen_day DESC, total_reviews DESC, app_version
-                """
-            ).fetchall()
-            if row[0]
-        ]
+    categories = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT DISTINCT COALESCE(category_taxonomy, 'Other') AS category_taxonomy
+            FROM reviews_enriched
+            ORDER BY 1
+            """
+        ).fetchall()
+    ]
+
+    versions = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT app_version
+            FROM version_aggregates
+            ORDER BY last_seen_day DESC, total_reviews DESC, app_version
+            """
+        ).fetchall()
+        if row[0]
+    ]
 
+    issue_labels = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT DISTINCT CAST(je.value ->> 'label' AS VARCHAR) AS issue_label
+            FROM reviews_enriched e,
+                 LATERAL json_each(COALESCE(e.issues_json, '[]')) AS je
+            WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
+            ORDER BY 1
+            """
+        ).fetchall()
+    ]
+    return min_day, max_day, categories, versions, issue_labels
+
+
+def _dimension_filter_options(conn: Any) -> tuple[Any, Any, list[str], list[str], list[str]] | None:
+    """Filter options from the dimension tables maintained by 07_aggregates_version; None until they are built."""
+    try:
+        bounds = conn.execute("SELECT min_day, max_day FROM data_bounds WHERE bounds_id = 1").fetchone()
+        if bounds is None:
+            return None
+        categories = [row[0] for row in conn.execute("SELECT category FROM dim_category ORDER BY 1").fetchall()]
+        versions = [row[0] for row in conn.execute("SELECT app_version FROM dim_version ORDER BY sort_rank").fetchall()]
         issue_labels = [
-            row[0]
-            for row in conn.execute(
-                """
-                SELECT DISTINCT CAST(je.value ->> 'label' AS VARCHAR) AS issue_label
-                FROM reviews_enriched e,
-                     LATERAL json_each(COALESCE(e.issues_json, '[]')) AS je
-                WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
-                ORDER BY 1
-                """
-            ).fetchall()
+            row[0] for row in conn.execute("SELECT issue_label FROM dim_issue_label ORDER BY 1").fetchall()
         ]
+    except duckdb.CatalogException:
+        # Databases created before the dimension tables existed.
+        return None
+    return bounds[0], bounds[1], categories, versions, issue_labels
+
+
+def get_filter_options() -> dict[str, Any]:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
+        options = _dimension_filter_options(conn) or _scan_filter_options(conn)
+    min_day, max_day, categories, versions, issue_labels = options
 
     return {
         "min_day": str(min_day) if min_day else None,
@@ -72,100 +106,146 @@ def get_filter_options() -> dict[str, Any]:
     }
 
 
-def search_reviews(
-    start_date: str | date | datetime | None = None,
-    end_date: str | date | datetime | None = None,
-    category: str | None = None,
-    issue_label: str | None = None,
-    version: str | None = None,
-    page: int = 1,
-    page_size: int = 25,
-) -> tuple[pd.DataFrame, int]:
-    """Return paginated review drilldown rows and total filtered count."""
+REVIEW_COLUMNS: tuple[str, ...] = (
+    "review_id",
+    "day",
+    "app_version",
+    "category_taxonomy",
+    "sentiment_label",
+    "severity_band",
+    "severity_score",
+    "score",
+    "thumbs_up",
+    "issues",
+    "content",
+)
+
+
+def _review_filters(
+    start_date: str | date | datetime | None,
+    end_date: str | date | datetime | None,
+    category: str | None,
+    issue_label: str | None,
+    version: str | None,
+) -> tuple[str, list[Any]]:
+    """WHERE clause (over reviews_wide w) and parameters for the drilldown filters."""
     start = _to_date_string(start_date)
     end = _to_date_string(end_date)
-    safe_page = max(int(page), 1)
-    safe_page_size = max(1, min(int(page_size), 200))
-    offset = (safe_page - 1) * safe_page_size
-
     where_clauses = ["1=1"]
     params: list[Any] = []
 
     if start:
-        where_clauses.append("DATE(r.at_ts) >= ?")
+        where_clauses.append("w.at_ts >= CAST(? AS DATE)")
         params.append(start)
     if end:
-        where_clauses.append("DATE(r.at_ts) <= ?")
+        where_clauses.append("w.at_ts < CAST(? AS DATE) + INTERVAL 1 DAY")
         params.append(end)
     if category:
-        where_clauses.append("COALESCE(e.category_taxonomy, 'Other') = ?")
+        where_clauses.append("COALESCE(w.category_taxonomy, 'Other') = ?")
         params.append(category)
     if version:
-        where_clauses.append("r.app_version = ?")
+        where_clauses.append("w.app_version = ?")
         params.append(version)
     if issue_label:
-        where_clauses.append(
-            """
-            EXISTS (
-                SELECT 1
-                FROM json_each(COALESCE(e.issues_json, '[]')) je
-                WHERE LOWER(CAST(je.value ->> 'label' AS VARCHAR)) = LOWER(?)
-            )
-            """
-        )
+        where_clauses.append("list_contains(list_transform(w.issue_labels, label -> LOWER(label)), LOWER(?))")
         params.append(issue_label)
 
-    where_sql = " AND ".join(where_clauses)
+    return " AND ".join(where_clauses), params
+
+
+def _review_select(where_sql: str) -> str:
+    return f"""
+        SELECT
+            w.review_id,
+            w.day,
+            w.app_version,
+            COALESCE(w.category_taxonomy, 'Other') AS category_taxonomy,
+            COALESCE(w.sentiment_label, 'unknown') AS sentiment_label,
+            COALESCE(w.severity_band, 'unknown') AS severity_band,
+            ROUND(COALESCE(w.severity_score, 0.0), 3) AS severity_score,
+            w.score,
+            COALESCE(w.thumbs_up, 0) AS thumbs_up,
+            array_to_string(w.issue_labels, ', ') AS issues,
+            w.content
+        FROM reviews_wide w
+        WHERE {where_sql}
+    """
+
+
+def search_reviews(
+    start_date: str | date | datetime | None = None,
+    end_date: str | date | datetime | None = None,
+    category: str | None = None,
+    issue_label: str | None = None,
+    version: str | None = None,
+    page: int = 1,
+    page_size: int = 25,
+) -> tuple[pd.DataFrame, int]:
+    """Return paginated review drilldown rows and total filtered count."""
+    safe_page = max(int(page), 1)
+    safe_page_size = max(1, min(int(page_size), 200))
+    offset = (safe_page - 1) * safe_page_size
+    where_sql, params = _review_filters(start_date, end_date, category, issue_label, version)
 
     count_query = f"""
         SELECT COUNT(*)
-        FROM reviews_raw r
-        JOIN reviews_enriched e USING (review_id)
+        FROM reviews_wide w
         WHERE {where_sql}
     """
 
     data_query = f"""
-        SELECT
-            r.review_id,
-            DATE(r.at_ts) AS day,
-            r.app_version,
-            COALESCE(e.category_taxonomy, 'Other') AS category_taxonomy,
-            COALESCE(e.sentiment_label, 'unknown') AS sentiment_label,
-            COALESCE(e.severity_band, 'unknown') AS severity_band,
-            ROUND(COALESCE(e.severity_score, 0.0), 3) AS severity_score,
-            r.score,
-            COALESCE(r.thumbs_up, 0) AS thumbs_up,
-            COALESCE(
-                (
-                    SELECT string_agg(CAST(je.value ->> 'label' AS VARCHAR), ', ')
-                    FROM json_each(COALESCE(e.issues_json, '[]')) je
-                    WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
-                ),
-                ''
-            ) AS issues,
-            r.content
-        FROM reviews_raw r
-        JOIN reviews_enriched e USING (review_id)
-        WHERE {where_sql}
-        ORDER BY DATE(r.at_ts) DESC, COALESCE(e.severity_score, 0.0) DESC, r.review_id
+        {_review_select(where_sql)}
+        ORDER BY w.day DESC, COALESCE(w.severity_score, 0.0) DESC, w.review_id
         LIMIT ? OFFSET ?
     """
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
         total_count = int(conn.execute(count_query, params).fetchone()[0])
         rows = conn.execute(data_query, [*params, safe_page_size, offset]).fetchall()
 
-    columns = [
-        "review_id",
-        "day",
-        "app_version",
-        "category_taxonomy",
-        "sentiment_label",
-        "severity_band",
-        "severity_score",
-        "score",
-        "thumbs_up",
-        "issues",
-        "content",
-    ]
-    return pd.DataFrame(rows, columns=columns), total_count
+    return pd.DataFrame(rows, columns=list(REVIEW_COLUMNS)), total_count
+
+
+def _prune_exports(max_age_seconds: float = EXPORT_MAX_AGE_SECONDS) -> None:
+    cutoff = time.time() - max_age_seconds
+    for path in EXPORT_DIR.glob("reviews_export_*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            continue
+
+
+def export_reviews(
+    start_date: str | date | datetime | None = None,
+    end_date: str | date | datetime | None = None,
+    category: str | None = None,
+    issue_label: str | None = None,
+    version: str | None = None,
+    file_format: str = "csv",
+) -> tuple[str, int]:
+    """Write every review matching the drilldown filters to a temp CSV or Parquet file; returns (path, row_count).
+
+    DuckDB streams the join straight into the file with COPY ... TO, so memory does not grow with the result.
+    Rows are unordered: sorting would have to buffer the whole result.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    where_sql, params = _review_filters(start_date, end_date, category, issue_label, version)
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    _prune_exports()
+    handle, name = tempfile.mkstemp(prefix="reviews_export_", suffix=f".{file_format}", dir=EXPORT_DIR)
+    os.close(handle)
+    target = name.replace("'", "''")
+    options = "FORMAT parquet, COMPRESSION zstd" if file_format == "parquet" else "FORMAT csv, HEADER"
+
+    try:
+        with get_connection(DUCKDB_PATH, read_only=True) as conn:
+            conn.execute("SET preserve_insertion_order = false")
+            copy_sql = f"COPY ({_review_select(where_sql)}) TO '{target}' ({options})"
+            row_count = int(conn.execute(copy_sql, params).fetchone()[0])
+    except Exception:
+        Path(name).unlink(missing_ok=True)
+        raise
+    return name, row_count
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, TypeVar
+
+from app.config import DUCKDB_PATH
+from app.metrics import VIEW_CACHE
+
+
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", "64"))
+
+T = TypeVar("T")
+
+
+def data_version(db_path: Path = DUCKDB_PATH) -> int:
+    """Changes whenever a pipeline stage writes the database (mtime of the file or its WAL)."""
+    version = 0
+    for path in (db_path, Path(f"{db_path}.wal")):
+        try:
+            version = max(version, path.stat().st_mtime_ns)
+        except OSError:
+            continue
+    return version
+
+
+class ViewCache:
+    """Thread-safe LRU of read-only view data, invalidated when `data_version()` changes.
+
+    Cached values are shared between sessions; callers must not mutate them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = VIEW_CACHE_SIZE,
+        on_evict: Callable[[object], None] | None = None,
+    ) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        # Called with each value dropped by LRU eviction, a data version change or clear().
+        self._on_evict = on_evict
+        self._entries: OrderedDict[tuple[int, Hashable], object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        full_key = (data_version(), key)
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                VIEW_CACHE.inc(cache=self.name, result="hit")
+                return self._entries[full_key]  # type: ignore[return-value]
+
+        VIEW_CACHE.inc(cache=self.name, result="miss")
+        # Computed outside the lock: two sessions missing on the same key both query, which beats serialising reads.
+        value = compute()
+        evicted: list[object] = []
+        with self._lock:
+            if full_key in self._entries:
+                # Another session filled the key first; keep the value already handed out.
+                evicted.append(value)
+                value = self._entries[full_key]  # type: ignore[assignment]
+            self._entries[full_key] = value
+            self._entries.move_to_end(full_key)
+            stale = [entry for entry in self._entries if entry[0] != full_key[0]]
+            for entry in stale:
+                evicted.append(self._entries.pop(entry))
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False)[1])
+        self._evict(evicted)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = list(self._entries.values())
+            self._entries.clear()
+        self._evict(evicted)
+
+    def _evict(self, values: list[object]) -> None:
+        if self._on_evict is None:
+            return
+        for value in values:
+            try:
+                self._on_evict(value)
+            except Exception:  # noqa: BLE001
+                continue
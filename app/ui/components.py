@@ -62,7 +62,13 @@ def build_date_controls(prefix: str, default_start: str, default_end: str) -> di
     }
 
 
-def build_overview_page(default_start: str, default_end: str) -> dict[str, Any]:
+def _build_trend_chart(label: str, y_title: str, native: bool) -> Any:
+    if native:
+        return gr.LinePlot(x="day", y="value", label=label, y_title=y_title, x_title="Date", elem_classes=["ri-card"])
+    return gr.Image(label=label, type="filepath", interactive=False, elem_classes=["ri-card"])
+
+
+def build_overview_page(default_start: str, default_end: str, native_plots: bool = False) -> dict[str, Any]:
     with gr.Column(visible=True, elem_classes=["ri-page"], elem_id="page_overview") as page:
         build_section_header("Overview", "Core KPIs, trends, and top weighted issues")
         date_controls = build_date_controls("overview", default_start, default_end)
@@ -78,9 +84,9 @@ def build_overview_page(default_start: str, default_end: str) -> dict[str, Any]:
         ov_summary = gr.Markdown(elem_classes=["ri-muted-text"])
 
         with gr.Row(elem_classes=["ri-chart-grid"]):
-            rating_plot = gr.Plot(label="Rating Trend", elem_classes=["ri-card"])
-            pct_negative_plot = gr.Plot(label="% Negative Trend", elem_classes=["ri-card"])
-            critical_plot = gr.Plot(label="Critical Count Trend", elem_classes=["ri-card"])
+            rating_plot = _build_trend_chart("Rating Trend", "Rating", native_plots)
+            pct_negative_plot = _build_trend_chart("% Negative Trend", "Negative %", native_plots)
+            critical_plot = _build_trend_chart("Critical Count Trend", "Critical Reviews", native_plots)
 
         with gr.Group(elem_classes=["ri-card"]):
             ov_top_issues = gr.Dataframe(label="Top Issues (Weighted)", interactive=False)
@@ -138,6 +144,10 @@ def build_issues_page(default_start: str, default_end: str, categories: list[str
                 dr_page_size = gr.Dropdown(choices=[10, 25, 50, 100], value=25, label="Page Size")
                 dr_page = gr.Number(value=1, precision=0, label="Page")
                 dr_run = gr.Button("Run Drilldown", variant="primary")
+            with gr.Row():
+                dr_export_format = gr.Dropdown(choices=["csv", "parquet"], value="csv", label="Export Format")
+                dr_export = gr.Button("Export All Matching Reviews")
+                dr_export_file = gr.File(label="Download Export")
 
         dr_status = gr.Markdown(elem_classes=["ri-muted-text"])
 
@@ -156,6 +166,9 @@ def build_issues_page(default_start: str, default_end: str, categories: list[str
         "page_size": dr_page_size,
         "page_number": dr_page,
         "run": dr_run,
+        "export_format": dr_export_format,
+        "export": dr_export,
+        "export_file": dr_export_file,
         "status": dr_status,
         "table": dr_table,
         "quotes": dr_quotes,
@@ -259,3 +272,28 @@ def build_sprint_planner_page(default_start: str, default_end: str, categories:
         "csv_download": sp_csv_download,
         "json_download": sp_json_download,
     }
+
+
+def build_query_profiles_page() -> dict[str, Any]:
+    with gr.Column(visible=False, elem_classes=["ri-page"], elem_id="page_queries") as page:
+        build_section_header("Slow Queries", "DuckDB statements captured above DUCKDB_PROFILE_SLOW_MS")
+        with gr.Group(elem_classes=["ri-card"]):
+            qp_status = gr.Markdown(elem_classes=["ri-muted-text"])
+            qp_refresh = gr.Button("Refresh", variant="primary")
+            qp_table = gr.Dataframe(label="Slowest Queries", interactive=False, wrap=True)
+
+        with gr.Group(elem_classes=["ri-card"]):
+            with gr.Row():
+                qp_hash = gr.Textbox(label="Query Hash", placeholder="Paste a query_hash from the table")
+                qp_show = gr.Button("Show Profile")
+            qp_profile = gr.JSON(label="Slowest Captured Profile")
+
+    return {
+        "page": page,
+        "status": qp_status,
+        "refresh": qp_refresh,
+        "table": qp_table,
+        "hash": qp_hash,
+        "show": qp_show,
+        "profile": qp_profile,
+    }
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import tempfile
 from datetime import date, datetime
+from io import BytesIO
+from pathlib import Path
 
-import duckdb
 import matplotlib
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
@@ -10,6 +12,7 @@ import pandas as pd
 from matplotlib.ticker import FuncFormatter
 
 from app.config import DUCKDB_PATH
+from pipeline.db import get_connection
 
 matplotlib.use("Agg")
 
@@ -63,7 +66,7 @@ def get_daily_trends(
         ORDER BY day
     """
 
-    with duckdb.connect(str(DUCKDB_PATH), read_only=True) as conn:
+    with get_connection(DUCKDB_PATH, read_only=True) as conn:
         rows = conn.execute(query, params).fetchall()
 
     df = pd.DataFrame(rows, columns=["day", "avg_rating", "pct_negative", "critical_count"])
@@ -154,6 +157,20 @@ def _plot_series(
     return fig
 
 
+def save_chart_png(fig, directory: Path) -> str:
+    """Render `fig` to a PNG file in `directory`, close it, and return the file path."""
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format="png")
+    finally:
+        # pyplot keeps every figure alive until it is closed explicitly.
+        plt.close(fig)
+    directory.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix="chart_", suffix=".png", delete=False) as handle:
+        handle.write(buffer.getvalue())
+    return handle.name
+
+
 def plot_rating_trend(df: pd.DataFrame):
     return _plot_series(
         df=df,
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stats import summarize_ms
+
+
+PRESETS: tuple[str, ...] = ("7D", "30D", "90D", "YTD")
+PAGE_SIZES: tuple[int, ...] = (25, 50, 100)
+# Relative frequency of each dashboard action in a scripted session.
+ACTION_WEIGHTS: dict[str, int] = {
+    "overview": 3,
+    "drilldown": 4,
+    "release_delta": 2,
+}
+SQL_SAMPLE_CHARS = 160
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class LatencyRecorder:
+    """Thread-safe latency samples keyed by handler name or SQL fingerprint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.sql_text: dict[str, str] = {}
+
+    def add(self, key: str, seconds: float) -> int:
+        with self._lock:
+            self.samples[key].append(seconds)
+            return len(self.samples[key]) - 1
+
+    def extend(self, key: str, index: int, seconds: float) -> None:
+        with self._lock:
+            self.samples[key][index] += seconds
+
+    def error(self, key: str) -> None:
+        with self._lock:
+            self.errors[key] += 1
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                key: {**summarize_ms(values), "errors": self.errors.get(key, 0)}
+                for key, values in sorted(self.samples.items())
+            }
+
+
+class _SqlTimer:
+    """Query observer that attributes execute + fetch time to the calling function and SQL text."""
+
+    def __init__(self, recorder: LatencyRecorder) -> None:
+        self._recorder = recorder
+        # Per thread: the sample of the last statement, which its fetches are added to.
+        self._local = threading.local()
+
+    def __call__(self, sql: str, seconds: float, method: str) -> None:
+        if method not in {"execute", "executemany"}:
+            last = getattr(self._local, "last", None)
+            if last is not None and last[0] == sql:
+                self._recorder.extend(last[1], last[2], seconds)
+            return
+        normalized = _WHITESPACE_RE.sub(" ", sql).strip()
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:8]
+        key = f"{_sql_caller()}:{digest}"
+        self._recorder.sql_text.setdefault(key, normalized[:SQL_SAMPLE_CHARS])
+        self._local.last = (sql, key, self._recorder.add(key, seconds))
+
+
+def _sql_caller() -> str:
+    # Skip this module and pipeline.db's connection wrapper to reach the app function that ran the statement.
+    import pipeline.db as pipeline_db
+
+    skipped = {__file__, pipeline_db.__file__}
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename in skipped:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{Path(frame.f_code.co_filename).stem}.{frame.f_code.co_name}"
+
+
+def install_sql_timing(recorder: LatencyRecorder) -> Callable[[], None]:
+    """Time every statement on `pipeline.db.get_connection` connections; returns a function that undoes it."""
+    from pipeline.db import add_query_observer, remove_query_observer
+
+    observer = _SqlTimer(recorder)
+    add_query_observer(observer)
+
+    def _uninstall() -> None:
+        remove_query_observer(observer)
+
+    return _uninstall
+
+
+def build_script(filters: dict[str, Any], actions: int, seed: int) -> list[dict[str, Any]]:
+    """Script a session of dashboard actions drawn from the live filter options."""
+    from app.gradio_app import _resolve_preset_range
+
+    rng = random.Random(seed)
+    min_day = filters.get("min_day")
+    max_day = filters.get("max_day")
+    categories = filters.get("categories") or []
+    issue_labels = filters.get("issue_labels") or []
+    # Release comparisons and version filters concentrate on the most recent releases, as in the UI defaults.
+    versions = (filters.get("versions") or [])[:20]
+    names = list(ACTION_WEIGHTS)
+    weights = [ACTION_WEIGHTS[name] for name in names]
+
+    script: list[dict[str, Any]] = []
+    for _ in range(actions):
+        action = rng.choices(names, weights=weights)[0]
+        start, end = _resolve_preset_range(rng.choice(PRESETS), min_day, max_day)
+        if action == "overview":
+            script.append({"action": action, "args": {"start_date": start, "end_date": end}})
+        elif action == "drilldown":
+            script.append(
+                {
+                    "action": action,
+                    "args": {
+                        "start_date": start,
+                        "end_date": end,
+                        "category": rng.choice(categories) if categories and rng.random() < 0.4 else None,
+                        "issue_label": rng.choice(issue_labels) if issue_labels and rng.random() < 0.5 else None,
+                        "version": rng.choice(versions) if versions and rng.random() < 0.2 else None,
+                        # Most users stay on the first pages.
+                        "page": min(1 + int(rng.expovariate(0.8)), 20),
+                        "page_size": rng.choice(PAGE_SIZES),
+                    },
+                }
+            )
+        elif len(versions) >= 2:
+            version_a, version_b = rng.sample(versions, 2)
+            script.append({"action": action, "args": {"version_a": version_a, "version_b": version_b}})
+    return script
+
+
+def load_script(path: Path) -> list[dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _handlers(recorder: LatencyRecorder) -> dict[str, Callable[..., Any]]:
+    import app.gradio_app as gradio_app
+    import app.ui.plots as plots
+
+    def _timed(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                recorder.error(name)
+                raise
+            finally:
+                recorder.add(name, time.perf_counter() - started)
+
+        return _wrapper
+
+    # Services called from inside handlers are timed separately as well.
+    gradio_app.search_reviews = _timed("search_reviews", gradio_app.search_reviews)
+    gradio_app.get_evidence_quotes = _timed("get_evidence_quotes", gradio_app.get_evidence_quotes)
+    plots.get_daily_trends = _timed("get_daily_trends", plots.get_daily_trends)
+
+    return {
+        "overview": _timed("_overview_payload", gradio_app._overview_payload),
+        "drilldown": _timed("_drilldown_payload", gradio_app._drilldown_payload),
+        "release_delta": _timed("_release_delta", gradio_app._release_delta),
+    }
+
+
+def run_load(
+    script: list[dict[str, Any]],
+    users: int,
+    think_ms: float,
+    seed: int,
+) -> tuple[LatencyRecorder, LatencyRecorder, float, int]:
+    handler_recorder = LatencyRecorder()
+    sql_recorder = LatencyRecorder()
+    handlers = _handlers(handler_recorder)
+    uninstall = install_sql_timing(sql_recorder)
+    failures = 0
+    failures_lock = threading.Lock()
+
+    def _user(user_idx: int) -> None:
+        nonlocal failures
+        rng = random.Random(seed + user_idx)
+        # Each virtual user replays the script from its own offset so users don't move in lockstep.
+        offset = rng.randrange(len(script)) if script else 0
+        for step in range(len(script)):
+            item = script[(offset + step) % len(script)]
+            try:
+                handlers[item["action"]](**item["args"])
+            except Exception:  # noqa: BLE001
+                with failures_lock:
+                    failures += 1
+            if think_ms > 0:
+                time.sleep(rng.expovariate(1000.0 / think_ms))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_user, args=(idx,), name=f"vu-{idx}") for idx in range(users)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        uninstall()
+    return handler_recorder, sql_recorder, time.perf_counter() - started, failures
+
+
+def _print_table(title: str, summary: dict[str, Any]) -> None:
+    print(f"\n{title}")
+    print(f"{'name':<64} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for key, stats in sorted(summary.items(), key=lambda item: -item[1]["p95_ms"]):
+        print(
+            f"{key[:64]:<64} {stats['count']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay dashboard interactions against the service layer.")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--actions", type=int, default=40, help="Actions per user when scripting a session")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean think time between a user's actions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", type=Path, default=None, help="Database to benchmark (sets REVIEWS_DUCKDB_PATH)")
+    parser.add_argument("--script", type=Path, default=None, help="Replay a recorded JSON-lines action script")
+    parser.add_argument("--record", type=Path, default=None, help="Write the scripted session as JSON lines")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.db is not None:
+        # Must be set before app modules resolve DUCKDB_PATH at import time.
+        os.environ["REVIEWS_DUCKDB_PATH"] = str(args.db.resolve())
+
+    from app.config import DUCKDB_PATH
+    from app.services.search_service import get_filter_options
+
+    if not DUCKDB_PATH.exists():
+        parser.error(f"database not found at {DUCKDB_PATH}; run the pipeline first")
+
+    script = load_script(args.script) if args.script else build_script(get_filter_options(), args.actions, args.seed)
+    if args.record:
+        args.record.parent.mkdir(parents=True, exist_ok=True)
+        args.record.write_text("".join(json.dumps(item) + "\n" for item in script), encoding="utf-8")
+
+    handler_recorder, sql_recorder, elapsed, failures = run_load(script, args.users, args.think_ms, args.seed)
+    handler_summary = handler_recorder.summary()
+    sql_summary = sql_recorder.summary()
+    total_actions = len(script) * args.users
+
+    results = {
+        "created_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "database": str(DUCKDB_PATH),
+        "users": args.users,
+        "actions": total_actions,
+        "failed_actions": failures,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_actions_per_sec": round(total_actions / elapsed, 2) if elapsed else 0.0,
+        "handlers": handler_summary,
+        "sql": {key: {**stats, "sql": sql_recorder.sql_text.get(key, "")} for key, stats in sql_summary.items()},
+    }
+
+    print(
+        f"[dashboard_bench] {total_actions} actions, {args.users} users, {elapsed:.2f}s, "
+        f"{results['throughput_actions_per_sec']} actions/s, {failures} failed"
+    )
+    _print_table("Handlers (ms)", handler_summary)
+    _print_table("SQL (ms)", sql_summary)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\n[dashboard_bench] results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import llm.ollama_client as ollama_client
+import llm.response_cache as response_cache
+from benchmarks.stats import summarize_ms
+from llm.fake_ollama_server import FakeOllamaConfig, running_fake_ollama
+from llm.json_enforcer import build_jsonschema_validator, call_json_with_retry, load_json_schema
+from llm.prompt_loader import load_prompt_sections
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROMPT_PATH = ROOT_DIR / "llm" / "prompts" / "weekly_exec_brief.md"
+SCHEMA_PATH = ROOT_DIR / "llm" / "schemas" / "weekly_exec_brief.schema.json"
+SAMPLE_INPUT: dict[str, Any] = {
+    "scope": {"start_date": "2025-01-01", "end_date": "2025-01-07"},
+    "kpi_snapshot": {"total_reviews": 412, "avg_rating": 2.84, "pct_negative": 0.47, "critical_count": 12},
+}
+
+
+def _timed_calls(fn: Callable[[int], Any], calls: int, concurrency: int = 1) -> tuple[list[float], float]:
+    def _one(idx: int) -> float:
+        started = time.perf_counter()
+        fn(idx)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        samples = list(pool.map(_one, range(calls)))
+    return samples, time.perf_counter() - started
+
+
+def _prompts(idx: int) -> tuple[str, str]:
+    system_prompt, user_template = load_prompt_sections(PROMPT_PATH)
+    # Vary the input so identical prompts never collapse into one request upstream.
+    payload = {**SAMPLE_INPUT, "request_index": idx}
+    return system_prompt, user_template.replace("{{input_json}}", json.dumps(payload, separators=(",", ":")))
+
+
+def bench_call_ollama(config: FakeOllamaConfig, calls: int) -> dict[str, Any]:
+    with running_fake_ollama(config) as (base_url, _state):
+        ollama_client.OLLAMA_BASE_URL = base_url
+
+        def _call(idx: int) -> None:
+            system_prompt, user_prompt = _prompts(idx)
+            ollama_client.call_ollama(system=system_prompt, user=user_prompt)
+
+        samples, _elapsed = _timed_calls(_call, calls)
+    return {"latency": summarize_ms(samples)}
+
+
+def bench_json_retry(config: FakeOllamaConfig, calls: int) -> dict[str, Any]:
+    validator = build_jsonschema_validator(load_json_schema(SCHEMA_PATH))
+    with running_fake_ollama(config) as (base_url, state):
+        ollama_client.OLLAMA_BASE_URL = base_url
+        failures = 0
+
+        def _call(idx: int) -> None:
+            nonlocal failures
+            system_prompt, user_prompt = _prompts(idx)
+            try:
+                call_json_with_retry(
+                    model=ollama_client.DEFAULT_MODEL,
+                    system=system_prompt,
+                    user=user_prompt,
+                    schema_validator=validator,
+                )
+            except ValueError:
+                failures += 1
+
+        samples, _elapsed = _timed_calls(_call, calls)
+        requests_sent = state.requests
+        malformed = state.malformed
+
+    return {
+        "malformed_rate": config.malformed_rate,
+        "latency": summarize_ms(samples),
+        "requests_per_call": round(requests_sent / max(calls, 1), 3),
+        "malformed_responses": malformed,
+        "failed_calls": failures,
+    }
+
+
+def bench_concurrency(config: FakeOllamaConfig, calls: int, levels: list[int]) -> list[dict[str, Any]]:
+    results = []
+    with running_fake_ollama(config) as (base_url, _state):
+        ollama_client.OLLAMA_BASE_URL = base_url
+
+        def _call(idx: int) -> None:
+            system_prompt, user_prompt = _prompts(idx)
+            ollama_client.call_ollama(system=system_prompt, user=user_prompt)
+
+        for level in levels:
+            samples, elapsed = _timed_calls(_call, calls, concurrency=level)
+            results.append(
+                {
+                    "concurrency": level,
+                    "throughput_calls_per_sec": round(calls / elapsed, 3) if elapsed else 0.0,
+                    "latency": summarize_ms(samples),
+                }
+            )
+    return results
+
+
+def bench_reports(config: FakeOllamaConfig, calls: int) -> dict[str, Any]:
+    from app.config import DUCKDB_PATH
+
+    if not DUCKDB_PATH.exists():
+        return {"skipped": f"database not found at {DUCKDB_PATH}; run the pipeline first"}
+
+    import app.services.insights_service as insights_service
+
+    # Bypass the report cache so every call exercises payload building, prompting and validation.
+    insights_service.get_or_create_report = lambda report_type, scope, model, generator: generator()
+
+    results: dict[str, Any] = {}
+    with running_fake_ollama(config) as (base_url, _state):
+        ollama_client.OLLAMA_BASE_URL = base_url
+        for name, generate in (
+            ("weekly_exec_brief", insights_service.generate_weekly_exec_brief),
+            ("sprint_backlog", insights_service.generate_sprint_backlog),
+        ):
+            samples, _elapsed = _timed_calls(lambda _idx, generate=generate: generate({}), calls)
+            results[name] = summarize_ms(samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the LLM layer against a local fake Ollama.")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=2000.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.2)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    # Measure the raw LLM path; cached responses would hide latency and retry cost.
+    response_cache.LLM_CACHE_ENABLED = False
+
+    base_config = FakeOllamaConfig(
+        latency_ms=args.latency_ms,
+        prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+        tokens_per_sec=args.tokens_per_sec,
+        max_parallel=args.max_parallel,
+    )
+    malformed_config = FakeOllamaConfig(**{**base_config.__dict__, "malformed_rate": args.malformed_rate})
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    results = {
+        "config": base_config.__dict__,
+        "call_ollama": bench_call_ollama(base_config, args.calls),
+        "json_retry_clean": bench_json_retry(base_config, args.calls),
+        "json_retry_malformed": bench_json_retry(malformed_config, args.calls),
+        "concurrency": bench_concurrency(base_config, args.calls, levels),
+        "reports": bench_reports(base_config, max(1, args.calls // 4)),
+    }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
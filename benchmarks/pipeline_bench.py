@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_corpus import generate_corpus, learn_profile
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CORPORA_DIR = ROOT_DIR / "benchmarks" / "corpora"
+WORK_DIR = ROOT_DIR / "benchmarks" / ".work"
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results" / "pipeline"
+
+STAGES: tuple[str, ...] = (
+    "00_ingest",
+    "01_normalize",
+    "02_enrich_sentiment",
+    "03_enrich_issues",
+    "04_score_severity",
+    "05_user_churn",
+    "06_aggregates_daily",
+    "07_aggregates_version",
+    "08_trends_anomalies",
+    "09_insight_materialization",
+)
+DEFAULT_SIZES = "15000,100000"
+DEFAULT_SEED = 42
+DEFAULT_THRESHOLD = float(os.getenv("PIPELINE_BENCH_THRESHOLD", "0.25"))
+# Stages faster than this are dominated by interpreter start-up; their ratios are noise.
+DEFAULT_MIN_SECONDS = float(os.getenv("PIPELINE_BENCH_MIN_SECONDS", "0.5"))
+SPILL_POLL_SECONDS = 0.05
+COMPARED_METRICS: tuple[str, ...] = ("wall_seconds", "peak_rss_mb")
+
+
+def _dir_size_bytes(path: Path) -> int:
+    if not path.exists():
+        return 0
+    total = 0
+    for entry in path.rglob("*"):
+        try:
+            if entry.is_file():
+                total += entry.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def _read_hwm_bytes(pid: int) -> int:
+    """Peak resident set size of a running process from /proc (0 where /proc is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return 0
+    return 0
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def corpus_path(rows: int, seed: int) -> Path:
+    return CORPORA_DIR / f"synthetic_{rows}_seed{seed}.csv"
+
+
+def ensure_corpora(sizes: list[int], seed: int) -> dict[int, Path]:
+    """Generate each fixed corpus once; later runs reuse the same files so results stay comparable."""
+    paths = {rows: corpus_path(rows, seed) for rows in sizes}
+    missing = [rows for rows, path in paths.items() if not path.exists()]
+    if missing:
+        profile = learn_profile()
+        for rows in missing:
+            started = time.perf_counter()
+            partial = paths[rows].with_name(paths[rows].name + ".partial")
+            generate_corpus(partial, rows, seed=seed, profile=profile)
+            partial.replace(paths[rows])
+            print(f"[pipeline_bench] generated {rows} rows in {time.perf_counter() - started:.1f}s -> {paths[rows]}")
+    return paths
+
+
+def run_stage(script: Path, env: dict[str, str], spill_dir: Path) -> dict[str, Any]:
+    """Run one stage in a fresh interpreter; measure wall/CPU time, peak RSS and DuckDB temp spill."""
+    peak_spill = 0
+    peak_hwm = 0
+    stop = threading.Event()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(script)],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    def _poll() -> None:
+        nonlocal peak_spill, peak_hwm
+        while not stop.is_set():
+            peak_spill = max(peak_spill, _dir_size_bytes(spill_dir))
+            peak_hwm = max(peak_hwm, _read_hwm_bytes(proc.pid))
+            stop.wait(SPILL_POLL_SECONDS)
+
+    poller = threading.Thread(target=_poll, daemon=True)
+    poller.start()
+    output = proc.stdout.read() if proc.stdout else ""
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    wall_seconds = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.stdout:
+        proc.stdout.close()
+    stop.set()
+    poller.join()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS; prefer VmHWM, which is not inflated by the parent's pre-exec pages.
+    rss_bytes = peak_hwm or (usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024)
+    return {
+        "returncode": proc.returncode,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 4),
+        "peak_rss_mb": round(rss_bytes / (1024 * 1024), 2),
+        "peak_spill_mb": round(peak_spill / (1024 * 1024), 3),
+        "output_tail": output.strip().splitlines()[-3:],
+    }
+
+
+def bench_size(rows: int, corpus: Path, stages: list[str]) -> dict[str, Any]:
+    work_dir = WORK_DIR / f"rows_{rows}"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+    db_path = work_dir / "reviews.duckdb"
+    # DuckDB spills to "<database>.tmp" next to a file-backed database.
+    spill_dir = Path(f"{db_path}.tmp")
+
+    env = {
+        **os.environ,
+        "REVIEWS_DUCKDB_PATH": str(db_path),
+        "INGEST_CSV_FILES": str(corpus),
+        # LLM passes measure Ollama, not the pipeline; llm_bench covers them.
+        "SENTIMENT_LLM_ADJUDICATION": "0",
+        "ISSUES_LLM_ENABLED": "0",
+    }
+    migrations = run_stage(ROOT_DIR / "pipeline" / "migrations.py", env, spill_dir)
+    if migrations["returncode"] != 0:
+        raise RuntimeError(f"migrations failed for {rows} rows: {migrations['output_tail']}")
+
+    results: dict[str, Any] = {}
+    for stage in stages:
+        metrics = run_stage(ROOT_DIR / "pipeline" / f"{stage}.py", env, spill_dir)
+        metrics["rows_per_sec"] = round(rows / metrics["wall_seconds"], 1) if metrics["wall_seconds"] else 0.0
+        results[stage] = metrics
+        status = "ok" if metrics["returncode"] == 0 else f"FAILED ({metrics['returncode']})"
+        print(
+            f"[pipeline_bench] {rows:>10} rows {stage:<28} {metrics['wall_seconds']:>9.3f}s "
+            f"{metrics['peak_rss_mb']:>9.1f} MiB rss {metrics['peak_spill_mb']:>8.1f} MiB spill {status}"
+        )
+        if metrics["returncode"] != 0:
+            break
+
+    results["_database_mb"] = round(db_path.stat().st_size / (1024 * 1024), 2) if db_path.exists() else 0.0
+    return results
+
+
+def find_baseline(commit: str) -> Path | None:
+    candidates = [
+        path for path in RESULTS_DIR.glob("*.json") if path.stem != commit and path.stem.removesuffix("-dirty") != commit
+    ]
+    return max(candidates, key=lambda path: path.stat().st_mtime) if candidates else None
+
+
+def compare_results(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    min_seconds: float,
+) -> list[str]:
+    """Return one message per (size, stage, metric) that grew by more than `threshold` over the baseline."""
+    regressions: list[str] = []
+    for size, stages in current.get("sizes", {}).items():
+        base_stages = baseline.get("sizes", {}).get(size, {})
+        for stage, metrics in stages.items():
+            base = base_stages.get(stage)
+            if stage.startswith("_") or not isinstance(base, dict) or base.get("returncode") != 0:
+                continue
+            if metrics.get("returncode") != 0:
+                regressions.append(f"{size} rows {stage}: failed with exit code {metrics.get('returncode')}")
+                continue
+            for metric in COMPARED_METRICS:
+                before = float(base.get(metric) or 0.0)
+                after = float(metrics.get(metric) or 0.0)
+                if metric == "wall_seconds" and max(before, after) < min_seconds:
+                    continue
+                if before > 0 and (after - before) / before > threshold:
+                    regressions.append(
+                        f"{size} rows {stage}: {metric} {before:g} -> {after:g} (+{(after - before) / before:.0%})"
+                    )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage against fixed synthetic corpora.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes in rows")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stage names to run")
+    parser.add_argument("--baseline", type=Path, default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative growth")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS)
+    parser.add_argument("--output", type=Path, default=None, help="Defaults to benchmarks/results/pipeline/<commit>.json")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    corpora = ensure_corpora(sizes, args.seed)
+    commit = _git_commit()
+    results: dict[str, Any] = {
+        "commit": commit,
+        "created_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "sizes": {str(rows): bench_size(rows, corpora[rows], stages) for rows in sizes},
+    }
+
+    output_path = args.output or RESULTS_DIR / f"{commit}.json"
+    baseline_path = args.baseline or find_baseline(commit)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"[pipeline_bench] results written to {output_path}")
+
+    failed = [
+        f"{size} rows {stage}"
+        for size, stage_results in results["sizes"].items()
+        for stage, metrics in stage_results.items()
+        if isinstance(metrics, dict) and metrics.get("returncode") != 0
+    ]
+    regressions: list[str] = []
+    if baseline_path is not None and baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = compare_results(results, baseline, args.threshold, args.min_seconds)
+        print(f"[pipeline_bench] compared against {baseline_path} (threshold {args.threshold:.0%})")
+    else:
+        print("[pipeline_bench] no baseline found; skipping regression check")
+
+    for message in failed:
+        print(f"[pipeline_bench] FAILED: {message}")
+    for message in regressions:
+        print(f"[pipeline_bench] REGRESSION: {message}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import importlib.util
+import random
+import re
+import sys
+import tempfile
+import uuid
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config import SOURCE_CSVS
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+ISSUES_STAGE_PATH = ROOT_DIR / "pipeline" / "03_enrich_issues.py"
+
+OUTPUT_COLUMNS: tuple[str, ...] = (
+    "reviewId",
+    "userName",
+    "content",
+    "score",
+    "thumbsUpCount",
+    "reviewCreatedVersion",
+    "at",
+    "appVersion",
+    "category",
+)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+START_TOKEN = "\x02"
+END_TOKEN = "\x03"
+TOKEN_RE = re.compile(r"[^\s]+")
+
+# Names that cover at least this share of rows are placeholders ("A Google user"), not real repeat users.
+PLACEHOLDER_NAME_SHARE = 0.01
+RECENT_USER_POOL = 50_000
+RECENT_ID_POOL = 10_000
+CALIBRATION_SAMPLES = 2_000
+MAX_REVIEW_WORDS = 120
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class _WeightedChoice:
+    """O(log n) sampling from an empirical frequency table."""
+
+    def __init__(self, counts: Counter) -> None:
+        self.values = list(counts.keys())
+        self.cumulative: list[int] = []
+        running = 0
+        for value in self.values:
+            running += counts[value]
+            self.cumulative.append(running)
+
+    def sample(self, rng: random.Random) -> Any:
+        target = rng.random() * self.cumulative[-1]
+        return self.values[bisect.bisect_right(self.cumulative, target)]
+
+
+def _load_issue_keywords() -> tuple[str, ...]:
+    spec = importlib.util.spec_from_file_location("enrich_issues_stage", ISSUES_STAGE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return tuple(phrase for rule in module.ISSUE_RULES for phrase in rule.keyword_patterns)
+
+
+def _has_issue_keyword(text: str, keywords: tuple[str, ...]) -> bool:
+    lowered = text.lower()
+    return any(keyword in lowered for keyword in keywords)
+
+
+@dataclass
+class CorpusProfile:
+    score: _WeightedChoice
+    thumbs_by_score: dict[int, _WeightedChoice]
+    category_by_score: dict[int, _WeightedChoice]
+    length_by_score: dict[int, _WeightedChoice]
+    transitions_by_score: dict[int, dict[str, _WeightedChoice]]
+    at_version: _WeightedChoice
+    created_version_same_rate: float
+    versions: _WeightedChoice
+    placeholder_names: _WeightedChoice | None
+    placeholder_rate: float
+    user_repeat_rate: float
+    first_names: _WeightedChoice
+    last_names: _WeightedChoice
+    duplicate_id_rate: float
+    issue_keyword_rate_by_score: dict[int, float]
+    issue_keywords: tuple[str, ...]
+    keyword_injection_rate_by_score: dict[int, float] = field(default_factory=dict)
+
+
+def learn_profile(source_paths: Iterable[Path] = SOURCE_CSVS) -> CorpusProfile:
+    """Learn column distributions and a per-rating word bigram model from the source CSVs."""
+    issue_keywords = _load_issue_keywords()
+
+    scores: Counter = Counter()
+    thumbs: dict[int, Counter] = defaultdict(Counter)
+    categories: dict[int, Counter] = defaultdict(Counter)
+    lengths: dict[int, Counter] = defaultdict(Counter)
+    transitions: dict[int, dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+    keyword_hits: Counter = Counter()
+    at_version: Counter = Counter()
+    versions: Counter = Counter()
+    names: Counter = Counter()
+    seen_ids: set[str] = set()
+    duplicate_ids = 0
+    created_same = 0
+    rows = 0
+
+    for path in source_paths:
+        with Path(path).open(encoding="utf-8", newline="") as handle:
+            for record in csv.DictReader(handle):
+                rows += 1
+                try:
+                    score = int(record.get("score") or 3)
+                except ValueError:
+                    score = 3
+                scores[score] += 1
+                thumbs[score][int(record.get("thumbsUpCount") or 0)] += 1
+                categories[score][record.get("category") or ""] += 1
+
+                content = record.get("content") or ""
+                tokens = TOKEN_RE.findall(content)[:MAX_REVIEW_WORDS]
+                lengths[score][max(1, len(tokens))] += 1
+                previous = START_TOKEN
+                for token in tokens:
+                    transitions[score][previous][token] += 1
+                    previous = token
+                transitions[score][previous][END_TOKEN] += 1
+                if _has_issue_keyword(content, issue_keywords):
+                    keyword_hits[score] += 1
+
+                app_version = record.get("appVersion") or ""
+                at_version[(record.get("at") or "", app_version)] += 1
+                versions[app_version] += 1
+                if (record.get("reviewCreatedVersion") or "") == app_version:
+                    created_same += 1
+
+                names[record.get("userName") or ""] += 1
+                review_id = record.get("reviewId") or ""
+                if review_id in seen_ids:
+                    duplicate_ids += 1
+                seen_ids.add(review_id)
+
+    if rows == 0:
+        raise ValueError("No source rows found to learn a corpus profile from")
+
+    placeholder = Counter({name: count for name, count in names.items() if count / rows >= PLACEHOLDER_NAME_SHARE})
+    named = {name: count for name, count in names.items() if name not in placeholder}
+    named_rows = sum(named.values())
+    first_names: Counter = Counter()
+    last_names: Counter = Counter()
+    for name in named:
+        parts = name.split()
+        if parts:
+            first_names[parts[0]] += 1
+            last_names[parts[-1] if len(parts) > 1 else ""] += 1
+
+    profile = CorpusProfile(
+        score=_WeightedChoice(scores),
+        thumbs_by_score={score: _WeightedChoice(counter) for score, counter in thumbs.items()},
+        category_by_score={score: _WeightedChoice(counter) for score, counter in categories.items()},
+        length_by_score={score: _WeightedChoice(counter) for score, counter in lengths.items()},
+        transitions_by_score={
+            score: {token: _WeightedChoice(nexts) for token, nexts in table.items()}
+            for score, table in transitions.items()
+        },
+        at_version=_WeightedChoice(at_version),
+        created_version_same_rate=created_same / rows,
+        versions=_WeightedChoice(versions),
+        placeholder_names=_WeightedChoice(placeholder) if placeholder else None,
+        placeholder_rate=sum(placeholder.values()) / rows,
+        user_repeat_rate=(named_rows - len(named)) / named_rows if named_rows else 0.0,
+        first_names=_WeightedChoice(first_names or Counter({"User": 1})),
+        last_names=_WeightedChoice(last_names or Counter({"": 1})),
+        duplicate_id_rate=duplicate_ids / rows,
+        issue_keyword_rate_by_score={score: keyword_hits[score] / count for score, count in scores.items()},
+        issue_keywords=issue_keywords,
+    )
+    _calibrate_keyword_injection(profile)
+    return profile
+
+
+def _generate_text(profile: CorpusProfile, score: int, rng: random.Random) -> str:
+    table = profile.transitions_by_score[score]
+    target_words = profile.length_by_score[score].sample(rng)
+    words: list[str] = []
+    token = START_TOKEN
+    while len(words) < MAX_REVIEW_WORDS:
+        choices = table.get(token)
+        if choices is None:
+            break
+        token = choices.sample(rng)
+        if token == END_TOKEN:
+            # Restart a sentence when the chain ends well short of the sampled length.
+            if len(words) >= target_words * 0.6:
+                break
+            token = START_TOKEN
+            continue
+        words.append(token)
+        if len(words) >= target_words and token.endswith((".", "!", "?")):
+            break
+    return " ".join(words)
+
+
+def _calibrate_keyword_injection(profile: CorpusProfile) -> None:
+    """Pick injection rates so generated text hits issue keywords at the source rate per rating."""
+    rng = random.Random(0)
+    for score, target in profile.issue_keyword_rate_by_score.items():
+        samples = [_generate_text(profile, score, rng) for _ in range(CALIBRATION_SAMPLES)]
+        natural = sum(_has_issue_keyword(text, profile.issue_keywords) for text in samples) / CALIBRATION_SAMPLES
+        profile.keyword_injection_rate_by_score[score] = (
+            max(0.0, (target - natural) / (1.0 - natural)) if natural < 1.0 else 0.0
+        )
+
+
+class CorpusGenerator:
+    def __init__(self, profile: CorpusProfile, seed: int = 42, jitter_hours: float = 12.0) -> None:
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.jitter_seconds = int(jitter_hours * 3600)
+        self.recent_users: deque[str] = deque(maxlen=RECENT_USER_POOL)
+        self.recent_ids: deque[str] = deque(maxlen=RECENT_ID_POOL)
+
+    def _review_id(self) -> str:
+        if self.recent_ids and self.rng.random() < self.profile.duplicate_id_rate:
+            return self.rng.choice(self.recent_ids)
+        review_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+        self.recent_ids.append(review_id)
+        return review_id
+
+    def _user_name(self) -> str:
+        profile = self.profile
+        if profile.placeholder_names is not None and self.rng.random() < profile.placeholder_rate:
+            return profile.placeholder_names.sample(self.rng)
+        if self.recent_users and self.rng.random() < profile.user_repeat_rate:
+            return self.rng.choice(self.recent_users)
+        name = f"{profile.first_names.sample(self.rng)} {profile.last_names.sample(self.rng)}".strip()
+        self.recent_users.append(name)
+        return name
+
+    def _timestamp(self, source_at: str) -> str:
+        try:
+            base = datetime.strptime(source_at, TIMESTAMP_FORMAT)
+        except ValueError:
+            return source_at
+        return (base + timedelta(seconds=self.rng.randint(-self.jitter_seconds, self.jitter_seconds))).strftime(
+            TIMESTAMP_FORMAT
+        )
+
+    def row(self) -> tuple[Any, ...]:
+        profile = self.profile
+        rng = self.rng
+        score = profile.score.sample(rng)
+
+        content = _generate_text(profile, score, rng)
+        if rng.random() < profile.keyword_injection_rate_by_score.get(score, 0.0):
+            content = f"{content} {rng.choice(profile.issue_keywords)}.".strip()
+
+        # (at, appVersion) are sampled jointly so versions stay aligned with their release window.
+        source_at, app_version = profile.at_version.sample(rng)
+        created_version = app_version if rng.random() < profile.created_version_same_rate else profile.versions.sample(rng)
+
+        return (
+            self._review_id(),
+            self._user_name(),
+            content,
+            score,
+            profile.thumbs_by_score[score].sample(rng),
+            created_version,
+            self._timestamp(source_at),
+            app_version,
+            profile.category_by_score[score].sample(rng),
+        )
+
+    def chunks(self, total_rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[list[tuple[Any, ...]]]:
+        remaining = total_rows
+        while remaining > 0:
+            size = min(chunk_rows, remaining)
+            yield [self.row() for _ in range(size)]
+            remaining -= size
+
+
+def write_csv(generator: CorpusGenerator, output_path: Path, rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with output_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(OUTPUT_COLUMNS)
+        for chunk in generator.chunks(rows, chunk_rows):
+            writer.writerows(chunk)
+            written += len(chunk)
+    return written
+
+
+def write_parquet(generator: CorpusGenerator, output_path: Path, rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    import duckdb
+    import pandas as pd
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    # Chunks are staged in a scratch database file next to the output, so memory stays flat, then written by one COPY.
+    with tempfile.TemporaryDirectory(dir=output_path.parent, prefix=".synthetic_") as scratch_dir:
+        with duckdb.connect(str(Path(scratch_dir) / "corpus.duckdb")) as conn:
+            conn.execute(
+                """
+                CREATE TABLE corpus (
+                    reviewId VARCHAR,
+                    userName VARCHAR,
+                    content VARCHAR,
+                    score INTEGER,
+                    thumbsUpCount INTEGER,
+                    reviewCreatedVersion VARCHAR,
+                    "at" VARCHAR,
+                    appVersion VARCHAR,
+                    category VARCHAR
+                )
+                """
+            )
+            for chunk in generator.chunks(rows, chunk_rows):
+                chunk_df = pd.DataFrame.from_records(chunk, columns=list(OUTPUT_COLUMNS))
+                conn.register("corpus_chunk", chunk_df)
+                conn.execute("INSERT INTO corpus SELECT * FROM corpus_chunk")
+                conn.unregister("corpus_chunk")
+                written += len(chunk)
+            target = str(output_path).replace("'", "''")
+            conn.execute(f"COPY corpus TO '{target}' (FORMAT parquet, COMPRESSION zstd)")
+    return written
+
+
+def generate_corpus(
+    output_path: Path,
+    rows: int,
+    seed: int = 42,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    profile: CorpusProfile | None = None,
+) -> int:
+    generator = CorpusGenerator(profile or learn_profile(), seed=seed)
+    if output_path.suffix.lower() == ".parquet":
+        return write_parquet(generator, output_path, rows, chunk_rows)
+    return write_csv(generator, output_path, rows, chunk_rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic review corpus learned from the source CSVs.")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", type=Path, required=True, help="Target .csv or .parquet path")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    written = generate_corpus(args.output, args.rows, seed=args.seed, chunk_rows=args.chunk_rows)
+    print(f"[synthetic_corpus] wrote {written} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
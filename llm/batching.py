@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Sequence, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def chunked(items: Sequence[T], size: int) -> list[list[T]]:
+    safe_size = max(1, int(size))
+    return [list(items[idx : idx + safe_size]) for idx in range(0, len(items), safe_size)]
+
+
+def run_batches(
+    batches: Iterable[T],
+    worker: Callable[[T], R],
+    concurrency: int = 4,
+) -> tuple[list[R], list[tuple[T, Exception]]]:
+    """Run `worker` over batches on a thread pool; return results and per-batch failures.
+
+    LLM calls are I/O bound, so threads are enough to keep several Ollama requests in flight.
+    A failing batch never aborts the others; callers decide how to surface the failures.
+    """
+    results: list[R] = []
+    failures: list[tuple[T, Exception]] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        futures = {pool.submit(worker, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # noqa: BLE001
+                failures.append((futures[future], exc))
+
+    return results, failures
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from llm.prompt_loader import load_prompt_sections
+from llm.token_budget import estimate_tokens
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROMPTS_DIR = ROOT_DIR / "llm" / "prompts"
+FIXTURES_DIR = ROOT_DIR / "llm" / "fixtures" / "fake_ollama"
+
+FIX_PROMPT_PREFIX = "Return ONLY valid JSON. Fix the malformed JSON below."
+STREAM_CHUNK_TOKENS = 4
+DEFAULT_OUTPUT: dict[str, Any] = {"summary": "Synthetic insight report from the fake Ollama server."}
+
+Responder = Callable[[str], dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class FakeOllamaConfig:
+    latency_ms: float = 0.0
+    prompt_tokens_per_sec: float = 0.0
+    tokens_per_sec: float = 0.0
+    malformed_rate: float = 0.0
+    max_parallel: int = 4
+    seed: int = 7
+
+
+def _input_json(user_prompt: str) -> dict[str, Any]:
+    _, _, tail = user_prompt.partition("Input JSON:")
+    try:
+        payload = json.loads(tail.strip())
+    except json.JSONDecodeError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _sentiment_responder(user_prompt: str) -> dict[str, Any]:
+    results = []
+    for review in _input_json(user_prompt).get("reviews", []):
+        rating = review.get("rating") or 3
+        label = "negative" if rating <= 2 else "positive" if rating >= 4 else "neutral"
+        results.append({"review_id": str(review.get("review_id")), "sentiment_label": label, "confidence": 0.82})
+    return {"results": results}
+
+
+def _issues_responder(user_prompt: str) -> dict[str, Any]:
+    payload = _input_json(user_prompt)
+    labels = payload.get("allowed_labels") or ["Glitches/Bugs"]
+    results = []
+    for idx, review in enumerate(payload.get("reviews", [])):
+        label = labels[idx % len(labels)]
+        results.append(
+            {
+                "review_id": str(review.get("review_id")),
+                "issues": [{"label": label, "confidence": 0.74, "evidence": [str(review.get("text", ""))[:40]]}],
+            }
+        )
+    return {"results": results}
+
+
+def _load_responders() -> dict[str, Responder]:
+    """Map each prompt file's system section to a schema-valid responder for that prompt."""
+    dynamic: dict[str, Responder] = {
+        "sentiment_adjudicator": _sentiment_responder,
+        "issues_multilabel": _issues_responder,
+    }
+
+    responders: dict[str, Responder] = {}
+    for prompt_path in sorted(PROMPTS_DIR.glob("*.md")):
+        system_prompt, _ = load_prompt_sections(prompt_path)
+        if system_prompt in responders:
+            continue
+
+        responder = dynamic.get(prompt_path.stem)
+        if responder is None:
+            fixture_path = FIXTURES_DIR / f"{prompt_path.stem}.json"
+            canned = json.loads(fixture_path.read_text(encoding="utf-8")) if fixture_path.exists() else DEFAULT_OUTPUT
+            responder = lambda _user, canned=canned: canned  # noqa: E731
+        responders[system_prompt] = responder
+    return responders
+
+
+class FakeOllamaState:
+    def __init__(self, config: FakeOllamaConfig) -> None:
+        self.config = config
+        self.responders = _load_responders()
+        self.slots = threading.BoundedSemaphore(max(1, config.max_parallel))
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        # malformed text -> the valid text it was derived from, so "fix the JSON" retries can succeed.
+        self._repairs: dict[str, str] = {}
+        self.requests = 0
+        self.malformed = 0
+
+    def respond(self, system_prompt: str, user_prompt: str) -> str:
+        with self._lock:
+            self.requests += 1
+            inject_malformed = self._rng.random() < self.config.malformed_rate
+
+        if user_prompt.startswith(FIX_PROMPT_PREFIX):
+            malformed_text = user_prompt.split("Malformed JSON:\n", 1)[-1].split("\n\nValidation/parse error:", 1)[0]
+            with self._lock:
+                repaired = self._repairs.get(malformed_text)
+            if repaired is not None:
+                return repaired
+
+        responder = self.responders.get(system_prompt, lambda _user: DEFAULT_OUTPUT)
+        text = json.dumps(responder(user_prompt), ensure_ascii=True)
+        if inject_malformed:
+            broken = text[: max(1, len(text) // 2)]
+            with self._lock:
+                self.malformed += 1
+                self._repairs[broken] = text
+            return broken
+        return text
+
+
+def _make_handler(state: FakeOllamaState) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+        def _send_json(self, status: int, body: dict[str, Any]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") == "/api/tags":
+                self._send_json(200, {"models": [{"name": "fake-ollama"}]})
+                return
+            self._send_json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") != "/api/chat":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            messages = request.get("messages", [])
+            system_prompt = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+            user_prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            model = str(request.get("model", "fake-ollama"))
+
+            with state.slots:
+                started = time.perf_counter()
+                prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+                prefill_seconds = state.config.latency_ms / 1000.0
+                if state.config.prompt_tokens_per_sec > 0:
+                    prefill_seconds += prompt_tokens / state.config.prompt_tokens_per_sec
+                time.sleep(prefill_seconds)
+
+                content = state.respond(system_prompt, user_prompt)
+                if request.get("stream", True):
+                    self._stream(model, content, prompt_tokens, started)
+                else:
+                    self._sleep_for_tokens(estimate_tokens(content))
+                    self._send_json(200, self._final_body(model, content, prompt_tokens, started))
+
+        def _sleep_for_tokens(self, tokens: int) -> None:
+            if state.config.tokens_per_sec > 0:
+                time.sleep(tokens / state.config.tokens_per_sec)
+
+        def _final_body(self, model: str, content: str, prompt_tokens: int, started: float) -> dict[str, Any]:
+            return {
+                "model": model,
+                "created_at": datetime.now(tz=timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": estimate_tokens(content),
+            }
+
+        def _stream(self, model: str, content: str, prompt_tokens: int, started: float) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            chunk_chars = STREAM_CHUNK_TOKENS * 4
+            for idx in range(0, len(content), chunk_chars):
+                piece = content[idx : idx + chunk_chars]
+                self._sleep_for_tokens(estimate_tokens(piece))
+                self._write_chunk(
+                    {
+                        "model": model,
+                        "created_at": datetime.now(tz=timezone.utc).isoformat(),
+                        "message": {"role": "assistant", "content": piece},
+                        "done": False,
+                    }
+                )
+
+            final = self._final_body(model, "", prompt_tokens, started)
+            final["eval_count"] = estimate_tokens(content)
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, body: dict[str, Any]) -> None:
+            line = (json.dumps(body) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+    return _Handler
+
+
+def start_fake_ollama(
+    config: FakeOllamaConfig | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[ThreadingHTTPServer, FakeOllamaState]:
+    state = FakeOllamaState(config or FakeOllamaConfig())
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server, state
+
+
+@contextmanager
+def running_fake_ollama(config: FakeOllamaConfig | None = None) -> Iterator[tuple[str, FakeOllamaState]]:
+    """Run a fake Ollama on an ephemeral port and yield its base URL and request counters."""
+    server, state = start_fake_ollama(config)
+    host, port = server.server_address[:2]
+    try:
+        yield f"http://{host}:{port}", state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Ollama /api/chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        latency_ms=args.latency_ms,
+        prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+        tokens_per_sec=args.tokens_per_sec,
+        malformed_rate=args.malformed_rate,
+        max_parallel=args.max_parallel,
+        seed=args.seed,
+    )
+    server, _state = start_fake_ollama(config, host=args.host, port=args.port)
+    print(f"[fake_ollama] serving on http://{args.host}:{server.server_address[1]}/api/chat")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,9 @@ from typing import Any, Callable
 from jsonschema import Draft202012Validator
 
 from app.config import ROOT_DIR
-from llm.ollama_client import call_ollama
+from app.metrics import LLM_JSON_FAILURES, LLM_JSON_RETRIES
+from llm.ollama_client import DEFAULT_NUM_PREDICT, DEFAULT_TEMPERATURE, call_ollama
+from llm.response_cache import compute_cache_key, get_cached_response, put_cached_response
 
 
 Validator = Callable[[dict[str, Any]], None]
@@ -21,6 +23,8 @@ def call_json_with_retry(
     user: str,
     schema_validator: Validator,
     max_retries: int = 2,
+    temperature: float = DEFAULT_TEMPERATURE,
+    num_predict: int = DEFAULT_NUM_PREDICT,
 ) -> dict[str, Any]:
     env_retries = os.getenv("OLLAMA_JSON_MAX_RETRIES")
     if env_retries:
@@ -30,10 +34,25 @@ def call_json_with_retry(
     prompt_user = user
 
     for attempt in range(max_retries):
-        text = call_ollama(model=model, system=system, user=prompt_user)
+        if attempt > 0:
+            LLM_JSON_RETRIES.inc()
+        cache_key = compute_cache_key(model, system, prompt_user, temperature, num_predict)
+        cached_text = get_cached_response(cache_key)
+        text = cached_text
+        if text is None:
+            text = call_ollama(
+                model=model,
+                system=system,
+                user=prompt_user,
+                temperature=temperature,
+                num_predict=num_predict,
+            )
         try:
             payload = json.loads(text)
             schema_validator(payload)
+            # Only responses that passed validation are cached, so a bad generation is never pinned.
+            if cached_text is None:
+                put_cached_response(cache_key, model, text)
             return payload
         except Exception as exc:  # noqa: BLE001
             last_error = str(exc)
@@ -50,6 +69,7 @@ def call_json_with_retry(
                 )
             time.sleep(0.2)
 
+    LLM_JSON_FAILURES.inc()
     raise ValueError(f"Invalid JSON after retries: {last_error}")
 
 
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import Any
 
 import requests
 
+from app.metrics import OLLAMA_SECONDS
+
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
@@ -36,15 +39,21 @@ def call_ollama(
             "num_predict": num_predict,
         },
     }
-    response = requests.post(
-        f"{OLLAMA_BASE_URL.rstrip('/')}/api/chat",
-        json=payload,
-        timeout=(connect_timeout_seconds, read_timeout_seconds),
-    )
-    response.raise_for_status()
-
-    body = response.json()
-    content = body.get("message", {}).get("content")
-    if not isinstance(content, str):
-        raise ValueError(f"Ollama response missing message.content: {body}")
-    return content
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = requests.post(
+            f"{OLLAMA_BASE_URL.rstrip('/')}/api/chat",
+            json=payload,
+            timeout=(connect_timeout_seconds, read_timeout_seconds),
+        )
+        response.raise_for_status()
+
+        body = response.json()
+        content = body.get("message", {}).get("content")
+        if not isinstance(content, str):
+            raise ValueError(f"Ollama response missing message.content: {body}")
+        outcome = "ok"
+        return content
+    finally:
+        OLLAMA_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
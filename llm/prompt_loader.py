@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+
+def load_prompt_sections(prompt_path: Path) -> tuple[str, str]:
+    """Split a prompt markdown file into its `## System` and `## User` sections."""
+    text = prompt_path.read_text(encoding="utf-8")
+    lines = text.splitlines()
+
+    current = None
+    system_lines: list[str] = []
+    user_lines: list[str] = []
+
+    for line in lines:
+        marker = line.strip().lower()
+        if marker == "## system":
+            current = "system"
+            continue
+        if marker == "## user":
+            current = "user"
+            continue
+
+        if current == "system":
+            system_lines.append(line)
+        elif current == "user":
+            user_lines.append(line)
+
+    system = "\n".join(system_lines).strip()
+    user = "\n".join(user_lines).strip()
+    if not system:
+        system = "You are an analyst assistant. Return strict JSON only."
+    if not user:
+        user = text.strip()
+    return system, user
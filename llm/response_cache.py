@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from pipeline.db import get_connection
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_STATS_LOCK = threading.Lock()
+_STATS: dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+# Hits are counted here and persisted in batches (flush_cache_hits) rather than with an UPDATE per hit. That per-hit
+# UPDATE took the database's write lock and changed its mtime, which invalidates the app's view and chart caches.
+_HITS_LOCK = threading.Lock()
+_PENDING_HITS: dict[str, tuple[int, datetime]] = {}
+
+
+def _bump(counter: str, amount: int = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[counter] += amount
+
+
+def cache_stats() -> dict[str, int]:
+    """Return in-process hit/miss counters for the LLM response cache."""
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def reset_cache_stats() -> None:
+    with _STATS_LOCK:
+        for key in _STATS:
+            _STATS[key] = 0
+
+
+def compute_cache_key(
+    model: str,
+    system: str,
+    user: str,
+    temperature: float,
+    num_predict: int,
+) -> str:
+    key_source = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "user": user,
+            "temperature": float(temperature),
+            "num_predict": int(num_predict),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+
+def _utc_now() -> datetime:
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
+
+
+def get_cached_response(cache_key: str) -> str | None:
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    try:
+        with get_connection() as conn:
+            row = conn.execute(
+                "SELECT response_text FROM llm_response_cache WHERE cache_key = ?",
+                [cache_key],
+            ).fetchone()
+    except Exception:  # noqa: BLE001
+        # The cache is an optimization; a locked or missing DB must never block an LLM call.
+        _bump("errors")
+        return None
+
+    if not row:
+        _bump("misses")
+        return None
+
+    with _HITS_LOCK:
+        count, _last_hit_at = _PENDING_HITS.get(cache_key, (0, None))
+        _PENDING_HITS[cache_key] = (count + 1, _utc_now())
+    _bump("hits")
+    return row[0]
+
+
+def _take_pending_hits() -> dict[str, tuple[int, datetime]]:
+    with _HITS_LOCK:
+        pending = dict(_PENDING_HITS)
+        _PENDING_HITS.clear()
+    return pending
+
+
+def _restore_pending_hits(pending: dict[str, tuple[int, datetime]]) -> None:
+    with _HITS_LOCK:
+        for cache_key, (count, last_hit_at) in pending.items():
+            newer_count, newer_hit_at = _PENDING_HITS.get(cache_key, (0, last_hit_at))
+            _PENDING_HITS[cache_key] = (count + newer_count, max(last_hit_at, newer_hit_at))
+
+
+def _write_hits(conn, pending: dict[str, tuple[int, datetime]]) -> None:
+    conn.executemany(
+        """
+        UPDATE llm_response_cache
+        SET hit_count = hit_count + ?, last_hit_at = ?
+        WHERE cache_key = ?
+        """,
+        [[count, last_hit_at, cache_key] for cache_key, (count, last_hit_at) in pending.items()],
+    )
+
+
+def flush_cache_hits() -> int:
+    """Persist hit counts and last_hit_at recorded since the last flush; returns the entries updated.
+
+    Stages call this once after their LLM pass; it also runs at exit and before every cache write.
+    """
+    pending = _take_pending_hits()
+    if not pending:
+        return 0
+    try:
+        with get_connection() as conn:
+            _write_hits(conn, pending)
+    except Exception:  # noqa: BLE001
+        _bump("errors")
+        _restore_pending_hits(pending)
+        return 0
+    return len(pending)
+
+
+atexit.register(flush_cache_hits)
+
+
+def _evict_to_budget(conn, max_bytes: int) -> int:
+    total_bytes = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_response_cache").fetchone()[0]
+    if total_bytes <= max_bytes:
+        return 0
+
+    # Least-recently-used first; drop entries until the cache fits the budget again.
+    evicted = conn.execute(
+        """
+        WITH ranked AS (
+            SELECT
+                cache_key,
+                SUM(size_bytes) OVER (
+                    ORDER BY COALESCE(last_hit_at, created_at) ASC, cache_key ASC
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS freed_bytes
+            FROM llm_response_cache
+        )
+        DELETE FROM llm_response_cache
+        WHERE cache_key IN (
+            SELECT cache_key FROM ranked WHERE freed_bytes - size_bytes < ?
+        )
+        RETURNING cache_key
+        """,
+        [int(total_bytes - max_bytes)],
+    ).fetchall()
+    return len(evicted)
+
+
+def put_cached_response(cache_key: str, model: str, response_text: str) -> None:
+    if not LLM_CACHE_ENABLED:
+        return
+
+    size_bytes = len(response_text.encode("utf-8"))
+    if size_bytes > LLM_CACHE_MAX_BYTES:
+        return
+
+    pending = _take_pending_hits()
+    try:
+        with get_connection() as conn:
+            # Already writing: persist pending hits first so eviction sees current recency.
+            if pending:
+                _write_hits(conn, pending)
+                pending = {}
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache (
+                    cache_key,
+                    model,
+                    response_text,
+                    size_bytes,
+                    hit_count,
+                    created_at,
+                    last_hit_at
+                ) VALUES (?, ?, ?, ?, 0, ?, NULL)
+                """,
+                [cache_key, model, response_text, size_bytes, _utc_now()],
+            )
+            evicted = _evict_to_budget(conn, LLM_CACHE_MAX_BYTES)
+    except Exception:  # noqa: BLE001
+        _bump("errors")
+        _restore_pending_hits(pending)
+        return
+
+    _bump("writes")
+    if evicted:
+        _bump("evictions", evicted)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import math
+
+
+# Llama-family tokenizers average roughly four characters of English text per token.
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, tokenizer-free token estimate used for prompt budgeting."""
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
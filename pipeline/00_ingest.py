@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import glob
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
@@ -8,7 +11,8 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
 
 
 CSV_FILES: tuple[tuple[str, Path], ...] = (
@@ -16,6 +20,29 @@ CSV_FILES: tuple[tuple[str, Path], ...] = (
     ("bad", Path("data/converted_reviews_bad.csv")),
     ("good", Path("data/converted_reviews_good.csv")),
 )
+# Canonical drop folder (app.config.INPUT_CSV_PATH lives here); used instead of the files above once it has data.
+INPUT_DIR = Path("data/input")
+
+# os.pathsep-separated override, e.g. for benchmarking against synthetic corpora. Entries may be files, directories
+# (searched recursively) or globs such as "exports/2024-*/*.csv.gz". Besides CSV, files may be Parquet,
+# Arrow IPC/Feather or NDJSON; CSV and NDJSON may be gzip- or zstd-compressed.
+INGEST_FILES_OVERRIDE = os.getenv("INGEST_CSV_FILES", "")
+if INGEST_FILES_OVERRIDE.strip():
+    CSV_FILES = tuple(
+        (Path(entry).name.split(".", 1)[0], Path(entry)) for entry in INGEST_FILES_OVERRIDE.split(os.pathsep) if entry.strip()
+    )
+elif INPUT_DIR.is_dir() and any(not entry.name.startswith(".") for entry in INPUT_DIR.iterdir()):
+    CSV_FILES = (("input", INPUT_DIR),)
+
+# Threads resolving per-file schemas; the scans themselves are parallelised by DuckDB.
+INGEST_WORKERS = max(1, int(os.getenv("INGEST_WORKERS", str(min(8, os.cpu_count() or 1)))))
+
+# Optional DuckDB memory_limit for the ingest connection, e.g. "2GB" on small hosts.
+INGEST_MEMORY_LIMIT = os.getenv("INGEST_MEMORY_LIMIT", "").strip()
+
+# Opt-in: rewrite reviews_raw in at_ts order after each ingest. The rewrite costs the whole table, not the batch, and
+# the app reads the already sorted reviews_wide; run `00_ingest.py --cluster` as occasional maintenance instead.
+INGEST_CLUSTER = os.getenv("INGEST_CLUSTER", "0").strip().lower() in {"1", "true", "yes", "on"}
 
 TARGET_COLUMNS: tuple[str, ...] = (
     "review_id",
@@ -29,6 +56,13 @@ TARGET_COLUMNS: tuple[str, ...] = (
     "category_raw",
 )
 
+# Stored reviews_raw columns derived from at_ts, so grouping by day or week reads a column instead of
+# casting every timestamp.
+DERIVED_COLUMNS: dict[str, str] = {
+    "day": "CAST(at_ts AS DATE)",
+    "week": "CAST(date_trunc('week', at_ts) AS DATE)",
+}
+
 # canonical_target -> acceptable source header variants
 COLUMN_ALIASES: dict[str, tuple[str, ...]] = {
     "review_id": ("reviewId", "review_id", "id", "reviewid"),
@@ -79,115 +113,277 @@ def _resolve_mapping(headers: Iterable[str]) -> dict[str, str]:
     return resolved
 
 
-def _build_stage_select(mapping: dict[str, str]) -> str:
-    at_source = mapping["at_ts"]
-
+# DuckDB type of each reviews_raw column; source columns that already have it are read as-is.
+TARGET_TYPES: dict[str, str] = {
+    "review_id": "VARCHAR",
+    "user_name": "VARCHAR",
+    "content": "VARCHAR",
+    "score": "INTEGER",
+    "thumbs_up": "INTEGER",
+    "review_created_version": "VARCHAR",
+    "at_ts": "TIMESTAMP",
+    "app_version": "VARCHAR",
+    "category_raw": "VARCHAR",
+}
+AT_TS_FORMATS: tuple[str, ...] = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+CSV_SUFFIXES = {".csv", ".tsv", ".txt"}
+NDJSON_SUFFIXES = {".ndjson", ".jsonl", ".json"}
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+COMPRESSION_SUFFIXES = {".gz", ".gzip", ".zst", ".zstd"}
+
+
+def _input_format(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] in COMPRESSION_SUFFIXES:
+        # DuckDB's CSV and JSON readers decompress gzip/zstd from the file extension.
+        suffixes = suffixes[:-1]
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    if suffix in NDJSON_SUFFIXES:
+        return "ndjson"
+    if suffix in CSV_SUFFIXES:
+        return "csv"
+    raise ValueError(f"Unsupported input format: {path.name}")
+
+
+def _is_input_file(path: Path) -> bool:
+    if not path.is_file() or path.name.startswith("."):
+        return False
+    try:
+        _input_format(path)
+    except ValueError:
+        return False
+    return True
+
+
+def _expand_inputs(entries: Iterable[tuple[str, Path]]) -> list[tuple[str, Path]]:
+    """Expand directories and globs into (label, file) pairs; plain paths are kept as given."""
+    files: list[tuple[str, Path]] = []
+    for label, entry in entries:
+        if glob.has_magic(str(entry)):
+            matches = [path for path in map(Path, sorted(glob.glob(str(entry), recursive=True))) if path.is_file()]
+        elif entry.is_dir():
+            matches = sorted(path for path in entry.rglob("*") if _is_input_file(path))
+        elif entry.exists():
+            matches = [entry]
+        else:
+            raise FileNotFoundError(f"Input file not found: {entry}")
+        if not matches:
+            raise FileNotFoundError(f"No input files found for {entry}")
+        files.extend((label, path) for path in matches)
+    return files
+
+
+def _source_relation(conn, paths: list[Path], view_name: str) -> str:
+    """Expose same-format `paths` to SQL as one relation without loading them."""
+    input_format = _input_format(paths[0])
+    literal = "[" + ", ".join("'" + str(path).replace("'", "''") + "'" for path in paths) + "]"
+    if input_format == "parquet":
+        return f"read_parquet({literal})"
+    if input_format == "ndjson":
+        return f"read_json({literal}, format='newline_delimited')"
+    if input_format == "csv":
+        # CSV carries no types; read text and let _column_expr parse it as before.
+        return f"read_csv({literal}, header=true, all_varchar=true)"
+
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("Arrow IPC input requires pyarrow: pip install pyarrow") from exc
+    # Memory-mapped, so read_all() is zero-copy and DuckDB only touches the projected columns' buffers;
+    # concat_tables keeps the chunks rather than copying them.
+    tables = [ipc.open_file(pa.memory_map(str(path))).read_all() for path in paths]
+    conn.register(view_name, tables[0] if len(tables) == 1 else pa.concat_tables(tables))
+    return view_name
+
+
+def _describe(conn, relation: str) -> dict[str, str]:
+    return {row[0]: row[1] for row in conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+
+
+def _column_expr(source: str, source_type: str, target: str) -> str:
+    column = _q(source)
+    target_type = TARGET_TYPES[target]
+    if source_type != "VARCHAR":
+        if target == "at_ts" and source_type == "TIMESTAMP WITH TIME ZONE":
+            return f"timezone('UTC', {column})"
+        return f"TRY_CAST({column} AS {target_type})"
+
+    text = f"NULLIF(TRIM({column}), '')"
+    if target == "at_ts":
+        return "COALESCE(" + ", ".join(f"TRY_STRPTIME({text}, '{fmt}')" for fmt in AT_TS_FORMATS) + ")"
+    if target_type == "VARCHAR":
+        return f"CAST({text} AS VARCHAR)"
+    return f"TRY_CAST({text} AS {target_type})"
+
+
+def _build_stage_select(mapping: dict[str, str], column_types: dict[str, str], relation: str) -> str:
+    """Project only the mapped source columns, converted to reviews_raw types."""
+    columns = ",\n            ".join(
+        f"{_column_expr(mapping[target], column_types[mapping[target]], target)} AS {target}" for target in TARGET_COLUMNS
+    )
     return f"""
         SELECT
-            CAST(NULLIF(TRIM({_q(mapping['review_id'])}), '') AS VARCHAR) AS review_id,
-            CAST(NULLIF(TRIM({_q(mapping['user_name'])}), '') AS VARCHAR) AS user_name,
-            CAST(NULLIF(TRIM({_q(mapping['content'])}), '') AS VARCHAR) AS content,
-            TRY_CAST(NULLIF(TRIM({_q(mapping['score'])}), '') AS INTEGER) AS score,
-            TRY_CAST(NULLIF(TRIM({_q(mapping['thumbs_up'])}), '') AS INTEGER) AS thumbs_up,
-            CAST(NULLIF(TRIM({_q(mapping['review_created_version'])}), '') AS VARCHAR) AS review_created_version,
-            COALESCE(
-                TRY_STRPTIME(NULLIF(TRIM({_q(at_source)}), ''), '%Y-%m-%d %H:%M:%S'),
-                TRY_STRPTIME(NULLIF(TRIM({_q(at_source)}), ''), '%Y-%m-%d %H:%M'),
-                TRY_STRPTIME(NULLIF(TRIM({_q(at_source)}), ''), '%Y-%m-%d')
-            ) AS at_ts,
-            CAST(NULLIF(TRIM({_q(mapping['app_version'])}), '') AS VARCHAR) AS app_version,
-            CAST(NULLIF(TRIM({_q(mapping['category_raw'])}), '') AS VARCHAR) AS category_raw
-        FROM src
+            {columns}
+        FROM {relation}
     """
 
 
-def _load_file(conn, label: str, csv_path: Path) -> int:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV not found: {csv_path}")
+# (input format, ((column, DuckDB type), ...)): files sharing one are read by a single multi-file scan.
+SchemaKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def _file_schema(conn, path: Path) -> SchemaKey:
+    """(format, column types) of one input; runs on its own cursor so files can be described in parallel."""
+    cursor = conn.cursor()
+    try:
+        relation = _source_relation(cursor, [path], "src_probe")
+        return _input_format(path), tuple(_describe(cursor, relation).items())
+    finally:
+        cursor.close()
 
-    conn.execute("DROP TABLE IF EXISTS src")
-    conn.execute(
-        "CREATE TEMP TABLE src AS SELECT * FROM read_csv_auto(?, header=true, all_varchar=true)",
-        [str(csv_path)],
-    )
 
-    headers = [row[0] for row in conn.execute("DESCRIBE src").fetchall()]
-    mapping = _resolve_mapping(headers)
+def _group_inputs(conn, files: list[tuple[str, Path]]) -> dict[SchemaKey, list[tuple[str, Path]]]:
+    """Describe every input in parallel and group them by format and schema, keeping file order."""
+    with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as pool:
+        schemas = list(pool.map(lambda item: _file_schema(conn, item[1]), files))
+
+    groups: dict[SchemaKey, list[tuple[str, Path]]] = {}
+    for item, schema in zip(files, schemas):
+        groups.setdefault(schema, []).append(item)
+    return groups
+
+
+def _group_select(conn, key: SchemaKey, members: list[tuple[str, Path]], view_name: str) -> str:
+    """Resolve one schema group's header mapping and return its typed SELECT (nothing is read yet)."""
+    input_format, schema = key
+    column_types = dict(schema)
+    mapping = _resolve_mapping(column_types)
+    relation = _source_relation(conn, [path for _, path in members], view_name)
+    labels = list(dict.fromkeys(label for label, _ in members))
+    label_log = ", ".join(labels[:3]) + (f" +{len(labels) - 3} more" if len(labels) > 3 else "")
     mapping_log = ", ".join(f"{src}->{dst}" for dst, src in mapping.items())
-    print(f"Mapping {label}: {mapping_log}")
+    print(f"Mapping {label_log} ({input_format}, {len(members)} file(s)): {mapping_log}")
+    return _build_stage_select(mapping, column_types, relation)
 
-    conn.execute("DROP TABLE IF EXISTS stage_file")
-    conn.execute(f"CREATE TEMP TABLE stage_file AS {_build_stage_select(mapping)}")
 
-    row_count = conn.execute("SELECT COUNT(*) FROM stage_file").fetchone()[0]
-    print(f"Loaded {label}: {row_count} rows")
+def _build_ingest_sql(file_selects: list[str], returning: bool = False) -> str:
+    """One INSERT over every input: rows stream from the readers through the dedup window into reviews_raw.
 
-    conn.execute("INSERT INTO stage_all SELECT * FROM stage_file")
+    With `returning`, the statement yields the written review ids instead of a row count.
+    """
+    sources = "\n        UNION ALL\n".join(file_selects)
+    derived = ", ".join(f"{expr} AS {column}" for column, expr in DERIVED_COLUMNS.items())
+    return f"""
+        INSERT OR REPLACE INTO reviews_raw ({', '.join((*TARGET_COLUMNS, *DERIVED_COLUMNS))})
+        SELECT {', '.join(TARGET_COLUMNS)}, {derived}
+        FROM (
+            {sources}
+        ) AS src
+        WHERE review_id IS NOT NULL
+            -- Across runs too the latest version wins, whatever order the files arrive in.
+            AND NOT EXISTS (
+                SELECT 1 FROM reviews_raw AS cur WHERE cur.review_id = src.review_id AND cur.at_ts > src.at_ts
+            )
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY review_id ORDER BY at_ts DESC NULLS LAST) = 1
+        {"RETURNING review_id" if returning else ""}
+    """
+
+
+def _cluster_reviews(conn) -> int:
+    """Rebuild reviews_raw sorted by at_ts and swap it in, keeping the table's DDL and constraints."""
+    ddl = conn.execute(
+        "SELECT sql FROM duckdb_tables() WHERE schema_name = 'main' AND table_name = 'reviews_raw'"
+    ).fetchone()[0]
+    conn.execute("DROP TABLE IF EXISTS reviews_raw_clustered")
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(ddl.replace("reviews_raw", "reviews_raw_clustered", 1))
+        row_count = conn.execute(
+            "INSERT INTO reviews_raw_clustered SELECT * FROM reviews_raw ORDER BY at_ts NULLS LAST, review_id"
+        ).fetchone()[0]
+        conn.execute("DROP TABLE reviews_raw")
+        conn.execute("ALTER TABLE reviews_raw_clustered RENAME TO reviews_raw")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
     return row_count
 
 
-def main() -> None:
-    run_migrations()
-
-    with get_connection() as conn:
-        conn.execute("DROP TABLE IF EXISTS stage_all")
-        conn.execute(
-            """
-            CREATE TEMP TABLE stage_all (
-                review_id VARCHAR,
-                user_name VARCHAR,
-                content VARCHAR,
-                score INTEGER,
-                thumbs_up INTEGER,
-                review_created_version VARCHAR,
-                at_ts TIMESTAMP,
-                app_version VARCHAR,
-                category_raw VARCHAR
+def main(
+    inputs: Iterable[tuple[str, Path]] | None = None, return_ids: bool = False, cluster: bool = INGEST_CLUSTER
+) -> list[str]:
+    """Ingest `inputs` ((label, file/directory/glob) pairs, default CSV_FILES); returns the review ids if asked.
+
+    With `cluster`, reviews_raw is rewritten in at_ts order afterwards (see INGEST_CLUSTER).
+    """
+    review_ids: list[str] = []
+    with stage_run("00_ingest") as run:
+        check_schema()
+
+        with get_connection() as conn:
+            # Lets DuckDB stream the scans in parallel without buffering rows to keep file order.
+            conn.execute("SET preserve_insertion_order = false")
+            if INGEST_MEMORY_LIMIT:
+                # Above this DuckDB spills the dedup window to <database>.tmp instead of growing.
+                conn.execute(f"SET memory_limit = '{INGEST_MEMORY_LIMIT}'")
+
+            arrow_views: list[str] = []
+            try:
+                with run.step("fetch"):
+                    files = _expand_inputs(CSV_FILES if inputs is None else inputs)
+                    groups = _group_inputs(conn, files)
+                    file_selects = []
+                    for idx, (key, members) in enumerate(groups.items()):
+                        view_name = f"src_arrow_{idx}"
+                        file_selects.append(_group_select(conn, key, members, view_name))
+                        if key[0] == "arrow":
+                            arrow_views.append(view_name)
+
+                with run.step("writeback") as step:
+                    if return_ids:
+                        review_ids = [row[0] for row in conn.execute(_build_ingest_sql(file_selects, True)).fetchall()]
+                        inserted_count = len(review_ids)
+                    else:
+                        inserted_count = conn.execute(_build_ingest_sql(file_selects)).fetchone()[0]
+                    step.record(rows_written=inserted_count)
+            finally:
+                for view_name in arrow_views:
+                    conn.unregister(view_name)
+
+            if cluster and inserted_count:
+                with run.step("cluster") as step:
+                    # The ORDER BY must survive into the new table's row groups.
+                    conn.execute("SET preserve_insertion_order = true")
+                    step.record(rows_written=_cluster_reviews(conn))
+
+            print(
+                f"Inserted into reviews_raw: {inserted_count} "
+                f"(deduplicated by review_id across {len(files)} files in {len(groups)} scans)"
             )
-            """
-        )
-
-        for label, csv_path in CSV_FILES:
-            _load_file(conn, label, csv_path)
-
-        combined_count = conn.execute("SELECT COUNT(*) FROM stage_all").fetchone()[0]
-        print(f"Combined: {combined_count}")
-
-        conn.execute("DROP TABLE IF EXISTS stage_deduped")
-        conn.execute(
-            """
-            CREATE TEMP TABLE stage_deduped AS
-            SELECT
-                review_id,
-                user_name,
-                content,
-                score,
-                thumbs_up,
-                review_created_version,
-                at_ts,
-                app_version,
-                category_raw
-            FROM (
-                SELECT
-                    *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY review_id
-                        ORDER BY at_ts DESC NULLS LAST
-                    ) AS rn
-                FROM stage_all
-                WHERE review_id IS NOT NULL
-            ) t
-            WHERE rn = 1
-            """
-        )
-
-        deduped_count = conn.execute("SELECT COUNT(*) FROM stage_deduped").fetchone()[0]
-        deduped_out = combined_count - deduped_count
-        print(f"Deduped: {combined_count} - {deduped_out} = {deduped_count}")
-
-        conn.execute(f"INSERT OR REPLACE INTO reviews_raw ({', '.join(TARGET_COLUMNS)}) SELECT {', '.join(TARGET_COLUMNS)} FROM stage_deduped")
-        print(f"Inserted into reviews_raw: {deduped_count}")
+    return review_ids
+
+
+def cluster_main() -> None:
+    """Maintenance: rebuild reviews_raw in at_ts order without ingesting anything."""
+    with stage_run("00_ingest") as run:
+        check_schema()
+        with get_connection() as conn, run.step("cluster") as step:
+            conn.execute("SET preserve_insertion_order = true")
+            row_count = _cluster_reviews(conn)
+            step.record(rows_written=row_count)
+    print(f"Clustered reviews_raw by at_ts: {row_count} rows")
 
 
 if __name__ == "__main__":
-    main()
+    if "--cluster" in sys.argv[1:]:
+        cluster_main()
+    else:
+        main()
@@ -1,14 +1,39 @@
 from __future__ import annotations
 
+import json
+import os
 import re
 import sys
 from pathlib import Path
+from typing import Any
 
 if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm.batching import chunked, run_batches
+from llm.json_enforcer import Validator, build_jsonschema_validator, call_json_with_retry, load_json_schema
+from llm.ollama_client import DEFAULT_MODEL
+from llm.prompt_loader import load_prompt_sections
+from llm.response_cache import flush_cache_hits
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.incremental import review_scope
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROMPT_PATH = ROOT_DIR / "llm" / "prompts" / "sentiment_adjudicator.md"
+SCHEMA_PATH = ROOT_DIR / "llm" / "schemas" / "sentiment_batch.schema.json"
+
+# LLM adjudication is opt-in so the deterministic pipeline still runs without Ollama.
+LLM_ADJUDICATION_ENABLED = os.getenv("SENTIMENT_LLM_ADJUDICATION", "0").strip().lower() in {"1", "true", "yes", "on"}
+LLM_BATCH_SIZE = int(os.getenv("SENTIMENT_LLM_BATCH_SIZE", "20"))
+LLM_CONCURRENCY = int(os.getenv("SENTIMENT_LLM_CONCURRENCY", "4"))
+LLM_CONFIDENCE_THRESHOLD = 0.70
+LLM_MAX_REVIEW_CHARS = 400
+LLM_TOKENS_PER_RESULT = 32
+SHORT_CONTENT_MAX_TOKENS = 3
+DISAGREEMENT_PENALTY = 0.15
 
 POSITIVE_WORDS: tuple[str, ...] = (
     "great",
@@ -109,50 +134,177 @@ def _classify_sentiment(content: str | None, score: int | None) -> tuple[str, fl
     return label, confidence
 
 
-def main() -> None:
-    run_migrations()
-
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT review_id, content, score, thumbs_up, category_raw, app_version, at_ts
-            FROM reviews_raw
-            """
-        ).fetchall()
-
-        updates: list[tuple[str, float, str]] = []
-        for review_id, content, score, _thumbs_up, _category_raw, _app_version, _at_ts in rows:
-            label, confidence = _classify_sentiment(content, score)
-            updates.append((label, confidence, review_id))
-
-        if updates:
-            conn.executemany(
-                """
-                UPDATE reviews_enriched
-                SET
-                    sentiment_label = ?,
-                    sentiment_confidence = ?,
-                    sentiment_method = 'rule',
-                    processed_at = CURRENT_TIMESTAMP
-                WHERE review_id = ?
-                """,
-                updates,
-            )
-
-        enriched = conn.execute(
-            """
-            SELECT
-                COUNT(*) AS total,
-                SUM(CASE WHEN sentiment_method = 'rule' THEN 1 ELSE 0 END) AS rule_rows,
-                SUM(CASE WHEN sentiment_label = 'negative' THEN 1 ELSE 0 END) AS neg_rows
-            FROM reviews_enriched
-            """
-        ).fetchone()
-
-    print(
-        "[02_enrich_sentiment] completed: "
-        f"rows={enriched[0]}, rule_rows={enriched[1]}, negative_rows={enriched[2]}"
+def _needs_adjudication(content: str | None, score: int | None, confidence: float) -> bool:
+    if confidence < LLM_CONFIDENCE_THRESHOLD:
+        return True
+
+    text = (content or "").strip()
+    prior = _rating_prior(score)
+    if prior * _lexicon_score(text) < 0:
+        # Rating and text pull in opposite directions.
+        return True
+
+    return score in {1, 5} and len(WORD_RE.findall(text.lower())) <= SHORT_CONTENT_MAX_TOKENS
+
+
+def _combine_with_llm(
+    rule_label: str,
+    rule_confidence: float,
+    llm_label: str,
+    llm_confidence: float,
+) -> tuple[str, float]:
+    confidence = max(rule_confidence, llm_confidence)
+    if llm_label != rule_label:
+        confidence -= DISAGREEMENT_PENALTY
+    return llm_label, _clamp(confidence, 0.0, 0.99)
+
+
+def _adjudicate_batch(
+    batch: list[tuple[str, str | None, int | None, str, float]],
+    system_prompt: str,
+    user_prompt_template: str,
+    schema_validator: Validator,
+) -> list[tuple[str, float, str]]:
+    reviews = [
+        {
+            "review_id": review_id,
+            "rating": score,
+            "text": (content or "")[:LLM_MAX_REVIEW_CHARS],
+        }
+        for review_id, content, score, _label, _confidence in batch
+    ]
+    expected_ids = {review["review_id"] for review in reviews}
+
+    def _validate(payload: dict[str, Any]) -> None:
+        schema_validator(payload)
+        returned_ids = {item["review_id"] for item in payload["results"]}
+        missing = expected_ids - returned_ids
+        if missing:
+            raise ValueError(f"Missing results for review_ids: {', '.join(sorted(missing))}")
+
+    input_json = json.dumps({"reviews": reviews}, separators=(",", ":"), ensure_ascii=True)
+    payload = call_json_with_retry(
+        model=DEFAULT_MODEL,
+        system=system_prompt,
+        user=user_prompt_template.replace("{{input_json}}", input_json),
+        schema_validator=_validate,
+        num_predict=64 + LLM_TOKENS_PER_RESULT * len(reviews),
+    )
+
+    llm_results = {
+        item["review_id"]: (item["sentiment_label"], float(item["confidence"]))
+        for item in payload["results"]
+        if item["review_id"] in expected_ids
+    }
+
+    updates: list[tuple[str, float, str]] = []
+    for review_id, _content, _score, rule_label, rule_confidence in batch:
+        llm_label, llm_confidence = llm_results[review_id]
+        label, confidence = _combine_with_llm(rule_label, rule_confidence, llm_label, llm_confidence)
+        updates.append((label, confidence, review_id))
+    return updates
+
+
+def _run_llm_adjudication(
+    candidates: list[tuple[str, str | None, int | None, str, float]],
+) -> tuple[list[tuple[str, float, str]], int]:
+    system_prompt, user_prompt_template = load_prompt_sections(PROMPT_PATH)
+    schema_validator = build_jsonschema_validator(load_json_schema(SCHEMA_PATH))
+
+    results, failures = run_batches(
+        chunked(candidates, LLM_BATCH_SIZE),
+        lambda batch: _adjudicate_batch(batch, system_prompt, user_prompt_template, schema_validator),
+        concurrency=LLM_CONCURRENCY,
     )
+    for batch, exc in failures[:3]:
+        print(f"[02_enrich_sentiment] adjudication batch failed ({len(batch)} rows kept as rule): {exc}")
+
+    return [update for batch_updates in results for update in batch_updates], len(failures)
+
+
+def main(review_ids: list[str] | None = None) -> None:
+    with stage_run("02_enrich_sentiment") as run:
+        check_schema()
+
+        candidates: list[tuple[str, str | None, int | None, str, float]] = []
+        with get_connection() as conn:
+            with run.step("fetch") as step:
+                scope = review_scope(conn, review_ids)
+                rows = conn.execute(
+                    f"""
+                    SELECT review_id, content, score, thumbs_up, category_raw, app_version, at_ts
+                    FROM reviews_raw
+                    WHERE {scope}
+                    """
+                ).fetchall()
+                step.record(rows_read=len(rows))
+
+            with run.step("classify"):
+                updates: list[tuple[str, float, str]] = []
+                for review_id, content, score, _thumbs_up, _category_raw, _app_version, _at_ts in rows:
+                    label, confidence = _classify_sentiment(content, score)
+                    updates.append((label, confidence, review_id))
+                    if LLM_ADJUDICATION_ENABLED and _needs_adjudication(content, score, confidence):
+                        candidates.append((review_id, content, score, label, confidence))
+
+            with run.step("writeback") as step:
+                if updates:
+                    conn.executemany(
+                        """
+                        UPDATE reviews_enriched
+                        SET
+                            sentiment_label = ?,
+                            sentiment_confidence = ?,
+                            sentiment_method = 'rule',
+                            processed_at = CURRENT_TIMESTAMP
+                        WHERE review_id = ?
+                        """,
+                        updates,
+                    )
+                step.record(rows_written=len(updates))
+
+        # The LLM pass runs with no stage connection open; only the response cache touches the DB meanwhile.
+        hybrid_updates: list[tuple[str, float, str]] = []
+        failed_batches = 0
+        if candidates:
+            with run.step("llm_adjudication"):
+                hybrid_updates, failed_batches = _run_llm_adjudication(candidates)
+                flush_cache_hits()
+
+        with get_connection() as conn:
+            if hybrid_updates:
+                with run.step("llm_writeback") as step:
+                    conn.executemany(
+                        """
+                        UPDATE reviews_enriched
+                        SET
+                            sentiment_label = ?,
+                            sentiment_confidence = ?,
+                            sentiment_method = 'hybrid',
+                            processed_at = CURRENT_TIMESTAMP
+                        WHERE review_id = ?
+                        """,
+                        hybrid_updates,
+                    )
+                    step.record(rows_written=len(hybrid_updates))
+
+            with run.step("summary"):
+                enriched = conn.execute(
+                    """
+                    SELECT
+                        COUNT(*) AS total,
+                        SUM(CASE WHEN sentiment_method = 'rule' THEN 1 ELSE 0 END) AS rule_rows,
+                        SUM(CASE WHEN sentiment_method = 'hybrid' THEN 1 ELSE 0 END) AS hybrid_rows,
+                        SUM(CASE WHEN sentiment_label = 'negative' THEN 1 ELSE 0 END) AS neg_rows
+                    FROM reviews_enriched
+                    """
+                ).fetchone()
+
+        print(
+            "[02_enrich_sentiment] completed: "
+            f"rows={enriched[0]}, rule_rows={enriched[1]}, hybrid_rows={enriched[2]}, negative_rows={enriched[3]}, "
+            f"llm_candidates={len(candidates)}, llm_failed_batches={failed_batches}"
+        )
 
 
 if __name__ == "__main__":
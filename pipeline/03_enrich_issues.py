@@ -1,16 +1,44 @@
 from __future__ import annotations
 
 import json
+import math
+import os
 import re
 import sys
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm.batching import chunked, run_batches
+from llm.json_enforcer import build_jsonschema_validator, call_json_with_retry, load_json_schema
+from llm.ollama_client import DEFAULT_MODEL
+from llm.prompt_loader import load_prompt_sections
+from llm.response_cache import flush_cache_hits
+from llm.token_budget import estimate_tokens
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.incremental import review_scope
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROMPT_PATH = ROOT_DIR / "llm" / "prompts" / "issues_multilabel.md"
+BATCH_SCHEMA_PATH = ROOT_DIR / "llm" / "schemas" / "issues_batch.schema.json"
+ISSUES_SCHEMA_PATH = ROOT_DIR / "llm" / "schemas" / "issues.schema.json"
+
+# The LLM pass is opt-in so the deterministic pipeline still runs without Ollama.
+LLM_PASS_ENABLED = os.getenv("ISSUES_LLM_ENABLED", "0").strip().lower() in {"1", "true", "yes", "on"}
+LLM_TOKEN_BUDGET = int(os.getenv("ISSUES_LLM_TOKEN_BUDGET", "250000"))
+LLM_BATCH_SIZE = int(os.getenv("ISSUES_LLM_BATCH_SIZE", "15"))
+LLM_CONCURRENCY = int(os.getenv("ISSUES_LLM_CONCURRENCY", "4"))
+LLM_MAX_ATTEMPTS = 3
+LLM_MAX_REVIEW_CHARS = 500
+LLM_TOKENS_PER_RESULT = 48
+LLM_TOKENS_PER_REVIEW_OVERHEAD = 24
+MAX_RULE_LABELS = 4
 
 
 @dataclass(frozen=True)
@@ -156,6 +184,22 @@ ISSUE_RULES: tuple[IssueRule, ...] = (
     ),
 )
 
+# category_raw -> issue labels that are consistent with it; unlisted categories never conflict.
+CATEGORY_EXPECTED_LABELS: dict[str, frozenset[str]] = {
+    "customer_support": frozenset({"Customer Support"}),
+    "money_transfers": frozenset({"Transaction Failure"}),
+    "bill_payments": frozenset({"Transaction Failure"}),
+    "mobile_deposit": frozenset({"Transaction Failure"}),
+    "card_management": frozenset({"Transaction Failure", "Policy Complaints"}),
+    "login": frozenset({"Login/Auth Issues"}),
+    "authentication": frozenset({"Login/Auth Issues"}),
+    "security": frozenset({"Login/Auth Issues"}),
+    "performance": frozenset({"Performance Issues", "Glitches/Bugs"}),
+    "crash": frozenset({"Glitches/Bugs", "Performance Issues"}),
+}
+
+ALLOWED_LABELS: tuple[str, ...] = tuple(rule.label for rule in ISSUE_RULES)
+
 NEAR_FAILURE_RE = re.compile(r"\b(can't|cant|cannot|failed|failure|error)\b", flags=re.IGNORECASE)
 
 
@@ -246,50 +290,291 @@ def _classify_issues(content: str | None) -> list[dict[str, object]]:
     return found
 
 
-def main() -> None:
-    run_migrations()
+def _llm_pass_reason(issues: list[dict[str, object]], category_raw: str | None) -> str | None:
+    if not issues:
+        return "no_labels"
+    if len(issues) > MAX_RULE_LABELS:
+        return "too_many_labels"
+
+    expected = CATEGORY_EXPECTED_LABELS.get((category_raw or "").strip().lower())
+    if expected and not any(issue["label"] in expected for issue in issues):
+        return "category_conflict"
+    return None
+
+
+def _estimate_review_tokens(content: str | None) -> int:
+    text = (content or "")[:LLM_MAX_REVIEW_CHARS]
+    return estimate_tokens(text) + LLM_TOKENS_PER_REVIEW_OVERHEAD + LLM_TOKENS_PER_RESULT
+
+
+def _enqueue_candidates(conn, candidates: list[tuple[str, str, int]]) -> None:
+    if not candidates:
+        return
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO issue_llm_queue (
+            review_id,
+            reason,
+            status,
+            attempts,
+            est_tokens,
+            result_json,
+            last_error,
+            enqueued_at,
+            updated_at
+        ) VALUES (?, ?, 'pending', 0, ?, NULL, NULL, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        """,
+        candidates,
+    )
 
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT review_id, content
-            FROM reviews_raw
-            """
-        ).fetchall()
-
-        updates: list[tuple[str, str]] = []
-        for review_id, content in rows:
-            issues = _classify_issues(content)
-            issues_json = json.dumps(issues if issues else [], ensure_ascii=True)
-            updates.append((issues_json, review_id))
-
-        if updates:
-            conn.executemany(
-                """
-                UPDATE reviews_enriched
-                SET
-                    issues_json = ?,
-                    issues_method = 'rule',
-                    processed_at = CURRENT_TIMESTAMP
-                WHERE review_id = ?
-                """,
-                updates,
-            )
-
-        summary = conn.execute(
-            """
-            SELECT
-                COUNT(*) AS total,
-                SUM(CASE WHEN issues_method = 'rule' THEN 1 ELSE 0 END) AS rule_rows,
-                SUM(CASE WHEN COALESCE(issues_json, '[]') <> '[]' THEN 1 ELSE 0 END) AS issue_rows
-            FROM reviews_enriched
-            """
-        ).fetchone()
-
-    print(
-        "[03_enrich_issues] completed: "
-        f"rows={summary[0]}, rule_rows={summary[1]}, rows_with_issues={summary[2]}"
+
+def _apply_done_results(conn) -> None:
+    # Re-applied after every rule pass so hybrid labels survive reruns without new LLM calls.
+    conn.execute(
+        """
+        UPDATE reviews_enriched AS e
+        SET
+            issues_json = q.result_json,
+            issues_method = 'hybrid',
+            processed_at = CURRENT_TIMESTAMP
+        FROM issue_llm_queue AS q
+        WHERE e.review_id = q.review_id
+          AND q.status = 'done'
+          AND q.result_json IS NOT NULL
+        """
+    )
+
+
+def _select_budgeted_work(
+    conn,
+    token_budget: int,
+    scaffold_tokens_per_review: int,
+) -> list[tuple[str, str | None, str | None]]:
+    pending = conn.execute(
+        """
+        SELECT q.review_id, q.est_tokens, r.content, r.category_raw
+        FROM issue_llm_queue q
+        JOIN reviews_raw r USING (review_id)
+        WHERE q.status = 'pending'
+        ORDER BY q.enqueued_at, q.review_id
+        """
+    ).fetchall()
+
+    work: list[tuple[str, str | None, str | None]] = []
+    spent = 0
+    for review_id, est_tokens, content, category_raw in pending:
+        cost = int(est_tokens or _estimate_review_tokens(content)) + scaffold_tokens_per_review
+        if spent + cost > token_budget:
+            break
+        spent += cost
+        work.append((review_id, content, category_raw))
+    return work
+
+
+def _normalize_llm_issues(raw_issues: list[dict[str, Any]]) -> list[dict[str, object]]:
+    allowed = {label.lower(): label for label in ALLOWED_LABELS}
+    merged: dict[str, dict[str, object]] = {}
+    for item in raw_issues:
+        label = allowed.get(str(item["label"]).strip().lower())
+        if label is None:
+            continue
+        evidence = item.get("evidence") if isinstance(item.get("evidence"), list) else []
+        confidence = round(min(1.0, max(0.0, float(item["confidence"]))), 2)
+        current = merged.get(label)
+        if current is None or confidence > float(current["confidence"]):
+            merged[label] = {
+                "label": label,
+                "confidence": confidence,
+                "evidence": _dedupe_preserve_order([str(e) for e in evidence if str(e).strip()]),
+            }
+    return list(merged.values())[:MAX_RULE_LABELS]
+
+
+def _classify_batch_with_llm(
+    batch: list[tuple[str, str | None, str | None]],
+    system_prompt: str,
+    user_prompt_template: str,
+    batch_validator,
+    issues_validator,
+) -> list[tuple[str, str]]:
+    reviews = [
+        {
+            "review_id": review_id,
+            "category": category_raw or "",
+            "text": (content or "")[:LLM_MAX_REVIEW_CHARS],
+        }
+        for review_id, content, category_raw in batch
+    ]
+    expected_ids = {review["review_id"] for review in reviews}
+
+    def _validate(payload: dict[str, Any]) -> None:
+        batch_validator(payload)
+        for item in payload["results"]:
+            issues_validator(item["issues"])
+        missing = expected_ids - {item["review_id"] for item in payload["results"]}
+        if missing:
+            raise ValueError(f"Missing results for review_ids: {', '.join(sorted(missing))}")
+
+    input_json = json.dumps(
+        {"allowed_labels": list(ALLOWED_LABELS), "reviews": reviews},
+        separators=(",", ":"),
+        ensure_ascii=True,
     )
+    payload = call_json_with_retry(
+        model=DEFAULT_MODEL,
+        system=system_prompt,
+        user=user_prompt_template.replace("{{input_json}}", input_json),
+        schema_validator=_validate,
+        num_predict=64 + LLM_TOKENS_PER_RESULT * len(reviews),
+    )
+
+    results: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for item in payload["results"]:
+        review_id = item["review_id"]
+        if review_id not in expected_ids or review_id in seen:
+            continue
+        seen.add(review_id)
+        issues = _normalize_llm_issues(item["issues"])
+        results.append((review_id, json.dumps(issues, ensure_ascii=True)))
+    return results
+
+
+def _run_llm_pass(token_budget: int) -> tuple[int, int, int]:
+    system_prompt, user_prompt_template = load_prompt_sections(PROMPT_PATH)
+    batch_validator = build_jsonschema_validator(load_json_schema(BATCH_SCHEMA_PATH))
+    issues_schema_validator = build_jsonschema_validator(load_json_schema(ISSUES_SCHEMA_PATH))
+    prompt_overhead = estimate_tokens(system_prompt) + estimate_tokens(user_prompt_template)
+
+    # Each batch also pays for the prompt scaffold; amortize it over the reviews in the batch.
+    scaffold_tokens_per_review = math.ceil(prompt_overhead / max(1, LLM_BATCH_SIZE))
+
+    with get_connection() as conn:
+        work = _select_budgeted_work(conn, token_budget, scaffold_tokens_per_review)
+
+    batches = chunked(work, LLM_BATCH_SIZE)
+
+    done_rows = 0
+    failed_batches = 0
+    # Persist after every wave so an interrupted run resumes from the queue instead of starting over.
+    for wave in chunked(batches, max(1, LLM_CONCURRENCY) * 4):
+        results, failures = run_batches(
+            wave,
+            lambda batch: _classify_batch_with_llm(
+                batch, system_prompt, user_prompt_template, batch_validator, issues_schema_validator
+            ),
+            concurrency=LLM_CONCURRENCY,
+        )
+        done = [(issues_json, review_id) for batch_results in results for review_id, issues_json in batch_results]
+        failed = [(str(exc)[:500], review_id) for batch, exc in failures for review_id, _content, _cat in batch]
+
+        with get_connection() as conn:
+            if done:
+                conn.executemany(
+                    """
+                    UPDATE issue_llm_queue
+                    SET status = 'done', result_json = ?, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE review_id = ?
+                    """,
+                    done,
+                )
+            if failed:
+                conn.executemany(
+                    f"""
+                    UPDATE issue_llm_queue
+                    SET
+                        last_error = ?,
+                        attempts = attempts + 1,
+                        status = CASE WHEN attempts + 1 >= {LLM_MAX_ATTEMPTS} THEN 'failed' ELSE 'pending' END,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE review_id = ?
+                    """,
+                    failed,
+                )
+            _apply_done_results(conn)
+
+        done_rows += len(done)
+        failed_batches += len(failures)
+        for _batch, exc in failures[:1]:
+            print(f"[03_enrich_issues] llm batch failed (rows stay queued): {exc}")
+
+    return len(work), done_rows, failed_batches
+
+
+def main(review_ids: list[str] | None = None) -> None:
+    with stage_run("03_enrich_issues") as run:
+        check_schema()
+
+        with get_connection() as conn:
+            with run.step("fetch") as step:
+                scope = review_scope(conn, review_ids)
+                rows = conn.execute(
+                    f"""
+                    SELECT review_id, content, category_raw
+                    FROM reviews_raw
+                    WHERE {scope}
+                    """
+                ).fetchall()
+                step.record(rows_read=len(rows))
+
+            with run.step("classify"):
+                updates: list[tuple[str, str]] = []
+                candidates: list[tuple[str, str, int]] = []
+                for review_id, content, category_raw in rows:
+                    issues = _classify_issues(content)
+                    issues_json = json.dumps(issues if issues else [], ensure_ascii=True)
+                    updates.append((issues_json, review_id))
+                    reason = _llm_pass_reason(issues, category_raw)
+                    if LLM_PASS_ENABLED and reason is not None:
+                        candidates.append((review_id, reason, _estimate_review_tokens(content)))
+
+            with run.step("writeback") as step:
+                if updates:
+                    conn.executemany(
+                        """
+                        UPDATE reviews_enriched
+                        SET
+                            issues_json = ?,
+                            issues_method = 'rule',
+                            processed_at = CURRENT_TIMESTAMP
+                        WHERE review_id = ?
+                        """,
+                        updates,
+                    )
+                step.record(rows_written=len(updates))
+
+                _enqueue_candidates(conn, candidates)
+                _apply_done_results(conn)
+
+        selected, done_rows, failed_batches = 0, 0, 0
+        if LLM_PASS_ENABLED:
+            with run.step("llm_pass") as step:
+                selected, done_rows, failed_batches = _run_llm_pass(LLM_TOKEN_BUDGET)
+                flush_cache_hits()
+                step.record(rows_written=done_rows)
+
+        with get_connection() as conn:
+            with run.step("summary"):
+                summary = conn.execute(
+                    """
+                    SELECT
+                        COUNT(*) AS total,
+                        SUM(CASE WHEN issues_method = 'rule' THEN 1 ELSE 0 END) AS rule_rows,
+                        SUM(CASE WHEN issues_method = 'hybrid' THEN 1 ELSE 0 END) AS hybrid_rows,
+                        SUM(CASE WHEN COALESCE(issues_json, '[]') <> '[]' THEN 1 ELSE 0 END) AS issue_rows
+                    FROM reviews_enriched
+                    """
+                ).fetchone()
+                pending_rows = conn.execute(
+                    "SELECT COUNT(*) FROM issue_llm_queue WHERE status = 'pending'"
+                ).fetchone()[0]
+
+        print(
+            "[03_enrich_issues] completed: "
+            f"rows={summary[0]}, rule_rows={summary[1]}, hybrid_rows={summary[2]}, rows_with_issues={summary[3]}, "
+            f"llm_selected={selected}, llm_done={done_rows}, llm_failed_batches={failed_batches}, "
+            f"llm_pending={pending_rows}"
+        )
 
 
 if __name__ == "__main__":
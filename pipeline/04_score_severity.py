@@ -9,7 +9,9 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.incremental import review_scope
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
 
 FAILURE_TERMS: tuple[str, ...] = (
     "failed",
@@ -122,56 +124,65 @@ def _compute_severity(
     return severity, _severity_band(severity)
 
 
-def main() -> None:
-    run_migrations()
-
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT
-                r.review_id,
-                r.content,
-                r.score,
-                r.thumbs_up,
-                e.sentiment_label,
-                e.issues_json
-            FROM reviews_raw r
-            JOIN reviews_enriched e ON e.review_id = r.review_id
-            """
-        ).fetchall()
-
-        updates: list[tuple[float, str, str]] = []
-        for review_id, content, score, thumbs_up, sentiment_label, issues_json in rows:
-            severity, band = _compute_severity(score, sentiment_label, content, thumbs_up, issues_json)
-            updates.append((severity, band, review_id))
-
-        if updates:
-            conn.executemany(
-                """
-                UPDATE reviews_enriched
-                SET
-                    severity_score = ?,
-                    severity_band = ?,
-                    processed_at = CURRENT_TIMESTAMP
-                WHERE review_id = ?
-                """,
-                updates,
-            )
-
-        summary = conn.execute(
-            """
-            SELECT
-                COUNT(*) AS total,
-                AVG(severity_score) AS avg_severity,
-                SUM(CASE WHEN severity_band = 'critical' THEN 1 ELSE 0 END) AS critical_rows
-            FROM reviews_enriched
-            """
-        ).fetchone()
-
-    print(
-        "[04_score_severity] completed: "
-        f"rows={summary[0]}, avg_severity={summary[1]:.4f}, critical_rows={summary[2]}"
-    )
+def main(review_ids: list[str] | None = None) -> None:
+    with stage_run("04_score_severity") as run:
+        check_schema()
+
+        with get_connection() as conn:
+            with run.step("fetch") as step:
+                scope = review_scope(conn, review_ids, "r.review_id")
+                rows = conn.execute(
+                    f"""
+                    SELECT
+                        r.review_id,
+                        r.content,
+                        r.score,
+                        r.thumbs_up,
+                        e.sentiment_label,
+                        e.issues_json
+                    FROM reviews_raw r
+                    JOIN reviews_enriched e ON e.review_id = r.review_id
+                    WHERE {scope}
+                    """
+                ).fetchall()
+                step.record(rows_read=len(rows))
+
+            with run.step("classify"):
+                updates: list[tuple[float, str, str]] = []
+                for review_id, content, score, thumbs_up, sentiment_label, issues_json in rows:
+                    severity, band = _compute_severity(score, sentiment_label, content, thumbs_up, issues_json)
+                    updates.append((severity, band, review_id))
+
+            with run.step("writeback") as step:
+                if updates:
+                    conn.executemany(
+                        """
+                        UPDATE reviews_enriched
+                        SET
+                            severity_score = ?,
+                            severity_band = ?,
+                            processed_at = CURRENT_TIMESTAMP
+                        WHERE review_id = ?
+                        """,
+                        updates,
+                    )
+                step.record(rows_written=len(updates))
+
+            with run.step("summary"):
+                summary = conn.execute(
+                    """
+                    SELECT
+                        COUNT(*) AS total,
+                        AVG(severity_score) AS avg_severity,
+                        SUM(CASE WHEN severity_band = 'critical' THEN 1 ELSE 0 END) AS critical_rows
+                    FROM reviews_enriched
+                    """
+                ).fetchone()
+
+        print(
+            "[04_score_severity] completed: "
+            f"rows={summary[0]}, avg_severity={summary[1]:.4f}, critical_rows={summary[2]}"
+        )
 
 
 if __name__ == "__main__":
@@ -7,65 +7,115 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.incremental import restrict_query, review_scope
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
+from pipeline.wide import refresh_reviews_wide
 
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 SQL_PATH = ROOT_DIR / "analytics" / "sql" / "daily_kpis.sql"
+ISSUES_SQL_PATH = ROOT_DIR / "analytics" / "sql" / "daily_issue_aggregates.sql"
 
 
-def main() -> None:
-    run_migrations()
-    query = SQL_PATH.read_text(encoding="utf-8")
+def main(review_ids: list[str] | None = None) -> None:
+    with stage_run("06_aggregates_daily") as run:
+        check_schema()
+        query = SQL_PATH.read_text(encoding="utf-8")
+        issues_query = ISSUES_SQL_PATH.read_text(encoding="utf-8")
 
-    with get_connection() as conn:
-        conn.execute("DROP TABLE IF EXISTS stage_daily_aggregates")
-        conn.execute(f"CREATE TEMP TABLE stage_daily_aggregates AS {query}")
+        with get_connection() as conn:
+            # First reader after enrichment (01-05): publish the joined table that this stage, 07, the lakehouse
+            # export and the app query.
+            with run.step("publish_wide") as step:
+                step.record(rows_written=refresh_reviews_wide(conn, review_ids))
 
-        stage_count = conn.execute("SELECT COUNT(*) FROM stage_daily_aggregates").fetchone()[0]
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO daily_aggregates (
-                day,
-                total_reviews,
-                avg_rating,
-                pct_negative,
-                pct_positive,
-                critical_count,
-                top_issues_json,
-                churn_high_users,
-                anomaly_flags_json
-            )
-            SELECT
-                day,
-                total_reviews,
-                avg_rating,
-                pct_negative,
-                pct_positive,
-                critical_count,
-                top_issues_json,
-                churn_high_users,
-                anomaly_flags_json
-            FROM stage_daily_aggregates
-            """
-        )
+            scope = review_scope(conn, review_ids)
+            if scope != "TRUE":
+                # Only the days the batch's reviews fall on are recomputed, plus days a replaced review moved away
+                # from (their stored count no longer matches).
+                days = f"""
+                    day IN (SELECT DISTINCT day FROM reviews_wide WHERE {scope})
+                    OR day IN (
+                        SELECT d.day
+                        FROM daily_aggregates d
+                        LEFT JOIN (SELECT day, COUNT(*) AS n FROM reviews_wide GROUP BY 1) c USING (day)
+                        WHERE c.n IS DISTINCT FROM d.total_reviews
+                    )
+                """
+                query, issues_query = restrict_query(query, days), restrict_query(issues_query, days)
+
+            with run.step("compute") as step:
+                conn.execute("DROP TABLE IF EXISTS stage_daily_aggregates")
+                conn.execute(f"CREATE TEMP TABLE stage_daily_aggregates AS {query}")
+                stage_count = conn.execute("SELECT COUNT(*) FROM stage_daily_aggregates").fetchone()[0]
+                conn.execute("DROP TABLE IF EXISTS stage_daily_issue_aggregates")
+                conn.execute(f"CREATE TEMP TABLE stage_daily_issue_aggregates AS {issues_query}")
+                issue_stage_count = conn.execute("SELECT COUNT(*) FROM stage_daily_issue_aggregates").fetchone()[0]
+                step.record(rows_read=stage_count + issue_stage_count)
+
+            with run.step("writeback") as step:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO daily_aggregates (
+                        day,
+                        total_reviews,
+                        avg_rating,
+                        pct_negative,
+                        pct_positive,
+                        critical_count,
+                        top_issues_json,
+                        churn_high_users,
+                        anomaly_flags_json
+                    )
+                    SELECT
+                        day,
+                        total_reviews,
+                        avg_rating,
+                        pct_negative,
+                        pct_positive,
+                        critical_count,
+                        top_issues_json,
+                        churn_high_users,
+                        anomaly_flags_json
+                    FROM stage_daily_aggregates
+                    """
+                )
+                # Recomputed days replace all their labels, so a label that disappeared from a day is dropped too.
+                conn.execute(
+                    """
+                    DELETE FROM daily_issue_aggregates
+                    WHERE day IN (SELECT day FROM stage_daily_aggregates)
+                    """
+                )
+                conn.execute(
+                    """
+                    INSERT INTO daily_issue_aggregates (day, issue_label, review_count, weighted_severity)
+                    SELECT day, issue_label, review_count, weighted_severity
+                    FROM stage_daily_issue_aggregates
+                    """
+                )
+                step.record(rows_written=stage_count + issue_stage_count)
 
-        total_count = conn.execute("SELECT COUNT(*) FROM daily_aggregates").fetchone()[0]
-        top_issue_preview = conn.execute(
-            """
-            SELECT day, top_issues_json
-            FROM daily_aggregates
-            WHERE top_issues_json <> '[]'
-            ORDER BY day DESC
-            LIMIT 3
-            """
-        ).fetchall()
+            with run.step("summary"):
+                total_count = conn.execute("SELECT COUNT(*) FROM daily_aggregates").fetchone()[0]
+                top_issue_preview = conn.execute(
+                    """
+                    SELECT day, top_issues_json
+                    FROM daily_aggregates
+                    WHERE top_issues_json <> '[]'
+                    ORDER BY day DESC
+                    LIMIT 3
+                    """
+                ).fetchall()
+
+        print(f"[06_aggregates_daily] top issues preview (latest 3 days): {top_issue_preview}")
+        print(
+            "[06_aggregates_daily] completed: "
+            f"stage_rows={stage_count}, daily_aggregates_rows={total_count}, "
+            f"daily_issue_aggregates_rows={issue_stage_count}"
+        )
 
-    print(f"[06_aggregates_daily] top issues preview (latest 3 days): {top_issue_preview}")
-    print(
-        "[06_aggregates_daily] completed: "
-        f"stage_rows={stage_count}, daily_aggregates_rows={total_count}"
-    )
 
 if __name__ == "__main__":
     main()
@@ -7,55 +7,87 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pipeline.db import get_connection
-from pipeline.migrations import run_migrations
+from pipeline.incremental import restrict_query, review_scope
+from pipeline.dimensions import refresh_dimensions
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
 
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 SQL_PATH = ROOT_DIR / "analytics" / "sql" / "version_breakdown.sql"
 
 
-def main() -> None:
-    run_migrations()
-    query = SQL_PATH.read_text(encoding="utf-8")
-
-    with get_connection() as conn:
-        conn.execute("DROP TABLE IF EXISTS stage_version_aggregates")
-        conn.execute(f"CREATE TEMP TABLE stage_version_aggregates AS {query}")
-
-        stage_count = conn.execute("SELECT COUNT(*) FROM stage_version_aggregates").fetchone()[0]
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO version_aggregates (
-                app_version,
-                first_seen_day,
-                last_seen_day,
-                total_reviews,
-                avg_rating,
-                pct_negative,
-                critical_count,
-                issue_breakdown_json,
-                category_breakdown_json
-            )
-            SELECT
-                app_version,
-                first_seen_day,
-                last_seen_day,
-                total_reviews,
-                avg_rating,
-                pct_negative,
-                critical_count,
-                issue_breakdown_json,
-                category_breakdown_json
-            FROM stage_version_aggregates
-            """
-        )
+def main(review_ids: list[str] | None = None) -> None:
+    with stage_run("07_aggregates_version") as run:
+        check_schema()
+        query = SQL_PATH.read_text(encoding="utf-8")
+
+        with get_connection() as conn:
+            scope = review_scope(conn, review_ids)
+            if scope != "TRUE":
+                # Versions the batch's reviews belong to, plus versions a replaced review moved away from.
+                versions = f"""
+                    COALESCE(app_version, '') IN (
+                        SELECT DISTINCT COALESCE(app_version, '') FROM reviews_wide WHERE {scope}
+                    )
+                    OR COALESCE(app_version, '') IN (
+                        SELECT COALESCE(v.app_version, '')
+                        FROM version_aggregates v
+                        LEFT JOIN (SELECT app_version, COUNT(*) AS n FROM reviews_wide GROUP BY 1) c
+                            ON c.app_version IS NOT DISTINCT FROM v.app_version
+                        WHERE c.n IS DISTINCT FROM v.total_reviews
+                    )
+                """
+                query = restrict_query(query, versions)
+
+            with run.step("compute") as step:
+                conn.execute("DROP TABLE IF EXISTS stage_version_aggregates")
+                conn.execute(f"CREATE TEMP TABLE stage_version_aggregates AS {query}")
+                stage_count = conn.execute("SELECT COUNT(*) FROM stage_version_aggregates").fetchone()[0]
+                step.record(rows_read=stage_count)
 
-        total_count = conn.execute("SELECT COUNT(*) FROM version_aggregates").fetchone()[0]
+            with run.step("writeback") as step:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO version_aggregates (
+                        app_version,
+                        first_seen_day,
+                        last_seen_day,
+                        total_reviews,
+                        avg_rating,
+                        pct_negative,
+                        critical_count,
+                        issue_breakdown_json,
+                        category_breakdown_json
+                    )
+                    SELECT
+                        app_version,
+                        first_seen_day,
+                        last_seen_day,
+                        total_reviews,
+                        avg_rating,
+                        pct_negative,
+                        critical_count,
+                        issue_breakdown_json,
+                        category_breakdown_json
+                    FROM stage_version_aggregates
+                    """
+                )
+                step.record(rows_written=stage_count)
 
-    print(
-        "[07_aggregates_version] completed: "
-        f"stage_rows={stage_count}, version_aggregates_rows={total_count}"
-    )
+            # Filter options for the app; refreshed here because dim_version ranks the fresh version_aggregates.
+            with run.step("dimensions") as step:
+                dimension_counts = refresh_dimensions(conn)
+                step.record(rows_written=sum(dimension_counts.values()))
+
+            with run.step("summary"):
+                total_count = conn.execute("SELECT COUNT(*) FROM version_aggregates").fetchone()[0]
+
+        print(
+            "[07_aggregates_version] completed: "
+            f"stage_rows={stage_count}, version_aggregates_rows={total_count}, "
+            + ", ".join(f"{table}_rows={count}" for table, count in dimension_counts.items())
+        )
 
 
 if __name__ == "__main__":
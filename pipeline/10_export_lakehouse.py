@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pipeline.db import ROOT_DIR, get_connection
+from pipeline.instrumentation import stage_run
+from pipeline.migrations import check_schema
+
+
+LAKEHOUSE_DIR = Path(os.getenv("LAKEHOUSE_DIR", str(ROOT_DIR / "data" / "lakehouse")))
+# Extra Hive partition columns below month for the reviews dataset, e.g. "app_version". Each distinct value becomes
+# a directory per month, so only use low-cardinality columns.
+REVIEW_SUBPARTITIONS: tuple[str, ...] = tuple(
+    column.strip() for column in os.getenv("LAKEHOUSE_REVIEW_SUBPARTITIONS", "").split(",") if column.strip()
+)
+
+
+def _month(column: str) -> str:
+    return f"COALESCE(strftime({column}, '%Y-%m'), 'unknown')"
+
+
+# (dataset, query, partitioned by its `month` column, ORDER BY within each file). Sorting by time keeps Parquet
+# row-group min/max statistics tight, so day-range filters skip most row groups.
+DATASETS: tuple[tuple[str, str, bool, str], ...] = (
+    ("reviews", f"SELECT {_month('at_ts')} AS month, * FROM reviews_wide", True, "at_ts, review_id"),
+    ("daily_aggregates", f"SELECT {_month('day')} AS month, * FROM daily_aggregates", True, "day"),
+    (
+        "daily_issue_aggregates",
+        f"SELECT {_month('day')} AS month, * FROM daily_issue_aggregates",
+        True,
+        "day, issue_label",
+    ),
+    ("version_aggregates", "SELECT * FROM version_aggregates", False, "app_version"),
+)
+
+
+def _fingerprints(conn, query: str, partitioned: bool) -> dict[str, tuple[int, int]]:
+    """(row count, XOR of row hashes) per partition; any changed, added or removed row changes it."""
+    partition = "month" if partitioned else "''"
+    rows = conn.execute(
+        f"SELECT {partition}, COUNT(*), bit_xor(hash(q)) FROM ({query}) AS q GROUP BY 1"
+    ).fetchall()
+    return {value: (count, fingerprint) for value, count, fingerprint in rows}
+
+
+def _partition_dir(dataset: str, value: str) -> Path:
+    return LAKEHOUSE_DIR / dataset / f"month={value}" if value else LAKEHOUSE_DIR / dataset
+
+
+def _swap_in(staged: Path, target: Path) -> None:
+    """Move each staged file over the live one of the same name, then delete live files the new partition lacks.
+
+    os.replace swaps a single file atomically, so the partition directory never disappears and every file a reader
+    opens is complete. With one file per partition (the default) readers see the old rows or the new ones. With
+    sub-partitions, a listing taken mid-swap can mix updated and not-yet-updated sub-partitions.
+    """
+    new_files = {path.relative_to(staged) for path in staged.rglob("*") if path.is_file()}
+    for relative in sorted(new_files):
+        destination = target / relative
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged / relative, destination)
+    # Deepest first, so sub-partition directories emptied here are removed too.
+    for path in sorted(target.rglob("*"), key=lambda item: len(item.parts), reverse=True):
+        if path.is_file() and path.relative_to(target) not in new_files:
+            path.unlink()
+        elif path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+
+
+def _retire(target: Path, trash: Path) -> None:
+    if target.exists():
+        trash.mkdir(parents=True, exist_ok=True)
+        os.replace(target, trash / f"{target.parent.name}-{target.name}")
+
+
+def _export_dataset(
+    conn, dataset: str, query: str, partitioned: bool, order_by: str, token: str
+) -> tuple[int, int, int]:
+    """Rewrite only the partitions whose fingerprint changed; returns (partitions written, removed, rows written)."""
+    current = _fingerprints(conn, query, partitioned)
+    previous = {
+        value: (count, fingerprint)
+        for value, count, fingerprint in conn.execute(
+            "SELECT partition_value, row_count, fingerprint FROM lakehouse_partitions WHERE dataset = ?",
+            [dataset],
+        ).fetchall()
+    }
+    changed = sorted(
+        value
+        for value, fingerprint in current.items()
+        if previous.get(value) != fingerprint or not _partition_dir(dataset, value).exists()
+    )
+    removed = sorted(set(previous) - set(current))
+
+    staging = LAKEHOUSE_DIR / ".staging" / token / dataset
+    trash = LAKEHOUSE_DIR / ".trash" / token / dataset
+    if changed:
+        staging.parent.mkdir(parents=True, exist_ok=True)
+        if partitioned:
+            partition_by = ", ".join(("month", *(REVIEW_SUBPARTITIONS if dataset == "reviews" else ())))
+            conn.execute(
+                f"""
+                COPY (
+                    SELECT * FROM ({query}) AS q
+                    WHERE month IN (SELECT UNNEST(?::VARCHAR[]))
+                    ORDER BY {order_by}
+                ) TO '{staging}' (FORMAT parquet, COMPRESSION zstd, PARTITION_BY ({partition_by}))
+                """,
+                [changed],
+            )
+        else:
+            staging.mkdir()
+            target_file = staging / "data.parquet"
+            conn.execute(f"COPY ({query} ORDER BY {order_by}) TO '{target_file}' (FORMAT parquet, COMPRESSION zstd)")
+
+        for value in changed:
+            _swap_in(staging / f"month={value}" if value else staging, _partition_dir(dataset, value))
+
+    for value in removed:
+        _retire(_partition_dir(dataset, value), trash)
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        if removed:
+            conn.execute(
+                """
+                DELETE FROM lakehouse_partitions
+                WHERE dataset = ? AND partition_value IN (SELECT UNNEST(?::VARCHAR[]))
+                """,
+                [dataset, removed],
+            )
+        if changed:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO lakehouse_partitions
+                    (dataset, partition_value, row_count, fingerprint, exported_at)
+                VALUES (?, ?, ?, ?, CAST(current_timestamp AS TIMESTAMP))
+                """,
+                [[dataset, value, *current[value]] for value in changed],
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(changed), len(removed), sum(current[value][0] for value in changed)
+
+
+def main() -> None:
+    with stage_run("10_export_lakehouse") as run:
+        check_schema()
+        token = uuid.uuid4().hex[:12]
+        summary: list[str] = []
+
+        try:
+            with get_connection() as conn:
+                for dataset, query, partitioned, order_by in DATASETS:
+                    with run.step(dataset) as step:
+                        written, removed, rows = _export_dataset(conn, dataset, query, partitioned, order_by, token)
+                        step.record(rows_written=rows)
+                    summary.append(f"{dataset}={written} written/{removed} removed")
+        finally:
+            for scratch in (LAKEHOUSE_DIR / ".staging", LAKEHOUSE_DIR / ".trash"):
+                shutil.rmtree(scratch / token, ignore_errors=True)
+                try:
+                    scratch.rmdir()
+                except OSError:
+                    # Absent, or another export is still using it.
+                    pass
+
+    print(f"[10_export_lakehouse] completed: {LAKEHOUSE_DIR} partitions " + ", ".join(summary))
+
+
+if __name__ == "__main__":
+    main()
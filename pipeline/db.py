@@ -1,16 +1,154 @@
 from __future__ import annotations
 
+import os
+import sys
+import threading
+import time
 from pathlib import Path
+from typing import Any, Callable
 
 import duckdb
 
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
-DB_PATH = ROOT_DIR / "data" / "db" / "reviews.duckdb"
+DB_PATH = Path(os.getenv("REVIEWS_DUCKDB_PATH", str(ROOT_DIR / "data" / "db" / "reviews.duckdb")))
+# Opt-in: statements slower than this (execute + fetch, in ms) are stored with their DuckDB JSON profile; 0 disables.
+QUERY_PROFILE_SLOW_MS = float(os.getenv("DUCKDB_PROFILE_SLOW_MS", "0"))
+
+# observer(sql, seconds, method) is called after every statement and fetch on connections from get_connection();
+# method is the DuckDB call ("execute", "executemany", "fetchall", ...).
+QueryObserver = Callable[[str, float, str], None]
+_QUERY_OBSERVERS: list[QueryObserver] = []
+_OBSERVERS_LOCK = threading.Lock()
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    with _OBSERVERS_LOCK:
+        _QUERY_OBSERVERS.append(observer)
+
+
+def remove_query_observer(observer: QueryObserver) -> None:
+    with _OBSERVERS_LOCK:
+        if observer in _QUERY_OBSERVERS:
+            _QUERY_OBSERVERS.remove(observer)
+
+
+def _notify(sql: str, seconds: float, method: str) -> None:
+    for observer in list(_QUERY_OBSERVERS):
+        try:
+            observer(sql, seconds, method)
+        except Exception:  # noqa: BLE001
+            continue
+
+
+def _caller_source() -> str:
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{Path(frame.f_code.co_filename).stem}.{frame.f_code.co_name}"
+
+
+class ObservedConnection:
+    """DuckDB connection proxy that reports statement time to query observers and profiles slow statements."""
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, profile_slow_ms: float = 0.0) -> None:
+        self._conn = conn
+        self._last_sql = ""
+        self._profile_slow_ms = profile_slow_ms
+        # (sql, parameters, seconds so far, source) of the statement whose result may still be fetched.
+        self._pending: tuple[str, Any, float, str] | None = None
+        if profile_slow_ms > 0:
+            try:
+                conn.execute("SET enable_profiling = 'no_output'")
+            except duckdb.Error:
+                self._profile_slow_ms = 0.0
+
+    def __enter__(self) -> ObservedConnection:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        self._flush_profile()
+        self._conn.close()
+
+    def _flush_profile(self) -> None:
+        # DuckDB finalises a query's profile once its result is consumed, so slow statements are captured
+        # after the fetch, or before the next statement replaces the profile.
+        pending, self._pending = self._pending, None
+        if pending is None or pending[2] * 1000.0 < self._profile_slow_ms:
+            return
+        sql, parameters, seconds, source = pending
+        try:
+            profile_json = self._conn.get_profiling_information(format="json")
+        except duckdb.Error:
+            profile_json = None
+
+        from pipeline.query_profiles import record_slow_query
+
+        record_slow_query(sql, parameters, seconds, profile_json, source)
+
+    def _timed(self, sql: str, method: str, *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return getattr(self._conn, method)(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._pending is not None:
+                sql_pending, parameters, seconds, source = self._pending
+                self._pending = (sql_pending, parameters, seconds + elapsed, source)
+            _notify(sql, elapsed, method)
+
+    def execute(self, query: str, parameters: Any = None) -> ObservedConnection:
+        self._flush_profile()
+        self._last_sql = query
+        if self._profile_slow_ms > 0:
+            self._pending = (query, parameters, 0.0, _caller_source())
+        if parameters is None:
+            self._timed(query, "execute", query)
+        else:
+            self._timed(query, "execute", query, parameters)
+        return self
+
+    def executemany(self, query: str, parameters: Any = None) -> ObservedConnection:
+        self._flush_profile()
+        self._last_sql = query
+        self._timed(query, "executemany", query, parameters or [])
+        return self
+
+    def _fetch(self, method: str, *args: Any) -> Any:
+        result = self._timed(self._last_sql, method, *args)
+        if method != "fetchmany":
+            self._flush_profile()
+        return result
+
+    def fetchone(self) -> Any:
+        return self._fetch("fetchone")
+
+    def fetchall(self) -> Any:
+        return self._fetch("fetchall")
+
+    def fetchmany(self, size: int = 1) -> Any:
+        return self._fetch("fetchmany", size)
+
+    def fetchdf(self) -> Any:
+        return self._fetch("fetchdf")
+
+    def df(self) -> Any:
+        return self._fetch("df")
 
 
 def get_connection(db_path: Path | None = None, read_only: bool = False) -> duckdb.DuckDBPyConnection:
     """Return a DuckDB connection to the project database."""
     target_path = db_path or DB_PATH
     target_path.parent.mkdir(parents=True, exist_ok=True)
-    return duckdb.connect(str(target_path), read_only=read_only)
+    conn = duckdb.connect(str(target_path), read_only=read_only)
+    if _QUERY_OBSERVERS or QUERY_PROFILE_SLOW_MS > 0:
+        return ObservedConnection(conn, profile_slow_ms=QUERY_PROFILE_SLOW_MS)  # type: ignore[return-value]
+    return conn
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+# Rebuilt wholesale from the fact tables; each is tiny (one row per category / label / version).
+REFRESH_STATEMENTS: tuple[tuple[str, str], ...] = (
+    (
+        "dim_category",
+        """
+        INSERT INTO dim_category (category, review_count)
+        SELECT COALESCE(category_taxonomy, 'Other') AS category, COUNT(*) AS review_count
+        FROM reviews_enriched
+        GROUP BY 1
+        """,
+    ),
+    (
+        "dim_issue_label",
+        """
+        INSERT INTO dim_issue_label (issue_label, review_count)
+        SELECT CAST(je.value ->> 'label' AS VARCHAR) AS issue_label, COUNT(DISTINCT e.review_id) AS review_count
+        FROM reviews_enriched e,
+             LATERAL json_each(COALESCE(e.issues_json, '[]')) AS je
+        WHERE CAST(je.value ->> 'label' AS VARCHAR) IS NOT NULL
+        GROUP BY 1
+        """,
+    ),
+    (
+        "dim_version",
+        """
+        INSERT INTO dim_version (app_version, review_count, first_seen_day, last_seen_day, sort_rank)
+        SELECT
+            app_version,
+            total_reviews,
+            first_seen_day,
+            last_seen_day,
+            ROW_NUMBER() OVER (ORDER BY last_seen_day DESC, total_reviews DESC, app_version) AS sort_rank
+        FROM version_aggregates
+        WHERE app_version IS NOT NULL AND app_version <> ''
+        """,
+    ),
+    (
+        "data_bounds",
+        """
+        INSERT INTO data_bounds (bounds_id, min_day, max_day, total_reviews, refreshed_at)
+        SELECT 1, CAST(MIN(at_ts) AS DATE), CAST(MAX(at_ts) AS DATE), COUNT(*), CAST(current_timestamp AS TIMESTAMP)
+        FROM reviews_raw
+        """,
+    ),
+)
+
+
+def refresh_dimensions(conn: Any) -> dict[str, int]:
+    """Rebuild the filter-option dimension tables in one transaction; returns row counts per table."""
+    counts: dict[str, int] = {}
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table, insert_sql in REFRESH_STATEMENTS:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(insert_sql)
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return counts
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+
+# Per-connection temp table holding the review ids a micro-batch touched.
+SCOPE_TABLE = "scope_review_ids"
+
+
+def review_scope(conn: Any, review_ids: Iterable[str] | None, column: str = "review_id") -> str:
+    """SQL predicate limiting `column` to `review_ids`; "TRUE" (the whole table) when review_ids is None."""
+    if review_ids is None:
+        return "TRUE"
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE {SCOPE_TABLE} (review_id VARCHAR PRIMARY KEY)")
+    conn.execute(f"INSERT OR IGNORE INTO {SCOPE_TABLE} SELECT UNNEST(?::VARCHAR[])", [list(review_ids)])
+    return f"{column} IN (SELECT review_id FROM {SCOPE_TABLE})"
+
+
+def restrict_query(query: str, predicate: str) -> str:
+    """Wrap an analytics/sql query so only rows matching `predicate` are computed."""
+    if predicate == "TRUE":
+        return query
+    return f"SELECT * FROM ({query.strip().rstrip(';')}) AS scoped WHERE {predicate}"
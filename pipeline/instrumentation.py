@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from pipeline.db import ROOT_DIR, add_query_observer, get_connection, remove_query_observer
+
+
+INSTRUMENTATION_ENABLED = os.getenv("PIPELINE_INSTRUMENTATION", "1").strip().lower() not in {"0", "false", "no", "off"}
+RUN_LOG_PATH = Path(os.getenv("PIPELINE_RUN_LOG", str(ROOT_DIR / "data" / "logs" / "pipeline_runs.jsonl")))
+STAGE_STEP = "total"
+
+
+def new_run_id() -> str:
+    return f"{datetime.now(tz=timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}"
+
+
+# Shared by every stage of one pipeline invocation (scripts/run_pipeline.sh exports it).
+RUN_ID = os.getenv("PIPELINE_RUN_ID") or new_run_id()
+
+
+def set_run_id(run_id: str) -> None:
+    """Group the following stage runs under `run_id`; long-running callers start one per batch."""
+    global RUN_ID
+    RUN_ID = run_id
+
+
+def _now() -> str:
+    # Naive UTC so the value round-trips through DuckDB TIMESTAMP columns unchanged.
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None).isoformat(sep=" ", timespec="milliseconds")
+
+
+def _reset_peak_rss() -> None:
+    # Linux: writing 5 to clear_refs resets VmHWM so each step reports its own peak.
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as handle:
+            handle.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 2)
+    except (OSError, ValueError):
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round((max_rss if sys.platform == "darwin" else max_rss * 1024) / (1024 * 1024), 2)
+
+
+@dataclass
+class StepTiming:
+    stage: str
+    step: str
+    started_at: str = ""
+    ended_at: str = ""
+    wall_seconds: float = 0.0
+    python_seconds: float = 0.0
+    duckdb_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_read: int = 0
+    rows_written: int = 0
+    peak_rss_mb: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    run_id: str = field(default_factory=lambda: RUN_ID)
+    _started: float = field(default=0.0, repr=False)
+    _cpu_started: float = field(default=0.0, repr=False)
+
+    def record(self, rows_read: int = 0, rows_written: int = 0) -> None:
+        self.rows_read += rows_read
+        self.rows_written += rows_written
+
+    def as_record(self) -> dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if not key.startswith("_")}
+
+
+class StageRun:
+    """Collects per-step timings for one stage; DuckDB time comes from the get_connection() query observer."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.steps: list[StepTiming] = []
+        self.total = StepTiming(stage=stage, step=STAGE_STEP)
+        self._active: StepTiming | None = None
+        self._lock = threading.Lock()
+
+    def _observe(self, _sql: str, seconds: float, _method: str) -> None:
+        with self._lock:
+            self.total.duckdb_seconds += seconds
+            if self._active is not None:
+                self._active.duckdb_seconds += seconds
+
+    @staticmethod
+    def _begin(timing: StepTiming) -> None:
+        timing.started_at = _now()
+        timing._started = time.perf_counter()
+        timing._cpu_started = time.process_time()
+
+    @staticmethod
+    def _finish(timing: StepTiming) -> None:
+        timing.ended_at = _now()
+        timing.wall_seconds = round(time.perf_counter() - timing._started, 4)
+        timing.cpu_seconds = round(time.process_time() - timing._cpu_started, 4)
+        timing.duckdb_seconds = round(min(timing.duckdb_seconds, timing.wall_seconds), 4)
+        timing.python_seconds = round(timing.wall_seconds - timing.duckdb_seconds, 4)
+        timing.peak_rss_mb = max(timing.peak_rss_mb, _peak_rss_mb())
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepTiming]:
+        timing = StepTiming(stage=self.stage, step=name)
+        _reset_peak_rss()
+        self._begin(timing)
+        with self._lock:
+            self._active = timing
+        try:
+            yield timing
+        except BaseException as exc:
+            timing.status = "failed"
+            timing.error = repr(exc)[:500]
+            raise
+        finally:
+            with self._lock:
+                self._active = None
+            self._finish(timing)
+            self.steps.append(timing)
+            self.total.peak_rss_mb = max(self.total.peak_rss_mb, timing.peak_rss_mb)
+
+
+class _NullStageRun(StageRun):
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepTiming]:
+        yield StepTiming(stage=self.stage, step=name)
+
+
+def _persist(records: list[dict[str, Any]]) -> None:
+    try:
+        RUN_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with RUN_LOG_PATH.open("a", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=True) + "\n")
+    except OSError as exc:
+        print(f"[instrumentation] could not append to {RUN_LOG_PATH}: {exc}")
+
+    columns = list(records[0].keys())
+    try:
+        with get_connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO pipeline_runs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [[record[column] for column in columns] for record in records],
+            )
+    except Exception as exc:  # noqa: BLE001
+        print(f"[instrumentation] could not write pipeline_runs: {exc}")
+
+
+@contextmanager
+def stage_run(stage: str) -> Iterator[StageRun]:
+    """Time a whole stage and its `run.step(...)` blocks; persist to pipeline_runs and the JSON-lines log."""
+    if not INSTRUMENTATION_ENABLED:
+        yield _NullStageRun(stage)
+        return
+
+    run = StageRun(stage)
+    _reset_peak_rss()
+    run._begin(run.total)
+    add_query_observer(run._observe)
+    try:
+        yield run
+    except BaseException as exc:
+        run.total.status = "failed"
+        run.total.error = repr(exc)[:500]
+        raise
+    finally:
+        remove_query_observer(run._observe)
+        run._finish(run.total)
+        run.total.peak_rss_mb = max([run.total.peak_rss_mb, *(step.peak_rss_mb for step in run.steps)])
+        run.total.rows_read = sum(step.rows_read for step in run.steps)
+        run.total.rows_written = sum(step.rows_written for step in run.steps)
+        _persist([run.total.as_record(), *(step.as_record() for step in run.steps)])
+        breakdown = ", ".join(
+            f"{step.step}={step.wall_seconds:.3f}s(db {step.duckdb_seconds:.3f}s)" for step in run.steps
+        )
+        print(
+            f"[{stage}] timings: run_id={RUN_ID}, total={run.total.wall_seconds:.3f}s, "
+            f"db={run.total.duckdb_seconds:.3f}s, peak_rss_mb={run.total.peak_rss_mb}"
+            + (f", {breakdown}" if breakdown else "")
+        )
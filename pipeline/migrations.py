@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import os
 import sys
+import time
 from pathlib import Path
+from typing import Any, Callable
+
+import duckdb
 
 if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from pipeline.db import get_connection
+from pipeline.wide import ISSUE_LABELS_EXPR, refresh_reviews_wide
+
+
+# Closed label sets written by 02_enrich_sentiment (and its LLM schema) and 04_score_severity. reviews_wide stores them
+# as ENUM codes. DuckDB cannot extend an ENUM in place, so a new value needs a migration that recreates the type.
+ENUM_TYPES: dict[str, tuple[str, ...]] = {
+    "sentiment_label_t": ("negative", "neutral", "positive"),
+    "severity_band_t": ("low", "med", "high", "critical"),
+}
 
 
-CREATE_TABLE_STATEMENTS = (
+# Frozen: the schema migration 1 creates. Never edit these statements. A new table, column or type ships as a new
+# numbered migration in MIGRATIONS, otherwise databases already at the current version would never get it.
+BASE_TYPES_V1 = (
+    "CREATE TYPE IF NOT EXISTS sentiment_label_t AS ENUM ('negative', 'neutral', 'positive')",
+    "CREATE TYPE IF NOT EXISTS severity_band_t AS ENUM ('low', 'med', 'high', 'critical')",
+)
+BASE_TABLES_V1 = (
     """
     CREATE TABLE IF NOT EXISTS reviews_raw (
         review_id VARCHAR PRIMARY KEY,
@@ -20,7 +40,9 @@ CREATE_TABLE_STATEMENTS = (
         review_created_version VARCHAR,
         at_ts TIMESTAMP,
         app_version VARCHAR,
-        category_raw VARCHAR
+        category_raw VARCHAR,
+        day DATE,
+        week DATE
     )
     """,
     """
@@ -40,6 +62,36 @@ CREATE_TABLE_STATEMENTS = (
         processed_at TIMESTAMP
     )
     """,
+    # reviews_raw JOIN reviews_enriched, published by 06_aggregates_daily (pipeline/wide.py) in at_ts order so
+    # readers filter and group without the string-key join.
+    """
+    CREATE TABLE IF NOT EXISTS reviews_wide (
+        review_id VARCHAR,
+        user_name VARCHAR,
+        content VARCHAR,
+        score INTEGER,
+        thumbs_up INTEGER,
+        review_created_version VARCHAR,
+        at_ts TIMESTAMP,
+        app_version VARCHAR,
+        category_raw VARCHAR,
+        day DATE,
+        week DATE,
+        category_taxonomy VARCHAR,
+        sentiment_label sentiment_label_t,
+        sentiment_confidence DOUBLE,
+        sentiment_method VARCHAR,
+        issues_json VARCHAR,
+        issues_method VARCHAR,
+        severity_score DOUBLE,
+        severity_band severity_band_t,
+        churn_user_score DOUBLE,
+        churn_user_tier VARCHAR,
+        churn_user_rationale VARCHAR,
+        processed_at TIMESTAMP,
+        issue_labels VARCHAR[]
+    )
+    """,
     """
     CREATE TABLE IF NOT EXISTS daily_aggregates (
         day DATE PRIMARY KEY,
@@ -54,6 +106,15 @@ CREATE_TABLE_STATEMENTS = (
     )
     """,
     """
+    CREATE TABLE IF NOT EXISTS daily_issue_aggregates (
+        day DATE,
+        issue_label VARCHAR,
+        review_count INTEGER,
+        weighted_severity DOUBLE,
+        PRIMARY KEY (day, issue_label)
+    )
+    """,
+    """
     CREATE TABLE IF NOT EXISTS version_aggregates (
         app_version VARCHAR PRIMARY KEY,
         first_seen_day DATE,
@@ -77,18 +138,231 @@ CREATE_TABLE_STATEMENTS = (
         hash_key VARCHAR UNIQUE
     )
     """,
+    """
+    CREATE TABLE IF NOT EXISTS llm_response_cache (
+        cache_key VARCHAR PRIMARY KEY,
+        model VARCHAR,
+        response_text VARCHAR,
+        size_bytes BIGINT,
+        hit_count INTEGER,
+        created_at TIMESTAMP,
+        last_hit_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS issue_llm_queue (
+        review_id VARCHAR PRIMARY KEY,
+        reason VARCHAR,
+        status VARCHAR,
+        attempts INTEGER,
+        est_tokens INTEGER,
+        result_json VARCHAR,
+        last_error VARCHAR,
+        enqueued_at TIMESTAMP,
+        updated_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pipeline_runs (
+        run_id VARCHAR,
+        stage VARCHAR,
+        step VARCHAR,
+        started_at TIMESTAMP,
+        ended_at TIMESTAMP,
+        wall_seconds DOUBLE,
+        python_seconds DOUBLE,
+        duckdb_seconds DOUBLE,
+        cpu_seconds DOUBLE,
+        rows_read BIGINT,
+        rows_written BIGINT,
+        peak_rss_mb DOUBLE,
+        status VARCHAR,
+        error VARCHAR,
+        PRIMARY KEY (run_id, stage, step)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dim_category (
+        category VARCHAR PRIMARY KEY,
+        review_count BIGINT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dim_issue_label (
+        issue_label VARCHAR PRIMARY KEY,
+        review_count BIGINT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dim_version (
+        app_version VARCHAR PRIMARY KEY,
+        review_count BIGINT,
+        first_seen_day DATE,
+        last_seen_day DATE,
+        sort_rank INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS data_bounds (
+        bounds_id INTEGER PRIMARY KEY,
+        min_day DATE,
+        max_day DATE,
+        total_reviews BIGINT,
+        refreshed_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        path VARCHAR PRIMARY KEY,
+        size_bytes BIGINT,
+        mtime_ns BIGINT,
+        run_id VARCHAR,
+        batch_reviews BIGINT,
+        ingested_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS lakehouse_partitions (
+        dataset VARCHAR,
+        partition_value VARCHAR,
+        row_count BIGINT,
+        fingerprint UBIGINT,
+        exported_at TIMESTAMP,
+        PRIMARY KEY (dataset, partition_value)
+    )
+    """,
+)
+
+
+# (table, column, ENUM type): converted in place on databases that still store the column as VARCHAR.
+ENCODED_COLUMNS: tuple[tuple[str, str, str], ...] = (
+    ("reviews_wide", "sentiment_label", "sentiment_label_t"),
+    ("reviews_wide", "severity_band", "severity_band_t"),
+)
+
+# Rows per UPDATE in a backfill: large tables are rewritten in bounded, separately committed chunks rather than one
+# transaction holding every old row version.
+BACKFILL_BATCH_ROWS = max(1, int(os.getenv("MIGRATION_BACKFILL_BATCH_ROWS", "250000")))
+
+CREATE_SCHEMA_MIGRATIONS = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR,
+        applied_at TIMESTAMP,
+        duration_seconds DOUBLE
+    )
+"""
+
+
+def _backfill(conn, table: str, assignments: str, predicate: str) -> int:
+    """UPDATE `table` SET `assignments` WHERE `predicate`, one rowid range per statement; returns rows updated."""
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0]
+    updated = 0
+    for start in range(0, (max_rowid or -1) + 1, BACKFILL_BATCH_ROWS):
+        updated += conn.execute(
+            f"UPDATE {table} SET {assignments} WHERE rowid >= ? AND rowid < ? AND ({predicate})",
+            [start, start + BACKFILL_BATCH_ROWS],
+        ).fetchone()[0]
+    return updated
+
+
+def _create_base_tables(conn) -> None:
+    for statement in (*BASE_TYPES_V1, *BASE_TABLES_V1):
+        conn.execute(statement)
+
+
+def _add_review_days(conn) -> None:
+    conn.execute("ALTER TABLE reviews_raw ADD COLUMN IF NOT EXISTS day DATE")
+    conn.execute("ALTER TABLE reviews_raw ADD COLUMN IF NOT EXISTS week DATE")
+    _backfill(
+        conn,
+        "reviews_raw",
+        "day = CAST(at_ts AS DATE), week = CAST(date_trunc('week', at_ts) AS DATE)",
+        "day IS NULL AND at_ts IS NOT NULL",
+    )
+
+
+def _encode_reviews_wide(conn) -> None:
+    conn.execute("ALTER TABLE reviews_wide ADD COLUMN IF NOT EXISTS issue_labels VARCHAR[]")
+    _backfill(conn, "reviews_wide", f"issue_labels = {ISSUE_LABELS_EXPR}", "issue_labels IS NULL")
+    for table, column, type_name in ENCODED_COLUMNS:
+        row = conn.execute(
+            "SELECT data_type FROM duckdb_columns() WHERE schema_name = 'main' AND table_name = ? AND column_name = ?",
+            [table, column],
+        ).fetchone()
+        if row is not None and row[0] == "VARCHAR":
+            conn.execute(f"ALTER TABLE {table} ALTER {column} TYPE {type_name}")
+
+
+def _publish_reviews_wide(conn) -> None:
+    # Every reader uses reviews_wide. Databases that held reviews before it existed would otherwise show nothing until
+    # 06_aggregates_daily reruns.
+    has_rows = conn.execute(
+        "SELECT NOT EXISTS (SELECT 1 FROM reviews_wide) AND EXISTS (SELECT 1 FROM reviews_raw)"
+    ).fetchone()[0]
+    if has_rows:
+        refresh_reviews_wide(conn)
+
+
+# (version, name, migrate(conn)), applied in order and recorded in schema_migrations. Append new versions; never edit
+# or renumber applied ones. Each must be idempotent: databases created before schema_migrations existed run them all
+# once, against tables that may already have the change.
+MIGRATIONS: tuple[tuple[int, str, Callable[[Any], None]], ...] = (
+    (1, "base tables", _create_base_tables),
+    (2, "reviews_raw day and week", _add_review_days),
+    (3, "reviews_wide encoded labels", _encode_reviews_wide),
+    (4, "publish reviews_wide", _publish_reviews_wide),
 )
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations() -> list[int]:
+    """Apply pending migrations in version order; returns the versions applied.
+
+    Run once per deploy (scripts/run_*.sh do); stages and the app only check the version with check_schema().
+    """
+    applied: list[int] = []
+    with get_connection() as conn:
+        conn.execute(CREATE_SCHEMA_MIGRATIONS)
+        done = {row[0] for row in conn.execute("SELECT version FROM schema_migrations").fetchall()}
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            started = time.perf_counter()
+            migrate(conn)
+            duration = time.perf_counter() - started
+            conn.execute(
+                """
+                INSERT INTO schema_migrations (version, name, applied_at, duration_seconds)
+                VALUES (?, ?, CAST(current_timestamp AS TIMESTAMP), ?)
+                """,
+                [version, name, duration],
+            )
+            print(f"[migrations] applied {version:03d} {name} in {duration:.2f}s")
+            applied.append(version)
+    return applied
 
 
-def run_migrations() -> None:
+def check_schema() -> None:
+    """Raise unless every migration has been applied: one SELECT in place of the per-stage DDL."""
     with get_connection() as conn:
-        for statement in CREATE_TABLE_STATEMENTS:
-            conn.execute(statement)
+        try:
+            current = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()[0]
+        except duckdb.CatalogException:
+            current = None
+    if current is None or current < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {current or 0}, expected {SCHEMA_VERSION}: "
+            "run `python pipeline/migrations.py`"
+        )
 
 
 def main() -> None:
-    run_migrations()
-    print("[migrations] ensured tables: reviews_raw, reviews_enriched, daily_aggregates, version_aggregates, insight_reports")
+    applied = run_migrations()
+    if applied:
+        print(f"[migrations] schema at version {SCHEMA_VERSION} (applied {', '.join(map(str, applied))})")
+    else:
+        print(f"[migrations] schema at version {SCHEMA_VERSION}; nothing to apply")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# Profiles live in their own file: the dashboard only holds read-only connections to the main database,
+# and a pipeline stage holds its write lock, so neither could insert into it while a slow query is captured.
+PROFILE_DB_PATH = Path(os.getenv("QUERY_PROFILE_DB_PATH", str(ROOT_DIR / "data" / "db" / "query_profiles.duckdb")))
+MAX_PARAMS_CHARS = 2000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WRITE_LOCK = threading.Lock()
+
+CREATE_QUERY_PROFILES = """
+    CREATE TABLE IF NOT EXISTS query_profiles (
+        captured_at TIMESTAMP,
+        query_hash VARCHAR,
+        source VARCHAR,
+        sql_text VARCHAR,
+        params_json VARCHAR,
+        elapsed_ms DOUBLE,
+        rows_returned BIGINT,
+        rows_scanned BIGINT,
+        profile_json VARCHAR
+    )
+"""
+
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def query_hash(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
+
+
+def record_slow_query(
+    sql: str,
+    parameters: Any,
+    elapsed_seconds: float,
+    profile_json: str | None,
+    source: str,
+) -> None:
+    """Store one slow statement with its DuckDB JSON profile; failures are swallowed."""
+    rows_returned = rows_scanned = None
+    if profile_json:
+        try:
+            profile = json.loads(profile_json)
+            rows_returned = profile.get("rows_returned")
+            rows_scanned = profile.get("cumulative_rows_scanned")
+        except (json.JSONDecodeError, AttributeError):
+            pass
+
+    params_json = json.dumps(parameters, default=str)[:MAX_PARAMS_CHARS] if parameters is not None else None
+    row = [
+        datetime.now(tz=timezone.utc).replace(tzinfo=None),
+        query_hash(sql),
+        source,
+        normalize_sql(sql),
+        params_json,
+        round(elapsed_seconds * 1000.0, 3),
+        rows_returned,
+        rows_scanned,
+        profile_json,
+    ]
+    try:
+        with _WRITE_LOCK:
+            PROFILE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with duckdb.connect(str(PROFILE_DB_PATH)) as conn:
+                conn.execute(CREATE_QUERY_PROFILES)
+                conn.execute("INSERT INTO query_profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+    except Exception:  # noqa: BLE001
+        # Another process may hold the profile database; losing a sample beats failing the query.
+        return
+
+
+def slowest_queries(limit: int = 50) -> list[dict[str, Any]]:
+    """Slow statements grouped by normalized SQL, slowest first."""
+    if not PROFILE_DB_PATH.exists():
+        return []
+    try:
+        with _WRITE_LOCK, duckdb.connect(str(PROFILE_DB_PATH)) as conn:
+            conn.execute(CREATE_QUERY_PROFILES)
+            rows = conn.execute(
+                """
+                SELECT
+                    query_hash,
+                    ANY_VALUE(source) AS source,
+                    COUNT(*) AS captures,
+                    ROUND(MAX(elapsed_ms), 2) AS max_ms,
+                    ROUND(AVG(elapsed_ms), 2) AS avg_ms,
+                    MAX(rows_scanned) AS max_rows_scanned,
+                    MAX(captured_at) AS last_captured_at,
+                    ANY_VALUE(sql_text) AS sql_text
+                FROM query_profiles
+                GROUP BY query_hash
+                ORDER BY max_ms DESC
+                LIMIT ?
+                """,
+                [limit],
+            ).fetchall()
+    except Exception:  # noqa: BLE001
+        return []
+
+    columns = ["query_hash", "source", "captures", "max_ms", "avg_ms", "max_rows_scanned", "last_captured_at", "sql_text"]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def latest_profile(query_hash_value: str) -> dict[str, Any] | None:
+    """The slowest captured profile for one query hash, with its parameters."""
+    if not PROFILE_DB_PATH.exists() or not query_hash_value:
+        return None
+    try:
+        with _WRITE_LOCK, duckdb.connect(str(PROFILE_DB_PATH)) as conn:
+            conn.execute(CREATE_QUERY_PROFILES)
+            row = conn.execute(
+                """
+                SELECT sql_text, params_json, elapsed_ms, profile_json
+                FROM query_profiles
+                WHERE query_hash = ?
+                ORDER BY elapsed_ms DESC
+                LIMIT 1
+                """,
+                [query_hash_value.strip()],
+            ).fetchone()
+    except Exception:  # noqa: BLE001
+        return None
+    if row is None:
+        return None
+
+    sql_text, params_json, elapsed_ms, profile_json = row
+    return {
+        "sql": sql_text,
+        "params": json.loads(params_json) if params_json else None,
+        "elapsed_ms": elapsed_ms,
+        "profile": json.loads(profile_json) if profile_json else None,
+    }
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType
+
+if __package__ in {None, ""}:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pipeline import instrumentation
+from pipeline.db import get_connection
+from pipeline.migrations import check_schema
+
+
+PIPELINE_DIR = Path(__file__).resolve().parent
+WATCH_DIR = Path(os.getenv("WATCH_INPUT_DIR", "data/input"))
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "5"))
+# Bounded so a burst of shards cannot pile up unbounded: once full, the scanner blocks until a batch drains it.
+WATCH_QUEUE_SIZE = int(os.getenv("WATCH_QUEUE_SIZE", "256"))
+WATCH_BATCH_FILES = int(os.getenv("WATCH_BATCH_FILES", "32"))
+# After the first file of a batch arrives, wait this long for more before ingesting.
+WATCH_BATCH_WAIT_SECONDS = float(os.getenv("WATCH_BATCH_WAIT_SECONDS", "2"))
+# A failed batch (lock conflict, Ollama down, a stage error) is retried after WATCH_RETRY_SECONDS, doubling per attempt;
+# after WATCH_MAX_ATTEMPTS its files wait until they change.
+WATCH_RETRY_SECONDS = float(os.getenv("WATCH_RETRY_SECONDS", "30"))
+WATCH_MAX_ATTEMPTS = int(os.getenv("WATCH_MAX_ATTEMPTS", "5"))
+
+# Run after 00_ingest on the batch's review ids only; the placeholder stages (05, 08, 09) stay batch-only.
+INCREMENTAL_STAGES: tuple[str, ...] = (
+    "01_normalize",
+    "02_enrich_sentiment",
+    "03_enrich_issues",
+    "04_score_severity",
+    "06_aggregates_daily",
+    "07_aggregates_version",
+)
+# Run after each batch without a scope; they find what changed themselves.
+POST_BATCH_STAGES: tuple[str, ...] = ("10_export_lakehouse",)
+
+# (size_bytes, mtime_ns): a file is re-ingested when either changes.
+FileStamp = tuple[int, int]
+
+_STAGE_MODULES: dict[str, ModuleType] = {}
+
+
+def _stage(name: str) -> ModuleType:
+    module = _STAGE_MODULES.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(f"pipeline_{name}", PIPELINE_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        _STAGE_MODULES[name] = module
+    return module
+
+
+def _stamp(path: Path) -> FileStamp:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class IngestWatcher:
+    """Poll a drop folder and ingest new files as micro-batches, then enrich and aggregate only their reviews.
+
+    A scanner thread feeds a bounded queue; the calling thread drains it in batches of up to `batch_files`.
+    """
+
+    def __init__(
+        self,
+        directory: Path = WATCH_DIR,
+        poll_seconds: float = WATCH_POLL_SECONDS,
+        queue_size: int = WATCH_QUEUE_SIZE,
+        batch_files: int = WATCH_BATCH_FILES,
+        batch_wait_seconds: float = WATCH_BATCH_WAIT_SECONDS,
+        retry_seconds: float = WATCH_RETRY_SECONDS,
+        max_attempts: int = WATCH_MAX_ATTEMPTS,
+    ) -> None:
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self.batch_files = batch_files
+        self.batch_wait_seconds = batch_wait_seconds
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.queue: queue.Queue[tuple[Path, FileStamp]] = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Files already ingested, or that failed max_attempts times, at this stamp; both wait for the file to change.
+        self._done: dict[Path, FileStamp] = {}
+        # Files whose batch failed: (stamp, attempts so far, monotonic time of the next retry).
+        self._failed: dict[Path, tuple[FileStamp, int, float]] = {}
+        self._in_flight: set[Path] = set()
+        self._previous_scan: dict[Path, FileStamp] = {}
+
+    def load_state(self) -> None:
+        check_schema()
+        with get_connection() as conn:
+            rows = conn.execute("SELECT path, size_bytes, mtime_ns FROM ingested_files").fetchall()
+        with self._lock:
+            self._done = {Path(path): (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def scan(self) -> int:
+        """Queue files that are new or changed and unchanged since the previous scan; returns how many."""
+        ingest = _stage("00_ingest")
+        current: dict[Path, FileStamp] = {}
+        queued = 0
+        for path in sorted(self.directory.rglob("*")):
+            if not ingest._is_input_file(path):
+                continue
+            try:
+                stamp = _stamp(path)
+            except OSError:
+                continue
+            current[path] = stamp
+            with self._lock:
+                skip = self._done.get(path) == stamp or path in self._in_flight or self._backing_off(path, stamp)
+            # A file still being written changes between scans; it is picked up once it holds still.
+            if skip or self._previous_scan.get(path) != stamp:
+                continue
+            if not self._put((path, stamp)):
+                break
+            queued += 1
+        self._previous_scan = current
+        return queued
+
+    def _backing_off(self, path: Path, stamp: FileStamp) -> bool:
+        failed = self._failed.get(path)
+        return failed is not None and failed[0] == stamp and time.monotonic() < failed[2]
+
+    def _put(self, item: tuple[Path, FileStamp]) -> bool:
+        with self._lock:
+            self._in_flight.add(item[0])
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=self.poll_seconds)
+                return True
+            except queue.Full:
+                continue
+        with self._lock:
+            self._in_flight.discard(item[0])
+        return False
+
+    def next_batch(self, timeout: float | None = None) -> list[tuple[Path, FileStamp]]:
+        """Block for the first queued file, then collect more for up to `batch_wait_seconds`."""
+        batch = [self.queue.get(timeout=timeout)]
+        deadline = time.monotonic() + self.batch_wait_seconds
+        while len(batch) < self.batch_files:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def process_batch(self, batch: list[tuple[Path, FileStamp]]) -> list[str]:
+        """Ingest one micro-batch and run the incremental stages on its review ids."""
+        run_id = instrumentation.new_run_id()
+        instrumentation.set_run_id(run_id)
+        started = time.perf_counter()
+        review_ids: list[str] = []
+        succeeded = False
+        try:
+            inputs = [(path.name.split(".", 1)[0], path) for path, _stamp in batch]
+            # Micro-batches are small and mostly recent, so they land in the newest row groups anyway; rewriting the
+            # whole table per batch would cost far more than it saves.
+            review_ids = _stage("00_ingest").main(inputs, return_ids=True, cluster=False)
+            if review_ids:
+                for name in INCREMENTAL_STAGES:
+                    _stage(name).main(review_ids=review_ids)
+                for name in POST_BATCH_STAGES:
+                    _stage(name).main()
+            self._record(batch, run_id, len(review_ids))
+            succeeded = True
+        except Exception as exc:  # noqa: BLE001
+            print(f"[watch_ingest] batch {run_id} failed ({len(batch)} files): {exc}")
+        finally:
+            with self._lock:
+                for path, stamp in batch:
+                    self._in_flight.discard(path)
+                    if succeeded:
+                        self._done[path] = stamp
+                        self._failed.pop(path, None)
+                    else:
+                        self._mark_failed(path, stamp)
+
+        print(
+            f"[watch_ingest] batch {run_id}: files={len(batch)}, reviews={len(review_ids)}, "
+            f"seconds={time.perf_counter() - started:.2f}, queued={self.queue.qsize()}"
+        )
+        return review_ids
+
+    def _mark_failed(self, path: Path, stamp: FileStamp) -> None:
+        """Schedule a retry with exponential backoff; caller holds the lock."""
+        previous = self._failed.get(path)
+        attempts = previous[1] + 1 if previous is not None and previous[0] == stamp else 1
+        if attempts >= self.max_attempts:
+            print(f"[watch_ingest] giving up on {path} after {attempts} attempts until it changes")
+            self._failed.pop(path, None)
+            self._done[path] = stamp
+            return
+        retry_at = time.monotonic() + self.retry_seconds * 2 ** (attempts - 1)
+        self._failed[path] = (stamp, attempts, retry_at)
+
+    @staticmethod
+    def _record(batch: list[tuple[Path, FileStamp]], run_id: str, review_count: int) -> None:
+        with get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO ingested_files (path, size_bytes, mtime_ns, run_id, batch_reviews, ingested_at)
+                VALUES (?, ?, ?, ?, ?, CAST(current_timestamp AS TIMESTAMP))
+                """,
+                [[str(path), size, mtime_ns, run_id, review_count] for path, (size, mtime_ns) in batch],
+            )
+
+    def _scan_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[watch_ingest] scan failed: {exc}")
+            self._stop.wait(self.poll_seconds)
+
+    def run(self) -> None:
+        """Scan and ingest until stop() is called (or Ctrl-C)."""
+        self.load_state()
+        scanner = threading.Thread(target=self._scan_loop, name="watch-ingest-scan", daemon=True)
+        scanner.start()
+        print(f"[watch_ingest] watching {self.directory} every {self.poll_seconds:g}s")
+        try:
+            while not self._stop.is_set():
+                try:
+                    batch = self.next_batch(timeout=self.poll_seconds)
+                except queue.Empty:
+                    continue
+                self.process_batch(batch)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            scanner.join(timeout=self.poll_seconds)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main() -> None:
+    WATCH_DIR.mkdir(parents=True, exist_ok=True)
+    IngestWatcher().run()
+
+
+if __name__ == "__main__":
+    main()
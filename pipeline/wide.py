@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from pipeline.incremental import review_scope
+
+
+# issues_json's labels as a list column: readers UNNEST or list_contains it instead of parsing JSON on every row.
+ISSUE_LABELS_EXPR = (
+    "list_filter(CAST(json_extract_string(COALESCE(issues_json, '[]'), '$[*].label') AS VARCHAR[]), "
+    "label -> label IS NOT NULL)"
+)
+
+# `reviews_raw r JOIN reviews_enriched e` in reviews_wide's column order; sentiment_label and severity_band are cast
+# to their ENUM types on insert.
+WIDE_SELECT = f"""
+    SELECT r.*, e.* EXCLUDE (review_id), {ISSUE_LABELS_EXPR} AS issue_labels
+    FROM reviews_raw r
+    JOIN reviews_enriched e USING (review_id)
+"""
+WIDE_ORDER = "at_ts NULLS LAST, review_id"
+
+
+def refresh_reviews_wide(conn: Any, review_ids: Iterable[str] | None = None) -> int:
+    """Republish reviews_wide from reviews_raw and reviews_enriched; returns the rows written.
+
+    A full refresh rewrites the table sorted by at_ts so row groups stay date-clustered. With `review_ids` only those
+    reviews are replaced; they are appended sorted, which for a recent micro-batch keeps the tail clustered too.
+    """
+    scope = review_scope(conn, review_ids)
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(f"DELETE FROM reviews_wide WHERE {scope}")
+        row_count = conn.execute(
+            f"INSERT INTO reviews_wide SELECT * FROM ({WIDE_SELECT} WHERE {scope}) AS w ORDER BY {WIDE_ORDER}"
+        ).fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return row_count
@@ -8,4 +8,7 @@ if [[ -x ".venv/bin/python" ]]; then
   PYTHON_BIN=".venv/bin/python"
 fi
 
+# Schema changes are applied here, once per start, rather than on every report lookup. A running pipeline stage holds
+# the database lock; the app still starts and reads the schema as it is.
+"$PYTHON_BIN" pipeline/migrations.py || echo "[run_app] database busy: migrations skipped"
 "$PYTHON_BIN" -m app.gradio_app
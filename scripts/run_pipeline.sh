@@ -6,6 +6,9 @@ if [[ -x ".venv/bin/python" ]]; then
   PYTHON_BIN=".venv/bin/python"
 fi
 
+# One run id shared by every stage so pipeline_runs rows and the JSON-lines log group per invocation.
+export PIPELINE_RUN_ID="${PIPELINE_RUN_ID:-$(date -u +%Y%m%dT%H%M%SZ)-$$}"
+
 "$PYTHON_BIN" pipeline/migrations.py
 "$PYTHON_BIN" pipeline/00_ingest.py
 "$PYTHON_BIN" pipeline/01_normalize.py
@@ -15,3 +18,4 @@ fi
 "$PYTHON_BIN" pipeline/05_user_churn.py
 "$PYTHON_BIN" pipeline/06_aggregates_daily.py
 "$PYTHON_BIN" pipeline/07_aggregates_version.py
+"$PYTHON_BIN" pipeline/10_export_lakehouse.py
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.services.search_service as search_service
+import pipeline.db as pipeline_db
+from pipeline.dimensions import refresh_dimensions
+from pipeline.migrations import run_migrations
+
+
+def test_filter_options_match_between_scans_and_dimensions(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(search_service, "DUCKDB_PATH", db_path)
+    run_migrations()
+
+    with pipeline_db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reviews_raw (review_id, score, at_ts, app_version) VALUES (?, ?, ?, ?)",
+            [["r1", 1, "2024-01-03 10:00:00", "1.0"], ["r2", 5, "2024-02-10 12:00:00", "1.1"]],
+        )
+        conn.executemany(
+            "INSERT INTO reviews_enriched (review_id, category_taxonomy, issues_json) VALUES (?, ?, ?)",
+            [["r1", "Bug", '[{"label": "crash"}, {"label": "login"}]'], ["r2", None, "[]"]],
+        )
+        conn.executemany(
+            "INSERT INTO version_aggregates (app_version, last_seen_day, total_reviews) VALUES (?, ?, ?)",
+            [["1.0", "2024-01-03", 1], ["1.1", "2024-02-10", 1]],
+        )
+
+    scanned = search_service.get_filter_options()
+    assert scanned == {
+        "min_day": "2024-01-03",
+        "max_day": "2024-02-10",
+        "categories": ["Bug", "Other"],
+        "versions": ["1.1", "1.0"],
+        "issue_labels": ["crash", "login"],
+    }
+
+    with pipeline_db.get_connection() as conn:
+        counts = refresh_dimensions(conn)
+        # Prove the app reads the dimension tables rather than rescanning.
+        conn.execute("DELETE FROM reviews_enriched")
+    assert counts == {"dim_category": 2, "dim_issue_label": 2, "dim_version": 2, "data_bounds": 1}
+    assert search_service.get_filter_options() == scanned
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from pipeline.migrations import run_migrations
+
+CSV_TEXT = """reviewId,userName,content,score,thumbsUpCount,reviewCreatedVersion,at,appVersion,category
+r1,Ann, Crashes on login ,1,3,1.0,2024-01-03 10:00:00,1.0,Bugs
+r2,Bob,Great app,5,,1.1,2024-02-10,1.1,
+r2,Bob,Great app v2,4,1,1.1,2024-02-11 08:30,1.1,Praise
+"""
+TYPED_SELECT = """
+    SELECT reviewId, userName, content, TRY_CAST(score AS INTEGER) AS score,
+           TRY_CAST(thumbsUpCount AS BIGINT) AS thumbsUpCount, reviewCreatedVersion,
+           COALESCE(TRY_STRPTIME("at", '%Y-%m-%d %H:%M:%S'), TRY_STRPTIME("at", '%Y-%m-%d %H:%M'),
+                    TRY_STRPTIME("at", '%Y-%m-%d')) AS "at",
+           appVersion, category
+    FROM read_csv(?, header=true, all_varchar=true)
+"""
+
+
+def _load_ingest_module():
+    spec = importlib.util.spec_from_file_location("pipeline_00_ingest", ROOT_DIR / "pipeline" / "00_ingest.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _ingest(tmp_path: Path, monkeypatch, input_path: Path) -> list[tuple]:
+    ingest = _load_ingest_module()
+    db_path = tmp_path / f"{input_path.name}.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    monkeypatch.setattr(ingest, "CSV_FILES", (("fixture", input_path),))
+    run_migrations()
+    ingest.main()
+    with duckdb.connect(str(db_path), read_only=True) as conn:
+        return conn.execute("SELECT * FROM reviews_raw ORDER BY review_id").fetchall()
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".ndjson.gz", ".csv.zst", ".feather"])
+def test_typed_and_compressed_inputs_match_csv(tmp_path, monkeypatch, suffix) -> None:
+    csv_path = tmp_path / "reviews.csv"
+    csv_path.write_text(CSV_TEXT, encoding="utf-8")
+    expected = _ingest(tmp_path, monkeypatch, csv_path)
+    assert [row[0] for row in expected] == ["r1", "r2"]
+    assert expected[0][2] == "Crashes on login"
+
+    input_path = tmp_path / f"reviews{suffix}"
+    with duckdb.connect() as conn:
+        if suffix == ".feather":
+            import pyarrow.feather as feather
+
+            feather.write_feather(conn.execute(TYPED_SELECT, [str(csv_path)]).to_arrow_table(), str(input_path))
+        elif suffix == ".csv.zst":
+            conn.execute(f"COPY (SELECT * FROM read_csv(?, all_varchar=true)) TO '{input_path}' (FORMAT csv, HEADER, COMPRESSION zstd)", [str(csv_path)])
+        else:
+            file_format = "parquet" if suffix == ".parquet" else "json"
+            conn.execute(f"COPY ({TYPED_SELECT}) TO '{input_path}' (FORMAT {file_format})", [str(csv_path)])
+
+    assert _ingest(tmp_path, monkeypatch, input_path) == expected
+
+
+def test_directory_of_shards_is_grouped_by_schema(tmp_path, monkeypatch) -> None:
+    csv_path = tmp_path / "reviews.csv"
+    csv_path.write_text(CSV_TEXT, encoding="utf-8")
+    expected = _ingest(tmp_path, monkeypatch, csv_path)
+
+    header, *rows = CSV_TEXT.splitlines()
+    shard_dir = tmp_path / "shards"
+    (shard_dir / "hour=01").mkdir(parents=True)
+    (shard_dir / "hour=01" / "part-0.csv").write_text("\n".join([header, rows[0]]) + "\n", encoding="utf-8")
+    (shard_dir / "hour=01" / "part-1.csv").write_text("\n".join([header, rows[1]]) + "\n", encoding="utf-8")
+    # Same data under alias headers: a second schema group with its own mapping.
+    alias_header = "id,user,review,rating,helpful_count,reviewversion,created_at,version,topic"
+    (shard_dir / "part-2.csv").write_text("\n".join([alias_header, rows[2]]) + "\n", encoding="utf-8")
+    (shard_dir / "README.md").write_text("not an input", encoding="utf-8")
+
+    ingest = _load_ingest_module()
+    files = ingest._expand_inputs([("shards", shard_dir)])
+    assert [path.name for _, path in files] == ["part-0.csv", "part-1.csv", "part-2.csv"]
+    assert [len(members) for members in ingest._group_inputs(duckdb.connect(), files).values()] == [2, 1]
+    assert ingest._expand_inputs([("shards", shard_dir / "hour=*" / "*.csv")]) == files[:2]
+
+    assert _ingest(tmp_path, monkeypatch, shard_dir) == expected
+
+
+def test_reviews_are_clustered_by_time_with_stored_day(tmp_path, monkeypatch) -> None:
+    header = CSV_TEXT.splitlines()[0]
+    csv_path = tmp_path / "reviews.csv"
+    csv_path.write_text(
+        "\n".join(
+            [
+                header,
+                "r3,Cy,Late,3,0,1.2,2024-03-06 23:59:59,1.2,Bugs",
+                "r1,Ann,Early,1,0,1.0,2024-01-01 00:00:01,1.0,Bugs",
+                "r2,Bob,Middle,5,0,1.1,2024-02-01 12:00:00,1.1,Praise",
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    _ingest(tmp_path, monkeypatch, csv_path)
+    _load_ingest_module().cluster_main()
+
+    with duckdb.connect(str(pipeline_db.DB_PATH), read_only=True) as conn:
+        rows = conn.execute(
+            "SELECT review_id, CAST(day AS VARCHAR), CAST(week AS VARCHAR) FROM reviews_raw ORDER BY rowid"
+        ).fetchall()
+        constraints = conn.execute(
+            "SELECT constraint_type FROM duckdb_constraints() WHERE table_name = 'reviews_raw'"
+        ).fetchall()
+    assert rows == [
+        ("r1", "2024-01-01", "2024-01-01"),
+        ("r2", "2024-02-01", "2024-01-29"),
+        ("r3", "2024-03-06", "2024-03-04"),
+    ]
+    assert ("PRIMARY KEY",) in constraints
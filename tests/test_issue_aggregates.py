@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.gradio_app as gradio_app
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from pipeline.migrations import run_migrations
+
+# What the aggregate replaces: every review's issues_json parsed on each read.
+DIRECT_COUNTS = """
+    SELECT
+        r.day,
+        json_extract_string(j.value, '$.label') AS issue_label,
+        COUNT(*) AS review_count,
+        SUM(COALESCE(e.severity_score, 0.0)) AS weighted_severity
+    FROM reviews_enriched e
+    JOIN reviews_raw r USING (review_id),
+         json_each(e.issues_json) AS j
+    GROUP BY 1, 2
+"""
+
+
+def _load_stage(name: str):
+    spec = importlib.util.spec_from_file_location(f"pipeline_{name}", ROOT_DIR / "pipeline" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _issues(*labels: str) -> str:
+    return json.dumps([{"label": label, "confidence": 0.8, "evidence": []} for label in labels])
+
+
+def _aggregates(conn) -> list[tuple]:
+    return conn.execute(
+        """
+        SELECT day, issue_label, review_count, ROUND(weighted_severity, 6)
+        FROM daily_issue_aggregates
+        ORDER BY 1, 2
+        """
+    ).fetchall()
+
+
+def _direct(conn) -> list[tuple]:
+    return conn.execute(
+        f"SELECT day, issue_label, review_count, ROUND(weighted_severity, 6) FROM ({DIRECT_COUNTS}) ORDER BY 1, 2"
+    ).fetchall()
+
+
+def test_daily_issue_aggregates_match_a_direct_count(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(gradio_app, "DUCKDB_PATH", db_path)
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    run_migrations()
+    labels = ("Glitches/Bugs", "Login/Auth Issues", "Performance Issues", "Customer Support", "Feature Requests")
+    reviews = []
+    for idx in range(60):
+        day = f"2024-01-{idx % 6 + 1:02d}"
+        # More than five labels a day: per-day top-5 merging would have dropped some of them.
+        picked = [labels[(idx + step) % len(labels)] for step in range(idx % 3)] + [f"Rare {idx % 7}"] * (idx % 2)
+        reviews.append((f"r{idx:02d}", f"{day} 10:00:00", day, _issues(*picked), (idx % 10) / 10))
+    reviews.append(("gone", "2024-01-01 12:00:00", "2024-01-01", _issues("Glitches/Bugs", "Withdrawn Label"), 0.5))
+    with pipeline_db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reviews_raw (review_id, score, at_ts, day) VALUES (?, 3, ?, ?)",
+            [[review_id, at, day] for review_id, at, day, _issues_json, _severity in reviews],
+        )
+        conn.executemany(
+            "INSERT INTO reviews_enriched (review_id, issues_json, severity_score) VALUES (?, ?, ?)",
+            [[review_id, issues_json, severity] for review_id, _at, _day, issues_json, severity in reviews],
+        )
+
+    stage = _load_stage("06_aggregates_daily")
+    stage.main()
+    with pipeline_db.get_connection() as conn:
+        aggregates, direct = _aggregates(conn), _direct(conn)
+        ranking = conn.execute(
+            f"""
+            SELECT issue_label, SUM(review_count) AS review_count, SUM(weighted_severity) AS weighted_severity
+            FROM ({DIRECT_COUNTS})
+            WHERE day BETWEEN DATE '2024-01-02' AND DATE '2024-01-05'
+            GROUP BY 1
+            ORDER BY weighted_severity DESC, review_count DESC, issue_label
+            LIMIT 8
+            """
+        ).fetchall()
+    assert aggregates == direct and len({row[1] for row in aggregates}) > 5
+
+    top = gradio_app._get_top_issues("2024-01-02", "2024-01-05", top_n=8)
+    assert list(top.itertuples(index=False, name=None)) == [
+        (label, int(count), round(severity, 3)) for label, count, severity in ranking
+    ]
+
+    # Only "gone" carries this label; once it is reclassified the recomputed day drops the label's row.
+    assert "Withdrawn Label" in {row[1] for row in aggregates}
+    with pipeline_db.get_connection() as conn:
+        conn.execute("UPDATE reviews_enriched SET issues_json = ? WHERE review_id = 'gone'", [_issues("Glitches/Bugs")])
+    stage.main(review_ids=["gone"])
+    with pipeline_db.get_connection() as conn:
+        aggregates, direct = _aggregates(conn), _direct(conn)
+    assert aggregates == direct
+    assert "Withdrawn Label" not in {row[1] for row in aggregates}
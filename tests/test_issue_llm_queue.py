@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from llm.json_enforcer import build_jsonschema_validator, load_json_schema
+from llm.prompt_loader import load_prompt_sections
+from llm.token_budget import estimate_tokens
+from pipeline.migrations import run_migrations
+
+
+def _load_stage(name: str):
+    spec = importlib.util.spec_from_file_location(f"pipeline_{name}", ROOT_DIR / "pipeline" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+issues = _load_stage("03_enrich_issues")
+
+# No rule matches these, so every review is queued for the LLM pass ("no_labels").
+CONTENT = "Average experience overall"
+
+
+@pytest.fixture()
+def queue_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    run_migrations()
+    with pipeline_db.get_connection() as conn:
+        ids = [[f"r{idx}"] for idx in range(1, 5)]
+        conn.executemany(f"INSERT INTO reviews_raw (review_id, content) VALUES (?, '{CONTENT}')", ids)
+        conn.executemany("INSERT INTO reviews_enriched (review_id) VALUES (?)", ids)
+    return tmp_path
+
+
+def _fake_llm(calls: list[str], fail_ids: set[str]):
+    """Stands in for call_json_with_retry: answers every review with a malformed issue list, validated as usual."""
+
+    def _call(model, system, user, schema_validator, num_predict=None):
+        start = user.index('{"allowed_labels"')
+        reviews = json.JSONDecoder().raw_decode(user[start:])[0]["reviews"]
+        review_ids = [review["review_id"] for review in reviews]
+        calls.extend(review_ids)
+        if fail_ids & set(review_ids):
+            raise RuntimeError("ollama unavailable")
+        payload = {
+            "results": [
+                {
+                    "review_id": review_id,
+                    "issues": [
+                        {"label": " ui/ux problems ", "confidence": 1.7, "evidence": "not a list"},
+                        {"label": "Made Up", "confidence": 0.5},
+                    ],
+                }
+                for review_id in review_ids
+            ]
+        }
+        schema_validator(payload)
+        return payload
+
+    return _call
+
+
+def test_budget_stops_selection_at_the_token_limit(queue_db) -> None:
+    with pipeline_db.get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO issue_llm_queue (review_id, reason, status, attempts, est_tokens, enqueued_at)
+            VALUES (?, 'no_labels', ?, 0, 100, TIMESTAMP '2024-01-01' + ? * INTERVAL 1 MINUTE)
+            """,
+            [["r4", "pending", 0], ["r1", "done", 1], ["r2", "pending", 2], ["r3", "pending", 3]],
+        )
+        assert issues._select_budgeted_work(conn, 219, 10) == [("r4", CONTENT, None)]
+        selected = issues._select_budgeted_work(conn, 220, 10)
+        everything = issues._select_budgeted_work(conn, 10_000, 10)
+    assert [row[0] for row in selected] == ["r4", "r2"]
+    assert [row[0] for row in everything] == ["r4", "r2", "r3"]  # done rows are never re-selected
+
+
+def test_rerun_resumes_from_the_queue_without_recalling_done_rows(queue_db, monkeypatch) -> None:
+    system_prompt, user_prompt_template = load_prompt_sections(issues.PROMPT_PATH)
+    overhead = estimate_tokens(system_prompt) + estimate_tokens(user_prompt_template)
+    cost = issues._estimate_review_tokens(CONTENT) + math.ceil(overhead / 1)
+    monkeypatch.setattr(issues, "LLM_PASS_ENABLED", True)
+    monkeypatch.setattr(issues, "LLM_BATCH_SIZE", 1)
+    monkeypatch.setattr(issues, "LLM_CONCURRENCY", 1)
+    calls: list[str] = []
+
+    # First run: the budget covers two reviews and the call for r2 fails, as if Ollama went away mid-run.
+    monkeypatch.setattr(issues, "LLM_TOKEN_BUDGET", 2 * cost)
+    monkeypatch.setattr(issues, "call_json_with_retry", _fake_llm(calls, fail_ids={"r2"}))
+    issues.main()
+    with pipeline_db.get_connection() as conn:
+        queue = conn.execute("SELECT review_id, status, attempts FROM issue_llm_queue ORDER BY review_id").fetchall()
+    assert sorted(calls) == ["r1", "r2"]
+    assert queue == [("r1", "done", 1), ("r2", "pending", 1), ("r3", "pending", 0), ("r4", "pending", 0)]
+
+    calls.clear()
+    monkeypatch.setattr(issues, "LLM_TOKEN_BUDGET", 100 * cost)
+    monkeypatch.setattr(issues, "call_json_with_retry", _fake_llm(calls, fail_ids=set()))
+    issues.main()
+    with pipeline_db.get_connection() as conn:
+        enriched = conn.execute(
+            "SELECT review_id, issues_method, issues_json FROM reviews_enriched ORDER BY review_id"
+        ).fetchall()
+        statuses = conn.execute("SELECT DISTINCT status FROM issue_llm_queue").fetchall()
+    assert sorted(calls) == ["r2", "r3", "r4"]
+    assert statuses == [("done",)]
+    # r1's LLM labels survive the rule pass that rewrote issues_json, without another call.
+    expected = [{"label": "UI/UX Problems", "confidence": 1.0, "evidence": []}]
+    assert [(row[0], row[1], json.loads(row[2])) for row in enriched] == [
+        (f"r{idx}", "hybrid", expected) for idx in range(1, 5)
+    ]
+
+
+def test_llm_issues_are_normalized_and_incomplete_batches_rejected() -> None:
+    normalized = issues._normalize_llm_issues(
+        [
+            {"label": "glitches/bugs", "confidence": 0.4, "evidence": ["crash", " ", "crash"]},
+            {"label": "Glitches/Bugs ", "confidence": 0.9, "evidence": ["freezes"]},
+            {"label": "Refund Policy", "confidence": 0.8},
+            {"label": "Login/Auth Issues", "confidence": -2},
+            {"label": "Performance Issues", "confidence": 0.5},
+            {"label": "Customer Support", "confidence": 0.5},
+            {"label": "Feature Requests", "confidence": 0.5},
+        ]
+    )
+    assert normalized[:2] == [
+        {"label": "Glitches/Bugs", "confidence": 0.9, "evidence": ["freezes"]},
+        {"label": "Login/Auth Issues", "confidence": 0.0, "evidence": []},
+    ]
+    assert len(normalized) == issues.MAX_RULE_LABELS
+
+    def _answers_one(model, system, user, schema_validator, num_predict=None):
+        payload = {"results": [{"review_id": "r1", "issues": []}]}
+        schema_validator(payload)
+        return payload
+
+    validators = [
+        build_jsonschema_validator(load_json_schema(path))
+        for path in (issues.BATCH_SCHEMA_PATH, issues.ISSUES_SCHEMA_PATH)
+    ]
+    batch = [("r1", CONTENT, None), ("r2", CONTENT, None)]
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(issues, "call_json_with_retry", _answers_one)
+        with pytest.raises(ValueError, match="Missing results for review_ids: r2"):
+            issues._classify_batch_with_llm(batch, "sys", "{{input_json}}", *validators)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import duckdb
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from pipeline.migrations import run_migrations
+from pipeline.wide import refresh_reviews_wide
+
+
+def _load_export_module():
+    spec = importlib.util.spec_from_file_location("pipeline_10_export_lakehouse", ROOT_DIR / "pipeline" / "10_export_lakehouse.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_only_changed_partitions_are_rewritten(tmp_path, monkeypatch) -> None:
+    export = _load_export_module()
+    lake = tmp_path / "lake"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    monkeypatch.setattr(export, "LAKEHOUSE_DIR", lake)
+    run_migrations()
+    with pipeline_db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reviews_raw (review_id, score, at_ts, app_version) VALUES (?, ?, ?, ?)",
+            [["r1", 1, "2024-01-03 10:00:00", "1.0"], ["r2", 5, "2024-02-10 12:00:00", "1.1"], ["r3", 4, None, "1.1"]],
+        )
+        conn.execute("UPDATE reviews_raw SET day = CAST(at_ts AS DATE), week = CAST(date_trunc('week', at_ts) AS DATE)")
+        conn.execute("INSERT INTO reviews_enriched (review_id, severity_score) SELECT review_id, 0.5 FROM reviews_raw")
+        conn.execute("INSERT INTO version_aggregates (app_version, total_reviews) VALUES ('1.0', 1), ('1.1', 2)")
+        refresh_reviews_wide(conn)
+
+    export.main()
+    reviews_dir = lake / "reviews"
+    assert sorted(path.name for path in reviews_dir.iterdir()) == ["month=2024-01", "month=2024-02", "month=unknown"]
+    # Empty aggregate tables have no partitions to write; staging and trash are cleaned up.
+    assert sorted(path.name for path in lake.iterdir()) == ["reviews", "version_aggregates"]
+    stamps = {path: path.stat().st_mtime_ns for path in reviews_dir.glob("*/*.parquet")}
+    rewritten_dir = (reviews_dir / "month=2024-02").stat().st_ino
+
+    with pipeline_db.get_connection() as conn:
+        conn.execute("UPDATE reviews_enriched SET severity_score = 0.9 WHERE review_id = 'r2'")
+        conn.execute("DELETE FROM reviews_raw WHERE review_id = 'r3'")
+        refresh_reviews_wide(conn)
+    export.main()
+
+    assert sorted(path.name for path in reviews_dir.iterdir()) == ["month=2024-01", "month=2024-02"]
+    unchanged = [path for path, stamp in stamps.items() if path.exists() and path.stat().st_mtime_ns == stamp]
+    assert [path.parent.name for path in unchanged] == ["month=2024-01"]
+    # Files are replaced inside the live directory; it is never moved away.
+    assert (reviews_dir / "month=2024-02").stat().st_ino == rewritten_dir
+    assert [path.name for path in (reviews_dir / "month=2024-02").iterdir()] == ["data_0.parquet"]
+
+    with duckdb.connect() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT month, review_id, severity_score
+            FROM read_parquet('{reviews_dir}/*/*.parquet', hive_partitioning = true)
+            ORDER BY review_id
+            """
+        ).fetchall()
+        versions = conn.execute(f"SELECT app_version FROM '{lake}/version_aggregates/*.parquet'").fetchall()
+    assert rows == [("2024-01", "r1", 0.5), ("2024-02", "r2", 0.9)]
+    assert versions == [("1.0",), ("1.1",)]
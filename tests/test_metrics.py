@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import socket
+import sys
+import urllib.request
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.metrics as metrics
+import pipeline.db as pipeline_db
+from app.metrics import (
+    DUCKDB_QUERIES,
+    Counter,
+    Histogram,
+    Registry,
+    install_query_metrics,
+    observe_handler,
+    start_metrics_server,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = Registry()
+    latency = registry.register(Histogram("demo_seconds", "Demo latency.", ("route",), buckets=(0.1, 1.0)))
+    hits = registry.register(Counter("demo_hits_total", "Demo hits.", ("result",)))
+    for seconds in (0.05, 0.5, 3.0):
+        latency.observe(seconds, route="overview")
+    hits.inc(result='a"b')
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="overview",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="overview",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="overview",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{route="overview"} 3.55' in text
+    assert 'demo_seconds_count{route="overview"} 3' in text
+    assert 'demo_hits_total{result="a\\"b"} 1' in text
+    assert "# TYPE demo_seconds histogram" in text
+
+
+def test_endpoint_serves_handler_and_query_metrics(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    install_query_metrics()
+    try:
+        before = DUCKDB_QUERIES.value(statement="select")
+
+        def _handler() -> list[tuple[int]]:
+            with pipeline_db.get_connection() as conn:
+                return conn.execute("SELECT 1").fetchall()
+
+        assert observe_handler("test_route", _handler)() == [(1,)]
+        assert DUCKDB_QUERIES.value(statement="select") == before + 1
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        server = start_metrics_server(port=port, host="127.0.0.1")
+        assert server is not None
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        pipeline_db.remove_query_observer(metrics._observe_query)
+
+    assert 'review_insights_handler_duration_seconds_count{route="test_route"} 1' in body
+    assert 'review_insights_duckdb_queries_total{statement="select"}' in body
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.services.search_service as search_service
+import pipeline.db as pipeline_db
+import pipeline.migrations as migrations
+
+
+def test_migrations_apply_once_in_order_with_batched_backfill(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_ROWS", 3)
+    with pytest.raises(RuntimeError, match="pipeline/migrations.py"):
+        migrations.check_schema()
+
+    # A database from before versioning: reviews_raw without day/week and no schema_migrations table.
+    with pipeline_db.get_connection() as conn:
+        migrations._create_base_tables(conn)
+        conn.execute("ALTER TABLE reviews_raw DROP COLUMN day")
+        conn.execute("ALTER TABLE reviews_raw DROP COLUMN week")
+        conn.execute(
+            """
+            INSERT INTO reviews_raw (review_id, at_ts)
+            SELECT 'r' || i, TIMESTAMP '2024-01-01 12:00:00' + i * INTERVAL 1 DAY FROM range(10) AS t(i)
+            """
+        )
+        conn.execute("INSERT INTO reviews_raw (review_id, at_ts) VALUES ('undated', NULL)")
+
+    assert migrations.run_migrations() == [version for version, _name, _migrate in migrations.MIGRATIONS]
+    assert migrations.run_migrations() == []
+    migrations.check_schema()
+
+    with pipeline_db.get_connection() as conn:
+        versions = conn.execute("SELECT version FROM schema_migrations ORDER BY version").fetchall()
+        missing = conn.execute("SELECT review_id FROM reviews_raw WHERE day IS NULL OR week IS NULL").fetchall()
+        last = conn.execute(
+            "SELECT CAST(day AS VARCHAR), CAST(week AS VARCHAR) FROM reviews_raw WHERE review_id = 'r9'"
+        ).fetchone()
+    assert [row[0] for row in versions] == [version for version, _name, _migrate in migrations.MIGRATIONS]
+    assert missing == [("undated",)]
+    # ENUM_TYPES is the live label domain; changing it needs a migration that recreates the type.
+    with pipeline_db.get_connection() as conn:
+        domains = {
+            type_name: tuple(conn.execute(f"SELECT enum_range(NULL::{type_name})").fetchone()[0])
+            for type_name in migrations.ENUM_TYPES
+        }
+    assert domains == migrations.ENUM_TYPES
+    assert last == ("2024-01-10", "2024-01-08")
+
+
+def test_upgrade_publishes_reviews_wide_for_existing_reviews(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(search_service, "DUCKDB_PATH", db_path)
+    # Reviews ingested and enriched before reviews_wide existed.
+    with pipeline_db.get_connection() as conn:
+        migrations._create_base_tables(conn)
+        conn.execute("DROP TABLE reviews_wide")
+        conn.execute(
+            """
+            INSERT INTO reviews_raw (review_id, content, score, at_ts, day, week, app_version) VALUES
+                ('r1', 'Crashes on start', 1, TIMESTAMP '2024-01-03 10:00:00', DATE '2024-01-03', DATE '2024-01-01', '1.0'),
+                ('r2', 'Great app', 5, TIMESTAMP '2024-01-04 09:00:00', DATE '2024-01-04', DATE '2024-01-01', '1.0')
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO reviews_enriched (review_id, category_taxonomy, sentiment_label, issues_json, severity_band)
+            VALUES ('r1', 'Bugs', 'negative', '[{"label": "crash"}]', 'high'), ('r2', 'Praise', 'positive', '[]', 'low')
+            """
+        )
+
+    migrations.run_migrations()
+
+    rows, total = search_service.search_reviews(start_date="2024-01-01", end_date="2024-01-31")
+    assert total == 2 and sorted(rows.iloc[:, 0]) == ["r1", "r2"]
+    crash_rows, crash_total = search_service.search_reviews(issue_label="crash")
+    assert crash_total == 1
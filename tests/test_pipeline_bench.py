@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.pipeline_bench import compare_results
+
+
+def _results(**stages: dict) -> dict:
+    return {"sizes": {"15000": {**stages, "_database_mb": 10.0}}}
+
+
+def _stage(wall_seconds: float, peak_rss_mb: float, returncode: int = 0) -> dict:
+    return {"wall_seconds": wall_seconds, "peak_rss_mb": peak_rss_mb, "returncode": returncode}
+
+
+BASELINE = _results(
+    **{
+        "00_ingest": _stage(2.0, 200.0),
+        "01_normalize": _stage(0.2, 150.0),
+        "02_enrich_sentiment": _stage(4.0, 300.0),
+    }
+)
+
+
+def test_changes_within_tolerance_are_not_regressions() -> None:
+    current = _results(
+        **{
+            "00_ingest": _stage(2.4, 240.0),  # +20% on both, under the 25% threshold
+            "01_normalize": _stage(0.45, 150.0),  # +125%, but below min_seconds on both sides
+            "02_enrich_sentiment": _stage(3.0, 280.0),
+        }
+    )
+    assert compare_results(current, BASELINE, threshold=0.25, min_seconds=0.5) == []
+
+
+def test_growth_over_the_threshold_and_failures_are_reported() -> None:
+    current = _results(
+        **{
+            "00_ingest": _stage(3.0, 200.0),
+            "01_normalize": _stage(0.2, 400.0),
+            "02_enrich_sentiment": _stage(1.0, 100.0, returncode=1),
+            "03_enrich_issues": _stage(9.0, 900.0),  # not in the baseline
+        }
+    )
+    current["sizes"]["15000"]["_database_mb"] = 99.0
+    assert compare_results(current, BASELINE, threshold=0.25, min_seconds=0.5) == [
+        "15000 rows 00_ingest: wall_seconds 2 -> 3 (+50%)",
+        "15000 rows 01_normalize: peak_rss_mb 150 -> 400 (+167%)",
+        "15000 rows 02_enrich_sentiment: failed with exit code 1",
+    ]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from pipeline.migrations import run_migrations
+
+
+def test_stage_run_records_steps_to_table_and_log(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    run_migrations()
+
+    with instrumentation.stage_run("99_example") as run:
+        with pipeline_db.get_connection() as conn:
+            with run.step("fetch") as step:
+                rows = conn.execute("SELECT * FROM range(1000)").fetchall()
+                step.record(rows_read=len(rows))
+            with run.step("writeback") as step:
+                step.record(rows_written=len(rows))
+
+    with pytest.raises(RuntimeError):
+        with instrumentation.stage_run("99_failing") as run:
+            with run.step("classify"):
+                raise RuntimeError("boom")
+
+    with pipeline_db.get_connection(read_only=True) as conn:
+        recorded = conn.execute(
+            """
+            SELECT stage, step, rows_read, rows_written, duckdb_seconds, status
+            FROM pipeline_runs
+            WHERE run_id = ?
+            ORDER BY stage, step
+            """,
+            [instrumentation.RUN_ID],
+        ).fetchall()
+
+    by_step = {(stage, step): (read, written, db_seconds, status) for stage, step, read, written, db_seconds, status in recorded}
+    assert by_step[("99_example", "total")][:2] == (1000, 1000)
+    assert by_step[("99_example", "fetch")][2] > 0
+    assert by_step[("99_example", "writeback")][1] == 1000
+    assert by_step[("99_failing", "total")][3] == "failed"
+    assert by_step[("99_failing", "classify")][3] == "failed"
+
+    log_records = [json.loads(line) for line in (tmp_path / "pipeline_runs.jsonl").read_text().splitlines()]
+    assert {(record["stage"], record["step"]) for record in log_records} == set(by_step)
+
+
+def test_slow_queries_are_profiled(tmp_path, monkeypatch) -> None:
+    import pipeline.query_profiles as query_profiles
+
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    monkeypatch.setattr(pipeline_db, "QUERY_PROFILE_SLOW_MS", 0.001)
+    monkeypatch.setattr(query_profiles, "PROFILE_DB_PATH", tmp_path / "query_profiles.duckdb")
+
+    with pipeline_db.get_connection() as conn:
+        rows = conn.execute("SELECT range AS n FROM   range(?)", [5000]).fetchall()
+    assert len(rows) == 5000
+
+    slowest = query_profiles.slowest_queries()
+    assert len(slowest) == 1
+    assert slowest[0]["sql_text"] == "SELECT range AS n FROM range(?)"
+    assert slowest[0]["source"] == "test_pipeline_instrumentation.test_slow_queries_are_profiled"
+
+    profile = query_profiles.latest_profile(slowest[0]["query_hash"])
+    assert profile is not None
+    assert profile["params"] == [5000]
+    assert profile["profile"]["rows_returned"] == 5000
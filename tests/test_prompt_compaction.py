@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services.prompt_compaction import compact_input_payload, dedupe_quotes
+from llm.token_budget import estimate_tokens
+
+
+QUOTES = (
+    "Transfer to my savings account failed twice this week and the money only came"
+    " back after five business days until I called the bank",
+    "Login keeps asking for the one time code, then rejects it, so I am locked out"
+    " every single morning before work while commuting downtown",
+    "The new budgeting screen hides recurring bills behind three menus and the"
+    " category totals never add up right which is ridiculous honestly",
+    "Support chat closed my ticket without an answer after I waited forty minutes"
+    " for someone to look at the refund about my duplicated charge",
+    "App freezes on the splash screen since the last update on my Pixel and"
+    " reinstalling did not change anything nor did clearing its cache",
+    "Card was declined at the grocery store although the balance showed plenty of"
+    " funds, very embarrassing moment in front of a long queue",
+    "Notifications arrive hours late, I only learned about a large withdrawal the"
+    " next day from my paper statement from the branch office",
+    "Exchange rates shown before sending abroad differ from what gets charged,"
+    " hidden fees make this feel dishonest compared with rival apps",
+    "Face unlock stopped working after the redesign and typing the long password"
+    " with one hand is painful outside especially during winter",
+    "Statements export as a blank PDF on tablets, my accountant needs them monthly"
+    " and desktop is not an option so I may close my account",
+)
+
+
+def _payload() -> dict:
+    return {
+        "scope": {"start_date": "2025-01-01", "end_date": "2025-01-07", "category": "", "version": "", "issue_label": ""},
+        "kpi_snapshot": {"total_reviews": 120, "avg_rating": 3.1, "pct_negative": 0.41, "critical_count": 9},
+        "top_issues": [
+            {"label": f"Issue {idx}", "review_count": 10 - idx, "weighted_severity": 5.0 - idx}
+            for idx in range(5)
+        ],
+        "evidence_reviews": [
+            {"quote": quote, "sentiment_label": "negative", "severity_score": 0.9, "app_version": "9.1.0"}
+            for quote in QUOTES
+        ],
+        "anomaly_flags": [{"day": "2025-01-03", "metric": "pct_negative", "z_score": 3.2}],
+    }
+
+
+def test_dedupe_quotes_drops_near_identical_quotes() -> None:
+    evidence = [
+        {"quote": "Payment failed twice today, very frustrating"},
+        {"quote": "payment failed twice today very frustrating!"},
+        {"quote": "Love the new budgeting screen"},
+    ]
+    assert [item["quote"] for item in dedupe_quotes(evidence)] == [
+        "Payment failed twice today, very frustrating",
+        "Love the new budgeting screen",
+    ]
+
+
+def test_compacted_payload_is_minified_tabular_and_within_budget(monkeypatch) -> None:
+    monkeypatch.setenv("INSIGHT_PROMPT_TOKEN_BUDGET_WEEKLY_EXEC_BRIEF", "300")
+
+    input_json, stats = compact_input_payload(_payload(), report_type="weekly_exec_brief", measure_original=True)
+    decoded = json.loads(input_json)
+
+    assert "\n" not in input_json
+    assert "category" not in decoded["scope"]
+    assert decoded["evidence_reviews"]["columns"] == ["quote", "sentiment_label", "severity_score", "app_version"]
+    assert estimate_tokens(input_json) <= 300
+    assert stats["compacted_tokens"] < stats["original_tokens"]
+    assert "original_tokens" not in compact_input_payload(_payload(), report_type="weekly_exec_brief")[1]
+
+
+def _shape(input_json: str) -> tuple[int, bool, int, int]:
+    decoded = json.loads(input_json)
+    quotes = [row[0] for row in decoded["evidence_reviews"]["rows"]]
+    return (
+        max(len(quote.removesuffix("...")) for quote in quotes),
+        "anomaly_flags" in decoded,
+        len(quotes),
+        len(decoded["top_issues"]["rows"]),
+    )
+
+
+def test_rows_are_trimmed_one_step_at_a_time_until_the_payload_fits(monkeypatch) -> None:
+    # Each budget is one token below the previous compacted size, so every pass forces exactly the next reduction.
+    budget = 5000
+    shapes = []
+    while True:
+        monkeypatch.setenv("INSIGHT_PROMPT_TOKEN_BUDGET_WEEKLY_EXEC_BRIEF", str(budget))
+        input_json, stats = compact_input_payload(_payload(), report_type="weekly_exec_brief")
+        if estimate_tokens(input_json) > budget:
+            break
+        assert stats["compacted_tokens"] == estimate_tokens(input_json)
+        assert (stats["evidence_rows"], stats["top_issue_rows"]) == _shape(input_json)[2:]
+        shapes.append(_shape(input_json))
+        budget = stats["compacted_tokens"] - 1
+
+    assert shapes == [
+        (120, True, 10, 5),  # every quote survives dedupe
+        (90, True, 10, 5),
+        (60, True, 10, 5),
+        (60, False, 10, 5),
+        *[(60, False, rows, 5) for rows in range(9, 1, -1)],
+        *[(60, False, 2, rows) for rows in range(4, 0, -1)],
+    ]
+    # Below the smallest encoding the minimum rows are kept rather than dropping everything.
+    assert _shape(input_json) == (60, False, 2, 1)
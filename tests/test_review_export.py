@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import duckdb
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.services.search_service as search_service
+import pipeline.db as pipeline_db
+from pipeline.migrations import run_migrations
+from pipeline.wide import refresh_reviews_wide
+
+
+def test_export_matches_every_drilldown_page(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(search_service, "DUCKDB_PATH", db_path)
+    monkeypatch.setattr(search_service, "EXPORT_DIR", tmp_path / "exports")
+    run_migrations()
+
+    with pipeline_db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reviews_raw (review_id, content, score, at_ts, app_version) VALUES (?, ?, ?, ?, ?)",
+            [[f"r{idx:03d}", f"review, \"{idx}\"", idx % 5 + 1, f"2024-01-{idx % 28 + 1:02d}", "1.0"] for idx in range(450)],
+        )
+        conn.executemany(
+            "INSERT INTO reviews_enriched (review_id, category_taxonomy, issues_json, severity_score) VALUES (?, ?, ?, ?)",
+            [
+                [f"r{idx:03d}", "Bugs", '[{"label": "crash"}]' if idx % 3 else "[]", idx / 450]
+                for idx in range(450)
+            ],
+        )
+        refresh_reviews_wide(conn)
+
+    filters = {"start_date": "2024-01-02", "end_date": "2024-01-27", "issue_label": "Crash"}
+    _first_page, total = search_service.search_reviews(**filters, page_size=200)
+    paged = [
+        tuple(row)
+        for page in range(1, total // 200 + 2)
+        for row in search_service.search_reviews(**filters, page=page, page_size=200)[0].itertuples(index=False)
+    ]
+    assert total == len(paged) > 200
+
+    with duckdb.connect() as conn:
+        for file_format in search_service.EXPORT_FORMATS:
+            path, row_count = search_service.export_reviews(**filters, file_format=file_format)
+            assert Path(path).suffix == f".{file_format}" and row_count == total
+            reader = "read_parquet(?)" if file_format == "parquet" else "read_csv(?, header=true)"
+            exported = conn.execute(f"SELECT * FROM {reader} ORDER BY review_id", [path]).fetchall()
+            assert [row[0] for row in exported] == sorted(row[0] for row in paged)
+            assert [row[-1] for row in exported] == [row[-1] for row in sorted(paged)]
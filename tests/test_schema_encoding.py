@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+from pipeline.migrations import ENUM_TYPES, run_migrations
+
+
+def _load_stage(name: str):
+    spec = importlib.util.spec_from_file_location(f"pipeline_{name}", ROOT_DIR / "pipeline" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_enum_types_cover_every_label_the_stages_write() -> None:
+    schema = json.loads((ROOT_DIR / "llm" / "schemas" / "sentiment_batch.schema.json").read_text(encoding="utf-8"))
+    llm_labels = schema["properties"]["results"]["items"]["properties"]["sentiment_label"]["enum"]
+    sentiment = _load_stage("02_enrich_sentiment")
+    rule_labels = {sentiment._classify_sentiment(None, score)[0] for score in range(1, 6)}
+    assert set(llm_labels) | rule_labels == set(ENUM_TYPES["sentiment_label_t"])
+
+    severity = _load_stage("04_score_severity")
+    bands = {severity._severity_band(score / 100) for score in range(101)}
+    assert bands == set(ENUM_TYPES["severity_band_t"])
+
+
+def test_existing_wide_table_is_encoded_in_place(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pipeline_db, "DB_PATH", tmp_path / "reviews.duckdb")
+    with pipeline_db.get_connection() as conn:
+        conn.execute(
+            """
+            CREATE TABLE reviews_wide (
+                review_id VARCHAR, sentiment_label VARCHAR, severity_band VARCHAR, issues_json VARCHAR
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO reviews_wide VALUES
+                ('r1', 'negative', 'critical', '[{"label": "Glitches/Bugs"}, {"label": "crash"}]'),
+                ('r2', NULL, 'low', NULL)
+            """
+        )
+
+    run_migrations()
+    run_migrations()
+
+    with pipeline_db.get_connection() as conn:
+        types = dict(
+            conn.execute(
+                "SELECT column_name, data_type FROM duckdb_columns() WHERE table_name = 'reviews_wide'"
+            ).fetchall()
+        )
+        rows = conn.execute(
+            "SELECT review_id, sentiment_label, severity_band, issue_labels FROM reviews_wide ORDER BY review_id"
+        ).fetchall()
+    assert types["sentiment_label"].startswith("ENUM") and types["severity_band"].startswith("ENUM")
+    assert types["issue_labels"] == "VARCHAR[]"
+    assert rows == [("r1", "negative", "critical", ["Glitches/Bugs", "crash"]), ("r2", None, "low", [])]
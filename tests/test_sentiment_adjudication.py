@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from llm.json_enforcer import build_jsonschema_validator, load_json_schema
+
+
+def _load_stage(name: str):
+    spec = importlib.util.spec_from_file_location(f"pipeline_{name}", ROOT_DIR / "pipeline" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sentiment = _load_stage("02_enrich_sentiment")
+
+
+@pytest.mark.parametrize(
+    ("content", "score", "confidence", "expected"),
+    [
+        ("Love it, great and smooth transfers every time", 5, 0.69, True),  # below the confidence threshold
+        ("Love it, great and smooth transfers every time", 5, 0.70, False),
+        ("Terrible, the worst update and it keeps failing on me", 5, 0.90, True),  # rating/text conflict
+        ("Great app", 1, 0.90, True),
+        ("Meh", 5, 0.90, True),  # short text, extreme rating
+        ("Meh", 1, 0.90, True),
+        ("Meh", 3, 0.90, False),
+        ("Meh, it does the job for me", 1, 0.90, False),
+    ],
+)
+def test_adjudication_routing(content, score, confidence, expected) -> None:
+    assert sentiment._needs_adjudication(content, score, confidence) is expected
+
+
+def test_hybrid_confidence() -> None:
+    assert sentiment._combine_with_llm("positive", 0.62, "positive", 0.91) == pytest.approx(("positive", 0.91))
+    assert sentiment._combine_with_llm("positive", 0.80, "negative", 0.60) == pytest.approx(("negative", 0.65))
+    assert sentiment._combine_with_llm("neutral", 0.50, "neutral", 1.0) == pytest.approx(("neutral", 0.99))
+    assert sentiment._combine_with_llm("neutral", 0.05, "positive", 0.10) == pytest.approx(("positive", 0.0))
+
+
+def _fake_llm(results: list[dict]):
+    """Stands in for call_json_with_retry; the batch's validator runs on the canned payload as usual."""
+
+    def _call(model, system, user, schema_validator, num_predict=None):
+        payload = {"results": results}
+        schema_validator(payload)
+        return payload
+
+    return _call
+
+
+def test_adjudicate_batch_combines_llm_labels_and_rejects_missing_ids(monkeypatch) -> None:
+    validator = build_jsonschema_validator(load_json_schema(sentiment.SCHEMA_PATH))
+    batch = [("r1", "Great app", 1, "neutral", 0.55), ("r2", "Meh", 5, "positive", 0.80)]
+    prompts: list[str] = []
+
+    def _recording(model, system, user, schema_validator, num_predict=None):
+        prompts.append(user)
+        return _fake_llm(
+            [
+                {"review_id": "r2", "sentiment_label": "neutral", "confidence": 0.6},
+                {"review_id": "r1", "sentiment_label": "positive", "confidence": 0.7},
+                {"review_id": "other", "sentiment_label": "negative", "confidence": 0.9},
+            ]
+        )(model, system, user, schema_validator, num_predict)
+
+    monkeypatch.setattr(sentiment, "call_json_with_retry", _recording)
+    updates = sentiment._adjudicate_batch(batch, "sys", "{{input_json}}", validator)
+    assert [(label, round(confidence, 2), review_id) for label, confidence, review_id in updates] == [
+        ("positive", 0.55, "r1"),
+        ("neutral", 0.65, "r2"),
+    ]
+    assert [review["review_id"] for review in json.loads(prompts[0])["reviews"]] == ["r1", "r2"]
+
+    monkeypatch.setattr(
+        sentiment,
+        "call_json_with_retry",
+        _fake_llm([{"review_id": "r1", "sentiment_label": "positive", "confidence": 0.7}]),
+    )
+    with pytest.raises(ValueError, match="Missing results for review_ids: r2"):
+        sentiment._adjudicate_batch(batch, "sys", "{{input_json}}", validator)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.synthetic_corpus import OUTPUT_COLUMNS, generate_corpus, learn_profile
+
+ROWS = 400
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return learn_profile()
+
+
+def _read(path: Path) -> tuple[list[str], list[list[str]]]:
+    with path.open(encoding="utf-8", newline="") as handle:
+        header, *rows = list(csv.reader(handle))
+    return header, rows
+
+
+def test_corpus_is_deterministic_with_the_source_header(tmp_path, profile) -> None:
+    first, second, other = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+    assert generate_corpus(first, ROWS, seed=7, chunk_rows=150, profile=profile) == ROWS
+    generate_corpus(second, ROWS, seed=7, chunk_rows=ROWS, profile=profile)
+    generate_corpus(other, ROWS, seed=8, profile=profile)
+
+    header, rows = _read(first)
+    assert tuple(header) == OUTPUT_COLUMNS
+    assert len(rows) == ROWS and all(len(row) == len(OUTPUT_COLUMNS) for row in rows)
+    assert {row[3] for row in rows} <= {"1", "2", "3", "4", "5"}
+    # Chunking does not change the stream; a different seed does.
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+
+
+def test_duplicate_review_ids_follow_the_profile_rate(tmp_path, profile) -> None:
+    # The learned rate is ~0.1%, too rare to measure in a few hundred rows; raise it to check the mechanism.
+    boosted = dataclasses.replace(profile, duplicate_id_rate=0.1)
+    path = tmp_path / "dupes.csv"
+    generate_corpus(path, ROWS, seed=7, profile=boosted)
+
+    _header, rows = _read(path)
+    duplicate_rate = 1 - len({row[0] for row in rows}) / ROWS
+    assert 0.05 <= duplicate_rate <= 0.15
+    assert 0.0 < profile.duplicate_id_rate < 0.05
+
+
+def test_parquet_output_matches_the_csv_stream(tmp_path, profile) -> None:
+    csv_path, parquet_path = tmp_path / "corpus.csv", tmp_path / "corpus.parquet"
+    generate_corpus(csv_path, ROWS, seed=7, profile=profile)
+    assert generate_corpus(parquet_path, ROWS, seed=7, chunk_rows=150, profile=profile) == ROWS
+
+    with duckdb.connect() as conn:
+        relation = conn.execute("SELECT * FROM read_parquet(?)", [str(parquet_path)])
+        header = tuple(column[0] for column in relation.description)
+        rows = [[str(value) for value in row] for row in relation.fetchall()]
+    assert header == OUTPUT_COLUMNS
+    assert rows == _read(csv_path)[1]
+    # The scratch database is removed once the file is written.
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["corpus.csv", "corpus.parquet"]
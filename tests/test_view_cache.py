@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import app.services.view_cache as view_cache
+
+
+def test_view_cache_reuses_values_until_data_version_changes(monkeypatch) -> None:
+    version = {"value": 1}
+    monkeypatch.setattr(view_cache, "data_version", lambda: version["value"])
+    cache = view_cache.ViewCache("test", maxsize=2)
+    calls: list[str] = []
+
+    def _compute(key: str) -> str:
+        calls.append(key)
+        return key.upper()
+
+    assert cache.get_or_compute("a", lambda: _compute("a")) == "A"
+    assert cache.get_or_compute("a", lambda: _compute("a")) == "A"
+    cache.get_or_compute("b", lambda: _compute("b"))
+    cache.get_or_compute("c", lambda: _compute("c"))
+    # "a" was least recently used and fell out of the two-entry cache.
+    cache.get_or_compute("a", lambda: _compute("a"))
+    assert calls == ["a", "b", "c", "a"]
+
+    version["value"] = 2
+    cache.get_or_compute("a", lambda: _compute("a"))
+    assert calls == ["a", "b", "c", "a", "a"]
+
+
+def test_view_cache_reports_evicted_values(monkeypatch) -> None:
+    version = {"value": 1}
+    monkeypatch.setattr(view_cache, "data_version", lambda: version["value"])
+    evicted: list[str] = []
+    cache = view_cache.ViewCache("test", maxsize=1, on_evict=evicted.append)
+
+    cache.get_or_compute("a", lambda: "A")
+    cache.get_or_compute("b", lambda: "B")
+    assert evicted == ["A"]
+
+    version["value"] = 2
+    cache.get_or_compute("b", lambda: "B2")
+    assert evicted == ["A", "B"]
+
+    cache.clear()
+    assert evicted == ["A", "B", "B2"]
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import pipeline.db as pipeline_db
+import pipeline.instrumentation as instrumentation
+from pipeline.migrations import run_migrations
+from pipeline.watch_ingest import IngestWatcher, _stage
+from pipeline.wide import WIDE_SELECT
+
+HEADER = "reviewId,userName,content,score,thumbsUpCount,reviewCreatedVersion,at,appVersion,category"
+
+
+def _write_shard(path: Path, rows: list[str]) -> None:
+    path.write_text("\n".join([HEADER, *rows]) + "\n", encoding="utf-8")
+
+
+def test_micro_batches_only_process_new_reviews(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    monkeypatch.setattr(_stage("10_export_lakehouse"), "LAKEHOUSE_DIR", tmp_path / "lake")
+    inbox = tmp_path / "input"
+    inbox.mkdir()
+    run_migrations()
+    watcher = IngestWatcher(directory=inbox, poll_seconds=0.05, batch_wait_seconds=0.0)
+    watcher.load_state()
+
+    _write_shard(inbox / "hour-01.csv", ["r1,Ann,App crashes on login,1,3,1.0,2024-01-03 10:00:00,1.0,Bugs"])
+    assert watcher.scan() == 0  # first sighting: wait until the file holds still
+    assert watcher.scan() == 1
+    assert watcher.scan() == 0  # already queued
+    assert watcher.process_batch(watcher.next_batch(timeout=1)) == ["r1"]
+
+    _write_shard(
+        inbox / "hour-02.csv",
+        [
+            "r2,Bob,Love it,5,0,1.1,2024-01-04 09:00:00,1.1,Praise",
+            "r3,Cy,Too slow,2,1,1.1,2024-01-04 11:00:00,1.1,Performance",
+        ],
+    )
+    watcher.scan()
+    assert watcher.scan() == 1  # hour-01 was ingested and is unchanged
+    assert sorted(watcher.process_batch(watcher.next_batch(timeout=1))) == ["r2", "r3"]
+
+    with duckdb.connect(str(db_path), read_only=True) as conn:
+        enriched = conn.execute(
+            "SELECT review_id FROM reviews_enriched WHERE sentiment_label IS NOT NULL AND severity_score IS NOT NULL"
+        ).fetchall()
+        days = conn.execute("SELECT day, total_reviews FROM daily_aggregates ORDER BY day").fetchall()
+        fetched = conn.execute(
+            """
+            SELECT rows_read FROM pipeline_runs
+            WHERE stage = '02_enrich_sentiment' AND step = 'fetch'
+            ORDER BY started_at
+            """
+        ).fetchall()
+        files = conn.execute("SELECT COUNT(*), COUNT(DISTINCT run_id) FROM ingested_files").fetchone()
+        wide = conn.execute("SELECT review_id FROM reviews_wide ORDER BY rowid").fetchall()
+        wide_drift = conn.execute(
+            f"""
+            SELECT COUNT(*) FROM (
+                (SELECT * FROM reviews_wide EXCEPT ALL {WIDE_SELECT})
+                UNION ALL
+                ({WIDE_SELECT} EXCEPT ALL SELECT * FROM reviews_wide)
+            )
+            """
+        ).fetchone()[0]
+
+    assert sorted(row[0] for row in enriched) == ["r1", "r2", "r3"]
+    assert [row[1] for row in days] == [1, 2]
+    assert [row[0] for row in fetched] == [1, 2]
+    assert files == (2, 2)
+    assert [row[0] for row in wide] == ["r1", "r2", "r3"] and wide_drift == 0
+    assert sorted(path.name for path in (tmp_path / "lake" / "reviews").iterdir()) == ["month=2024-01"]
+
+    restarted = IngestWatcher(directory=inbox, poll_seconds=0.05)
+    restarted.load_state()
+    restarted.scan()
+    assert restarted.scan() == 0
+
+
+def test_failed_batch_is_requeued_on_the_next_scan(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "reviews.duckdb"
+    monkeypatch.setattr(pipeline_db, "DB_PATH", db_path)
+    monkeypatch.setattr(instrumentation, "RUN_LOG_PATH", tmp_path / "pipeline_runs.jsonl")
+    monkeypatch.setattr(_stage("10_export_lakehouse"), "LAKEHOUSE_DIR", tmp_path / "lake")
+    inbox = tmp_path / "input"
+    inbox.mkdir()
+    run_migrations()
+    watcher = IngestWatcher(directory=inbox, poll_seconds=0.05, batch_wait_seconds=0.0, retry_seconds=0.0)
+    watcher.load_state()
+
+    severity = _stage("04_score_severity")
+    score = severity.main
+    calls = []
+
+    def flaky(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("Could not set lock on file")
+        return score(**kwargs)
+
+    monkeypatch.setattr(severity, "main", flaky)
+    _write_shard(inbox / "hour-01.csv", ["r1,Ann,App crashes on login,1,3,1.0,2024-01-03 10:00:00,1.0,Bugs"])
+    watcher.scan()
+    watcher.scan()
+    assert watcher.process_batch(watcher.next_batch(timeout=1)) == ["r1"]  # ingested, then 04 failed
+
+    assert watcher.scan() == 1  # not marked done: re-queued without touching the file
+    assert watcher.process_batch(watcher.next_batch(timeout=1)) == ["r1"]
+    assert watcher.scan() == 0
+
+    with duckdb.connect(str(db_path), read_only=True) as conn:
+        scored = conn.execute("SELECT COUNT(*) FROM reviews_enriched WHERE severity_score IS NOT NULL").fetchone()[0]
+        files = conn.execute("SELECT COUNT(*) FROM ingested_files").fetchone()[0]
+        daily = conn.execute("SELECT SUM(total_reviews) FROM daily_aggregates").fetchone()[0]
+    assert len(calls) == 2 and scored == 1 and files == 1 and daily == 1
+
+
+def test_failed_files_back_off_then_give_up(tmp_path) -> None:
+    path = tmp_path / "part-0.csv"
+    _write_shard(path, [])
+    watcher = IngestWatcher(directory=tmp_path, poll_seconds=0.05, retry_seconds=60.0, max_attempts=2)
+    stamp = (path.stat().st_size, path.stat().st_mtime_ns)
+
+    watcher._mark_failed(path, stamp)
+    watcher.scan()
+    assert watcher.scan() == 0  # waiting out the backoff
+
+    watcher._mark_failed(path, stamp)
+    assert watcher._done[path] == stamp and path not in watcher._failed
+
+
+def test_full_queue_blocks_the_scanner(tmp_path) -> None:
+    for idx in range(3):
+        _write_shard(tmp_path / f"part-{idx}.csv", [])
+    watcher = IngestWatcher(directory=tmp_path, poll_seconds=0.05, queue_size=1, batch_files=1, batch_wait_seconds=0.0)
+    watcher.scan()
+
+    scanner = threading.Thread(target=watcher.scan)
+    scanner.start()
+    time.sleep(0.2)
+    assert scanner.is_alive() and watcher.queue.qsize() == 1
+
+    drained = [watcher.next_batch(timeout=1) for _ in range(3)]
+    scanner.join(timeout=2)
+    assert not scanner.is_alive()
+    assert [batch[0][0].name for batch in drained] == ["part-0.csv", "part-1.csv", "part-2.csv"]